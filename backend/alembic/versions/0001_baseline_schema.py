@@ -0,0 +1,60 @@
+"""baseline schema
+
+The users and health_entries tables as previously created by
+Base.metadata.create_all. Databases that were set up that way already have
+them: mark them with `alembic stamp 0001` instead of running this revision.
+Tables added since (caches, parse queue, local nutrition) are created by 0006.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 06:28:57.922997
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('hashed_password', sa.String(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_table('health_entries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entry_text', sa.String(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('entry_type', sa.String(), nullable=True),
+    sa.Column('value', sa.Float(), nullable=True),
+    sa.Column('unit', sa.String(), nullable=True),
+    sa.Column('parsed_data', sa.JSON(), nullable=True),
+    sa.Column('image_url', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_health_entries_entry_type'), 'health_entries', ['entry_type'], unique=False)
+    op.create_index(op.f('ix_health_entries_id'), 'health_entries', ['id'], unique=False)
+    op.create_index(op.f('ix_health_entries_entry_text'), 'health_entries', ['entry_text'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_health_entries_entry_text'), table_name='health_entries')
+    op.drop_index(op.f('ix_health_entries_id'), table_name='health_entries')
+    op.drop_index(op.f('ix_health_entries_entry_type'), table_name='health_entries')
+    op.drop_table('health_entries')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
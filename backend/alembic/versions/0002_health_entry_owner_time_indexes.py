@@ -0,0 +1,57 @@
+"""health_entries: composite owner/time indexes, drop entry_text index
+
+Entry lists and every report filter one owner's entries by a timestamp range,
+usually with an entry_type. Replaces the unused B-tree on entry_text (only a
+write cost) with (owner_id, timestamp) and (owner_id, entry_type, timestamp).
+
+Indexes are built and dropped CONCURRENTLY so the table stays writable; that
+cannot run inside a transaction, hence the autocommit block. If a concurrent
+build fails it leaves an INVALID index behind: drop it and re-run the upgrade.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 06:40:12.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_health_entries_owner_id_timestamp', 'health_entries', ['owner_id', 'timestamp'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_health_entries_owner_id_entry_type_timestamp', 'health_entries', ['owner_id', 'entry_type', 'timestamp'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_health_entries_entry_text', table_name='health_entries',
+            postgresql_concurrently=True, if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_health_entries_entry_text', 'health_entries', ['entry_text'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_health_entries_owner_id_entry_type_timestamp', table_name='health_entries',
+            postgresql_concurrently=True, if_exists=True,
+        )
+        op.drop_index(
+            'ix_health_entries_owner_id_timestamp', table_name='health_entries',
+            postgresql_concurrently=True, if_exists=True,
+        )
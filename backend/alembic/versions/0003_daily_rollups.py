@@ -0,0 +1,58 @@
+"""daily rollups
+
+Per-user, per-local-day report totals. No data is copied here: each user's rollups
+are built on their first report read, or ahead of time with
+`python -m scripts.rebuild_daily_rollups --tz-offset <minutes>`.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 06:34:59.740679
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('daily_rollup_zones',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('tz_offset_minutes', sa.Integer(), nullable=False),
+    sa.Column('built_at', sa.DateTime(), nullable=False),
+    sa.Column('last_read_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('owner_id', 'tz_offset_minutes')
+    )
+    op.create_table('daily_rollups',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('tz_offset_minutes', sa.Integer(), nullable=False),
+    sa.Column('local_date', sa.Date(), nullable=False),
+    sa.Column('entry_count', sa.Integer(), nullable=False),
+    sa.Column('food_entry_count', sa.Integer(), nullable=False),
+    sa.Column('calories', sa.Float(), nullable=False),
+    sa.Column('protein_g', sa.Float(), nullable=False),
+    sa.Column('carbs_g', sa.Float(), nullable=False),
+    sa.Column('fat_g', sa.Float(), nullable=False),
+    sa.Column('steps_entry_count', sa.Integer(), nullable=False),
+    sa.Column('total_steps', sa.Float(), nullable=False),
+    sa.Column('weight_entry_count', sa.Integer(), nullable=False),
+    sa.Column('weight_kg_sum', sa.Float(), nullable=False),
+    sa.Column('last_weight_kg', sa.Float(), nullable=True),
+    sa.Column('last_weight_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('owner_id', 'tz_offset_minutes', 'local_date')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('daily_rollups')
+    op.drop_table('daily_rollup_zones')
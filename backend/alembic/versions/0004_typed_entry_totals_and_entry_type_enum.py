@@ -0,0 +1,71 @@
+"""typed entry totals and entry type enum
+
+Copies food entries' parsed_data totals into nullable float columns so reports can
+aggregate them in SQL, and stores entry_type as the enum health_entry_type.
+
+Changing entry_type's type rewrites health_entries (and its indexes) under an
+ACCESS EXCLUSIVE lock; run it in a quiet period on large tables. The enum has every
+type the LLM prompt asks for. A value outside it (a type the model made up) becomes
+'unknown', and the original is kept in parsed_data as original_entry_type.
+Totals that are missing count as 0; food entries with any non-numeric total get
+NULL columns, as the app does when saving them.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 06:52:10.315044
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ENTRY_TYPES = (
+    'food', 'weight', 'steps', 'exercise', 'medication', 'symptom', 'note', 'unknown', 'error', 'pending',
+)
+TOTAL_COLUMNS = ('total_calories', 'total_protein_g', 'total_carbs_g', 'total_fat_g')
+NUMBER = r'^\s*-?[0-9]+(\.[0-9]+)?([eE][-+]?[0-9]+)?\s*$'
+
+
+def upgrade() -> None:
+    for column in TOTAL_COLUMNS:
+        op.add_column('health_entries', sa.Column(column, sa.Float(), nullable=True))
+
+    entry_type = postgresql.ENUM(*ENTRY_TYPES, name='health_entry_type')
+    entry_type.create(op.get_bind())
+    known = ", ".join(f"'{value}'" for value in ENTRY_TYPES)
+    # Keep any other type in parsed_data before it becomes 'unknown'
+    op.execute(
+        "UPDATE health_entries SET parsed_data = CASE WHEN json_typeof(parsed_data) = 'object' "
+        "THEN (parsed_data::jsonb || jsonb_build_object('original_entry_type', entry_type))::json "
+        "ELSE json_build_object('original_entry_type', entry_type, 'original_parsed_data', parsed_data) END "
+        f"WHERE entry_type IS NOT NULL AND entry_type NOT IN ({known})"
+    )
+    op.execute(
+        "ALTER TABLE health_entries ALTER COLUMN entry_type TYPE health_entry_type USING "
+        f"(CASE WHEN entry_type IS NULL OR entry_type IN ({known}) THEN entry_type ELSE 'unknown' END)::health_entry_type"
+    )
+
+    # Backfill: all four totals when every one present is numeric, else leave them NULL
+    values = {column: f"NULLIF(parsed_data->>'{column}', '')" for column in TOTAL_COLUMNS}
+    all_numeric = " AND ".join(f"({value} IS NULL OR {value} ~ '{NUMBER}')" for value in values.values())
+    assignments = ", ".join(f"{column} = COALESCE({value}::float, 0)" for column, value in values.items())
+    op.execute(
+        f"UPDATE health_entries SET {assignments} "
+        f"WHERE entry_type = 'food' AND json_typeof(parsed_data) = 'object' AND {all_numeric}"
+    )
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE health_entries ALTER COLUMN entry_type TYPE VARCHAR USING entry_type::text")
+    postgresql.ENUM(name='health_entry_type').drop(op.get_bind())
+    for column in reversed(TOTAL_COLUMNS):
+        op.drop_column('health_entries', column)
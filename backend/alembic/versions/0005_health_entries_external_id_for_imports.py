@@ -0,0 +1,42 @@
+"""health_entries external_id for imports
+
+Records imported from Apple Health / Google Fit exports keep a stable ID so a
+re-import skips what is already there (INSERT ... ON CONFLICT DO NOTHING on the
+partial unique index). Adding the nullable column is a catalog-only change; the
+index is built CONCURRENTLY, as in 0002, and only covers imported rows.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 06:59:45.327501
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('health_entries', sa.Column('external_id', sa.String(), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_health_entries_owner_id_external_id', 'health_entries', ['owner_id', 'external_id'],
+            unique=True, postgresql_where=sa.text('external_id IS NOT NULL'),
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'uq_health_entries_owner_id_external_id', table_name='health_entries',
+            postgresql_concurrently=True, if_exists=True,
+        )
+    op.drop_column('health_entries', 'external_id')
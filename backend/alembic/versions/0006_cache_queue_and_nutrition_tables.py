@@ -0,0 +1,103 @@
+"""llm_parse_cache, nutrition_cache, nutrition_products and parse_jobs
+
+The parse-result cache, the OFF lookup cache, the local nutrition table and the
+background parse queue, which were created by Base.metadata.create_all before
+the schema was versioned. A database stamped at 0001 gets them here. One that
+create_all set up after they were added already has some of them, so every
+table and index is only created if it does not exist yet.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 09:12:40.511203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('llm_parse_cache',
+    sa.Column('cache_key', sa.String(length=64), nullable=False),
+    sa.Column('model_name', sa.String(), nullable=False),
+    sa.Column('prompt_version', sa.String(), nullable=False),
+    sa.Column('result', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('cache_key'),
+    if_not_exists=True,
+    )
+    op.create_table('nutrition_cache',
+    sa.Column('query', sa.String(), nullable=False),
+    sa.Column('found', sa.Boolean(), nullable=False),
+    sa.Column('data', sa.JSON(), nullable=True),
+    sa.Column('fetched_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('query'),
+    if_not_exists=True,
+    )
+    op.create_index(op.f('ix_nutrition_cache_expires_at'), 'nutrition_cache', ['expires_at'], unique=False, if_not_exists=True)
+    op.create_table('nutrition_products',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('external_id', sa.String(), nullable=False),
+    sa.Column('product_name', sa.String(), nullable=False),
+    sa.Column('name_normalized', sa.String(), nullable=False),
+    sa.Column('calories_100g', sa.Float(), nullable=False),
+    sa.Column('protein_100g', sa.Float(), nullable=False),
+    sa.Column('carbs_100g', sa.Float(), nullable=False),
+    sa.Column('fat_100g', sa.Float(), nullable=False),
+    sa.Column('popularity', sa.Integer(), nullable=False),
+    sa.Column('name_search', postgresql.TSVECTOR(), sa.Computed("to_tsvector('english', name_normalized)", persisted=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('source', 'external_id', name='uq_nutrition_products_source_external_id'),
+    if_not_exists=True,
+    )
+    op.create_index('ix_nutrition_products_name_normalized', 'nutrition_products', ['name_normalized'], unique=False, if_not_exists=True)
+    op.create_index('ix_nutrition_products_name_search', 'nutrition_products', ['name_search'], unique=False, postgresql_using='gin', if_not_exists=True)
+    op.create_table('parse_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entry_id', sa.Integer(), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('stage', sa.String(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('run_after', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.Column('locked_by', sa.String(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['entry_id'], ['health_entries.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True,
+    )
+    op.create_index(op.f('ix_parse_jobs_entry_id'), 'parse_jobs', ['entry_id'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_parse_jobs_id'), 'parse_jobs', ['id'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_parse_jobs_owner_id'), 'parse_jobs', ['owner_id'], unique=False, if_not_exists=True)
+    op.create_index('ix_parse_jobs_status_run_after', 'parse_jobs', ['status', 'run_after'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_parse_jobs_status_run_after', table_name='parse_jobs')
+    op.drop_index(op.f('ix_parse_jobs_owner_id'), table_name='parse_jobs')
+    op.drop_index(op.f('ix_parse_jobs_id'), table_name='parse_jobs')
+    op.drop_index(op.f('ix_parse_jobs_entry_id'), table_name='parse_jobs')
+    op.drop_table('parse_jobs')
+    op.drop_index('ix_nutrition_products_name_search', table_name='nutrition_products', postgresql_using='gin')
+    op.drop_index('ix_nutrition_products_name_normalized', table_name='nutrition_products')
+    op.drop_table('nutrition_products')
+    op.drop_index(op.f('ix_nutrition_cache_expires_at'), table_name='nutrition_cache')
+    op.drop_table('nutrition_cache')
+    op.drop_table('llm_parse_cache')
@@ -0,0 +1,35 @@
+"""health_entry_type: exercise, medication, symptom and note
+
+The LLM prompt asks for these types, but the first version of 0004 left them out
+of the enum, so they were saved as 'unknown'. 0004 now creates the enum with
+them; this adds them to databases that ran 0004 before. ADD VALUE cannot be used
+in the transaction that adds it, hence the autocommit block. Downgrading keeps
+the values: Postgres cannot drop enum values, and 0004's downgrade drops the type.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 09:48:03.127355
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NEW_TYPES = ('exercise', 'medication', 'symptom', 'note')
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for value in NEW_TYPES:
+            op.execute(f"ALTER TYPE health_entry_type ADD VALUE IF NOT EXISTS '{value}' BEFORE 'unknown'")
+
+
+def downgrade() -> None:
+    pass
@@ -1,15 +1,16 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.core import security
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, AsyncSessionLocal
 
 # OAuth2PasswordBearer retrieves the token from the Authorization header
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -23,15 +24,19 @@ def get_db() -> Generator:
     finally:
         db.close()
 
-def get_current_user(
-    db: Session = Depends(get_db),
-    token: str = Depends(reusable_oauth2)
-) -> models.User:
-    credentials_exception = HTTPException(
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """AsyncSession for async endpoints; sync CRUD code runs on it through `await db.run_sync(...)`."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _token_email(token: str) -> str:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -40,11 +45,26 @@ def get_current_user(
         token_data = schemas.TokenPayload.parse_obj(payload)
         # token_data = schemas.TokenPayload.model_validate(payload) # Pydantic V2
     except (JWTError, ValidationError):
-        raise credentials_exception
+        raise _credentials_exception()
+    return token_data.sub
+
+def get_current_user(
+    db: Session = Depends(get_db),
+    token: str = Depends(reusable_oauth2)
+) -> models.User:
+    user = crud.user.get_by_email(db, email=_token_email(token))
+    if user is None:
+        raise _credentials_exception()
+    return user
 
-    user = crud.user.get_by_email(db, email=token_data.sub)
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db),
+    token: str = Depends(reusable_oauth2)
+) -> models.User:
+    """get_current_user on the async session, so async endpoints need no sync connection."""
+    user = await db.run_sync(crud.user.get_by_email, email=_token_email(token))
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     return user
 
 def get_current_active_user(
@@ -52,4 +72,16 @@ def get_current_active_user(
 ) -> models.User:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user 
\ No newline at end of file
+    return current_user 
+
+async def get_current_active_user_async(
+    current_user: models.User = Depends(get_current_user_async),
+) -> models.User:
+    return get_current_active_user(current_user)
+
+def get_current_admin_user(
+    current_user: models.User = Depends(get_current_active_user),
+) -> models.User:
+    if current_user.email not in settings.ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="Admin privileges required")
+    return current_user
@@ -0,0 +1,154 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+import logging
+
+from app import models, schemas
+from app.api import deps
+from app.services.parse_cache import parse_cache
+from app.services.nutrition_cache import nutrition_cache
+from app import crud
+from app.services import parse_queue
+from app.services.llm_metrics import tier_metrics
+from app.services.llm_parser import model_tiers
+from app.services.resilience import breakers
+from app.services.food_data_service import off_client, off_single_flight
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.get("/cache/parse", response_model=schemas.admin.ParseCacheStats)
+def read_parse_cache_stats(
+    current_user: models.User = Depends(deps.get_current_admin_user),
+):
+    """
+    Hit/miss counters for the LLM parse-result cache.
+    """
+    logger.info(f"Admin {current_user.id} reading parse cache stats")
+    return parse_cache.stats()
+
+@router.delete("/cache/parse/memory", status_code=status.HTTP_204_NO_CONTENT)
+def clear_parse_cache_memory(
+    current_user: models.User = Depends(deps.get_current_admin_user),
+):
+    """
+    Drop the in-process tier of the parse-result cache (the Postgres tier is kept).
+    """
+    logger.info(f"Admin {current_user.id} clearing in-process parse cache")
+    parse_cache.clear_memory()
+    return
+
+@router.get("/cache/nutrition", response_model=schemas.admin.NutritionCacheStats)
+def read_nutrition_cache_stats(
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_admin_user),
+):
+    """
+    Hit/miss counters for the Open Food Facts lookup cache, plus table totals.
+    """
+    logger.info(f"Admin {current_user.id} reading nutrition cache stats")
+    return nutrition_cache.stats(db)
+
+@router.get("/cache/nutrition/entry", response_model=schemas.admin.NutritionCacheEntry)
+def read_nutrition_cache_entry(
+    item: str = Query(..., min_length=1, description="Food item name (normalized the same way as lookups)"),
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_admin_user),
+):
+    """
+    The cached lookup result for one item name.
+    """
+    entry = nutrition_cache.inspect(db, item)
+    if not entry:
+        raise HTTPException(status_code=404, detail=f"No cached nutrition lookup for '{item}'")
+    return entry
+
+@router.delete("/cache/nutrition", response_model=schemas.admin.NutritionCachePurgeResult)
+def purge_nutrition_cache(
+    item: Optional[str] = Query(None, description="Only purge this item name"),
+    negative_only: bool = Query(False, description="Only purge cached misses"),
+    expired_only: bool = Query(False, description="Only purge entries past their stale window"),
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_admin_user),
+):
+    """
+    Delete cached lookups (all of them unless filtered). Other processes drop
+    their in-memory copies within NUTRITION_CACHE_MEMORY_TTL_SECONDS.
+    """
+    logger.info(f"Admin {current_user.id} purging nutrition cache (item={item}, negative_only={negative_only}, expired_only={expired_only})")
+    return {"deleted": nutrition_cache.purge(db, item, negative_only=negative_only, expired_only=expired_only)}
+
+@router.get("/breakers", response_model=List[schemas.admin.CircuitBreakerState])
+def read_circuit_breakers(
+    current_user: models.User = Depends(deps.get_current_admin_user),
+):
+    """
+    State of the circuit breakers guarding Gemini and Open Food Facts.
+    """
+    logger.info(f"Admin {current_user.id} reading circuit breaker state")
+    return [breaker.snapshot() for breaker in breakers.values()]
+
+@router.post("/breakers/{name}/reset", response_model=schemas.admin.CircuitBreakerState)
+def reset_circuit_breaker(
+    name: str,
+    current_user: models.User = Depends(deps.get_current_admin_user),
+):
+    """
+    Force a breaker closed and clear its failure window.
+    """
+    breaker = breakers.get(name)
+    if not breaker:
+        raise HTTPException(status_code=404, detail=f"Unknown circuit breaker '{name}'")
+    logger.info(f"Admin {current_user.id} resetting circuit breaker '{name}'")
+    breaker.reset()
+    return breaker.snapshot()
+
+@router.get("/http/openfoodfacts", response_model=schemas.admin.HttpClientStats)
+def read_off_client_stats(
+    current_user: models.User = Depends(deps.get_current_admin_user),
+):
+    """
+    Connection reuse, retries and single-flight coalescing of Open Food Facts requests.
+    """
+    logger.info(f"Admin {current_user.id} reading OFF HTTP client stats")
+    flights = off_single_flight.stats()
+    return {
+        **off_client.stats(),
+        "coalesced_calls": flights["coalesced"],
+        "coalescing_rate": flights["coalescing_rate"],
+        "in_flight": flights["in_flight"],
+    }
+
+@router.get("/queue", response_model=schemas.admin.ParseQueueStats)
+def read_parse_queue_stats(
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_admin_user),
+):
+    """
+    Depth and lag of the background parse job queue.
+    """
+    logger.info(f"Admin {current_user.id} reading parse queue stats")
+    return {**crud.parse_job.queue_stats(db), "local_workers": parse_queue.live_worker_count()}
+
+@router.get("/llm/tiers", response_model=List[schemas.admin.LLMTierStats])
+def read_llm_tier_stats(
+    current_user: models.User = Depends(deps.get_current_admin_user),
+):
+    """
+    Per-tier calls, latency percentiles, escalation rate (and reasons), tokens and
+    estimated cost for the model cascade, in cascade order.
+    """
+    logger.info(f"Admin {current_user.id} reading LLM tier stats")
+    return tier_metrics.snapshot(model_tiers())
+
+@router.delete("/llm/tiers", status_code=status.HTTP_204_NO_CONTENT)
+def reset_llm_tier_stats(
+    current_user: models.User = Depends(deps.get_current_admin_user),
+):
+    """
+    Reset the cascade counters (e.g. after changing tiers or thresholds).
+    """
+    logger.info(f"Admin {current_user.id} resetting LLM tier stats")
+    tier_metrics.reset()
+    return
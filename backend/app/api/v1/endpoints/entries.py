@@ -1,96 +1,471 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, status, File, UploadFile, Form
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, status, File, UploadFile, Form, Request, Response, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Any, List, Optional
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+import json
+import shutil
+import tempfile
+import time
 import logging # Import logging
 
 from app import crud, models, schemas
 from app.api import deps
+from app.core.config import settings
+from app.crud.crud_daily_rollup import utc_bounds_for
+from app.db.session import AsyncSessionLocal, SessionLocal
+from app.models.health_entry import ENTRY_TYPES
+from app.services import entry_export
+from app.services import health_import
 from app.services import image_storage # Import image storage service
+from app.services import image_preprocessing
+from app.services import parse_queue
+from app.services.resilience import Deadline
+from app.utils.disconnect import cancel_on_disconnect
+from app.utils.pagination import encode_cursor, decode_cursor
 
 logger = logging.getLogger(__name__) # Get logger
 
 router = APIRouter()
 
+# Fields `GET /entries/?fields=` can select; the summary view is all of these except owner_id and parsed_data
+ENTRY_FIELDS = tuple(field for field in schemas.HealthEntry.model_fields if field != "target_date_str")
 
-@router.post("/", response_model=schemas.HealthEntry, status_code=201)
+
+def _format_sse(event: str, data: Any) -> str:
+    """Formats one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+async def _read_and_store_image(
+    image: Optional[UploadFile], user_id: int
+) -> Tuple[Optional[bytes], Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Validates an upload by its header, preprocesses it (downscale, re-encode, strip EXIF)
+    in the worker process pool and saves the result. Returns (bytes for the LLM, url, stats).
+    """
+    if not image:
+        return None, None, None
+    if image.size is not None and image.size > settings.IMAGE_MAX_UPLOAD_MB * 1024 * 1024:
+        raise HTTPException(status_code=413, detail=f"Image exceeds the {settings.IMAGE_MAX_UPLOAD_MB} MB upload limit.")
+    # Sniff the header before pulling the whole file into memory
+    mime_type = image_preprocessing.sniff_image_type(await image.read(image_preprocessing.IMAGE_HEADER_BYTES))
+    if not mime_type:
+        logger.warning(f"Rejected upload with unrecognised image header from user {user_id} (filename: {image.filename})")
+        raise HTTPException(status_code=415, detail="Unsupported image type. Use JPEG, PNG, WEBP, GIF or HEIC.")
+    await image.seek(0)
+    try:
+        image_stats = await image_preprocessing.preprocess_image(await image.read(), mime_type)
+    except image_preprocessing.ImagePreprocessingUnavailable:
+        raise HTTPException(status_code=503, detail="Could not process the image right now. Please try again.")
+    except image_preprocessing.ImagePreprocessingError:
+        raise HTTPException(status_code=415, detail="Could not read the image. Use JPEG, PNG, WEBP or GIF.")
+    image_data = image_stats.pop("data")
+    # Only the re-encoded copy is stored and sent, so no EXIF (e.g. GPS location) is kept
+    image_url = await run_in_threadpool(image_storage.save_image_bytes, image_data, image_stats["mime_type"])
+    if not image_url:
+         logger.warning(f"Could not save uploaded image for user {user_id}")
+         # Decide if this is a hard failure or just proceed without saved image URL
+         # raise HTTPException(status_code=500, detail="Failed to store uploaded image.")
+    return image_data, image_url, image_stats
+
+
+def _entry_filters(
+    start_date_str: Optional[str], end_date_str: Optional[str], tz_offset_minutes: int, entry_type: Optional[str]
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Validates the entry_type and local date filters; returns the UTC [start, end) they cover."""
+    if entry_type is not None and entry_type not in ENTRY_TYPES:
+        raise HTTPException(status_code=400, detail=f"Invalid entry_type. Use one of: {', '.join(ENTRY_TYPES)}.")
+    try:
+        start_date = date.fromisoformat(start_date_str) if start_date_str else None
+        end_date = date.fromisoformat(end_date_str) if end_date_str else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.")
+    return (
+        utc_bounds_for(start_date, tz_offset_minutes)[0] if start_date else None,
+        utc_bounds_for(end_date, tz_offset_minutes)[1] if end_date else None,
+    )
+
+
+def _set_timing_headers(response: Response, image_stats: Optional[Dict[str, Any]], start: float) -> float:
+    """Reports image payload sizes and preprocessing/end-to-end timings as response headers."""
+    total_ms = (time.perf_counter() - start) * 1000
+    timings = [f"total;dur={total_ms:.1f}"]
+    if image_stats:
+        timings.insert(0, f"image-preprocess;dur={image_stats['preprocess_ms']}")
+        response.headers["X-Image-Original-Bytes"] = str(image_stats["original_bytes"])
+        response.headers["X-Image-Processed-Bytes"] = str(image_stats["processed_bytes"])
+    response.headers["Server-Timing"] = ", ".join(timings)
+    return total_ms
+
+
+@router.post(
+    "/", response_model=schemas.HealthEntry, status_code=201,
+    responses={202: {"model": schemas.ParseJobAccepted, "description": "Saved as pending; parsed in the background"}}
+)
 async def create_entry(
     *, # Enforce keyword arguments
-    db: Session = Depends(deps.get_db),
+    request: Request,
+    db: AsyncSession = Depends(deps.get_async_db),
     # Use Form for text fields when accepting files
     entry_text: Optional[str] = Form(None),
     target_date_str: Optional[str] = Form(None),
     image: Optional[UploadFile] = File(None), # Accept optional image upload
-    current_user: models.User = Depends(deps.get_current_active_user)
+    async_parse: bool = False,
+    response: Response,
+    current_user: models.User = Depends(deps.get_current_active_user_async)
 ) -> Any:
     """
     Create new health entry for the current user, potentially with an image.
     Handles text/image parsing and optional image storage.
+    The LLM call is awaited without blocking the worker and is cancelled if the client disconnects.
+    All stages share a REQUEST_DEADLINE_SECONDS budget.
+    With `async_parse=true` the entry is saved as 'pending' and 202 is returned with a job ID;
+    poll `GET /entries/jobs/{job_id}` for the result.
     """
+    start = time.perf_counter()
+    deadline = Deadline(settings.REQUEST_DEADLINE_SECONDS)
     logger.info(f"API: User {current_user.id} creating entry. Text provided: {bool(entry_text)}, Image provided: {bool(image)}, Date: {target_date_str}")
     
     if not entry_text and not image:
         raise HTTPException(status_code=400, detail="Either entry text or an image must be provided.")
 
-    # 1. Handle Image Upload (if provided)
-    image_url: Optional[str] = None
-    image_data: Optional[bytes] = None
-    if image:
-        image_data = await image.read() # Read image bytes for LLM
-        # Attempt to save the image (after reading bytes)
-        # Important: Re-seek if reading again image.file.seek(0) 
-        image_url = image_storage.save_upload_file(image)
-        if not image_url:
-             logger.warning(f"Could not save uploaded image for user {current_user.id}")
-             # Decide if this is a hard failure or just proceed without saved image URL
-             # raise HTTPException(status_code=500, detail="Failed to store uploaded image.")
+    # 1. Handle Image Upload (if provided): validate, preprocess, store
+    image_data, image_url, image_stats = await _read_and_store_image(image, current_user.id)
 
     # 2. Create entry object for CRUD (even if image failed to save, we might have URL)
     # Note: We pass text/date direct to CRUD now, it handles parsing
     entry_create_schema = schemas.HealthEntryCreate(
         entry_text=entry_text,
         target_date_str=target_date_str
-        # image_url is handled separately below if needed, not part of create schema
     )
 
-    # 3. Call CRUD function (which calls LLM with text and/or image_data)
-    entry = crud.health_entry.create_with_owner(
-        db=db, 
-        obj_in=entry_create_schema, 
-        owner_id=current_user.id,
-        image_data=image_data # Pass image bytes to CRUD
+    if async_parse:
+        entry, job = await db.run_sync(
+            crud.health_entry.create_pending_with_owner,
+            obj_in=entry_create_schema, owner_id=current_user.id, image_url=image_url
+        )
+        parse_queue.notify_new_job()
+        status_url = f"{settings.API_V1_STR}/entries/jobs/{job.id}"
+        accepted = schemas.ParseJobAccepted(job_id=job.id, entry_id=entry.id, status=job.status, status_url=status_url)
+        accepted_response = JSONResponse(status_code=202, content=jsonable_encoder(accepted), headers={"Location": status_url})
+        _set_timing_headers(accepted_response, image_stats, start)
+        logger.info(f"Entry {entry.id} queued for background parsing as job {job.id}")
+        return accepted_response
+
+    # 3. Call CRUD function (which calls LLM with text and/or image_data); image_url is saved in the same commit
+    entry = await cancel_on_disconnect(
+        request,
+        crud.health_entry.create_with_owner_async(
+            db=db, 
+            obj_in=entry_create_schema, 
+            owner_id=current_user.id,
+            image_data=image_data, # Pass image bytes to CRUD
+            image_url=image_url,
+            deadline=deadline
+        )
     )
+    if image_url:
+        logger.info(f"Created entry {entry.id} with image_url: {image_url}")
+    total_ms = _set_timing_headers(response, image_stats, start)
+    logger.info(f"Entry {entry.id} created in {total_ms:.0f} ms (image: {image_stats})")
+
+    return entry
+
+
+@router.post("/bulk", response_model=List[schemas.HealthEntry], status_code=201)
+async def create_entries_bulk(
+    *, # Enforce keyword arguments
+    request: Request,
+    db: AsyncSession = Depends(deps.get_async_db),
+    entries_in: schemas.HealthEntryBulkCreate,
+    current_user: models.User = Depends(deps.get_current_active_user_async)
+) -> Any:
+    """
+    Create many text entries at once (e.g. a whole day pasted in, or imported notes).
+    Entries are parsed with batched LLM calls and saved in a single transaction.
+    """
+    deadline = Deadline(settings.BULK_REQUEST_DEADLINE_SECONDS)
+    logger.info(f"API: User {current_user.id} bulk creating {len(entries_in.entries)} entries")
+    if not entries_in.entries:
+        raise HTTPException(status_code=400, detail="At least one entry must be provided.")
+    if len(entries_in.entries) > settings.BULK_ENTRIES_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BULK_ENTRIES_MAX} entries can be created at once.")
+    if any(not (entry.entry_text or "").strip() for entry in entries_in.entries):
+        raise HTTPException(status_code=400, detail="Every entry must have entry text.")
 
-    # 4. Update entry with image URL if saved successfully
-    if entry and image_url:
+    entries = await cancel_on_disconnect(
+        request,
+        crud.health_entry.create_many_with_owner_async(
+            db=db, objs_in=entries_in.entries, owner_id=current_user.id, deadline=deadline
+        )
+    )
+    logger.info(f"Bulk created {len(entries)} entries for user {current_user.id}")
+    return entries
+
+
+@router.post("/stream", status_code=200)
+async def create_entry_stream(
+    *, # Enforce keyword arguments
+    entry_text: Optional[str] = Form(None),
+    target_date_str: Optional[str] = Form(None),
+    image: Optional[UploadFile] = File(None),
+    current_user: models.User = Depends(deps.get_current_active_user_async)
+) -> StreamingResponse:
+    """
+    Create a health entry, streaming progress as Server-Sent Events:
+    `image` (preprocessing stats, when an image was uploaded), `stage`, `llm_chunk` (partial LLM output),
+    `parsed`, `item` (each enriched food item), `totals`, then `entry` (the saved entry) or `error`.
+    Disconnecting cancels the in-flight LLM call.
+    """
+    logger.info(f"API: User {current_user.id} creating entry (streaming). Text provided: {bool(entry_text)}, Image provided: {bool(image)}, Date: {target_date_str}")
+
+    if not entry_text and not image:
+        raise HTTPException(status_code=400, detail="Either entry text or an image must be provided.")
+
+    start = time.perf_counter()
+    deadline = Deadline(settings.REQUEST_DEADLINE_SECONDS)
+    image_data, image_url, image_stats = await _read_and_store_image(image, current_user.id)
+    entry_create_schema = schemas.HealthEntryCreate(entry_text=entry_text, target_date_str=target_date_str)
+    owner_id = current_user.id
+
+    async def event_stream() -> AsyncIterator[str]:
+        # The request-scoped session is closed before the body streams, so use our own
+        db = AsyncSessionLocal()
         try:
-            entry.image_url = image_url # Update the model instance
-            db.add(entry) # Stage the change
-            db.commit() # Commit the change
-            db.refresh(entry) # Refresh to get updated state
-            logger.info(f"Updated entry {entry.id} with image_url: {image_url}")
+            if image_stats:
+                yield _format_sse("image", image_stats)
+            async for event, data in crud.health_entry.create_with_owner_stream(
+                db=db, obj_in=entry_create_schema, owner_id=owner_id,
+                image_data=image_data, image_url=image_url, deadline=deadline
+            ):
+                if event == "entry":
+                    data = schemas.HealthEntry.model_validate(data, from_attributes=True)
+                    logger.info(f"Entry {data.id} streamed in {(time.perf_counter() - start) * 1000:.0f} ms (image: {image_stats})")
+                yield _format_sse(event, data)
         except Exception as e:
-             logger.error(f"Failed to update entry {entry.id} with image URL {image_url}: {e}", exc_info=True)
-             # Handle failure - maybe log, but entry is already created
+            logger.error(f"Streaming entry creation failed for user {owner_id}: {e}", exc_info=True)
+            yield _format_sse("error", {"detail": "Failed to create health entry."})
+        finally:
+            await db.close()
 
-    return entry
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/import", status_code=200)
+async def import_health_export(
+    *, # Enforce keyword arguments
+    file: UploadFile = File(...),
+    source: Optional[str] = Form(None, description="apple_health or google_fit; guessed from the file name if omitted"),
+    current_user: models.User = Depends(deps.get_current_active_user_async)
+) -> StreamingResponse:
+    """
+    Import steps and weight from an Apple Health export (export.zip or export.xml) or a Google Fit
+    daily activity metrics CSV, without the LLM. The file is parsed as a stream and written in
+    batches; records imported before (e.g. by an earlier, interrupted run) are skipped.
+    Steps are imported as one entry per day. For Apple Health, whose iPhone and Watch samples
+    overlap, a day's count comes from the one device or app that recorded the most steps.
+    A daily total that differs from the one imported before (a newer export) is updated.
+    Progress streams as Server-Sent Events: `progress` after each batch, then `done` or `error`,
+    each with counts of records read, imported, updated, duplicates and invalid.
+    """
+    if file.size is not None and file.size > settings.IMPORT_MAX_UPLOAD_MB * 1024 * 1024:
+        raise HTTPException(status_code=413, detail=f"File exceeds the {settings.IMPORT_MAX_UPLOAD_MB} MB upload limit.")
+    try:
+        source = source or health_import.detect_source(file.filename or "")
+    except health_import.ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if source not in health_import.IMPORT_SOURCES:
+        raise HTTPException(status_code=400, detail=f"Invalid source. Use one of: {', '.join(health_import.IMPORT_SOURCES)}.")
+    logger.info(f"API: User {current_user.id} importing {source} export {file.filename} ({file.size} bytes)")
+
+    # The upload is closed before the body streams, so parse our own copy of it. The copy
+    # has no name on disk: its space is freed when it is closed or garbage collected,
+    # even if the client disconnects before the stream starts.
+    spooled = tempfile.TemporaryFile()
+    try:
+        await run_in_threadpool(shutil.copyfileobj, file.file, spooled, 1024 * 1024)
+    except BaseException:
+        spooled.close()
+        raise
+    owner_id = current_user.id
+
+    def event_stream() -> Iterator[str]:
+        # Runs in the threadpool: parsing and the batch inserts are blocking
+        db = SessionLocal()
+        progress: Dict[str, int] = {}
+        try:
+            for progress in health_import.import_export_file(db, owner_id=owner_id, export=spooled, source=source):
+                yield _format_sse("progress", progress)
+            yield _format_sse("done", progress)
+        except health_import.ImportFormatError as e:
+            yield _format_sse("error", {"detail": str(e), **progress})
+        except Exception as e:
+            logger.error(f"Import failed for user {owner_id}: {e}", exc_info=True)
+            db.rollback()
+            yield _format_sse("error", {"detail": "Import failed; entries from completed batches were kept.", **progress})
+        finally:
+            db.close()
+            spooled.close()
 
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(spooled.close), # Also when a client disconnect cancels the stream
+    )
 
-@router.get("/", response_model=List[schemas.HealthEntry])
+
+@router.get("/jobs/{job_id}", response_model=schemas.ParseJobStatus)
+def read_parse_job(
+    *,
+    db: Session = Depends(deps.get_db),
+    job_id: int,
+    current_user: models.User = Depends(deps.get_current_active_user)
+):
+    """
+    Status of a background parse job started with `POST /entries/?async_parse=true`.
+    Includes the parsed entry once the job has finished.
+    """
+    job = crud.parse_job.get_for_owner(db, id=job_id, owner_id=current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Parse job not found")
+    finished = job.status in (crud.crud_parse_job.JOB_SUCCEEDED, crud.crud_parse_job.JOB_FAILED)
+    entry = crud.health_entry.get(db=db, id=job.entry_id) if finished else None
+    return schemas.ParseJobStatus(
+        job_id=job.id,
+        entry_id=job.entry_id,
+        status=job.status,
+        stage=job.stage,
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        last_error=job.last_error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        next_attempt_at=job.run_after if job.status == crud.crud_parse_job.JOB_QUEUED else None,
+        entry=schemas.HealthEntry.model_validate(entry, from_attributes=True) if entry else None,
+    )
+
+
+@router.get(
+    "/", response_model=None,
+    responses={200: {"model": List[schemas.HealthEntry], "description": "Entries, or the selected view/fields of them"}}
+)
 def read_health_entries(
+    response: Response,
     db: Session = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0, description="Deprecated: use cursor. Rows to skip (after the cursor, if any)."),
+    limit: int = Query(100, ge=1),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    start_date_str: Optional[str] = Query(None, description="Only entries on or after this local date (YYYY-MM-DD)"),
+    end_date_str: Optional[str] = Query(None, description="Only entries on or before this local date (YYYY-MM-DD)"),
+    tz_offset_minutes: int = Query(0, description="Client timezone offset from UTC in minutes (e.g., SGT is -480)"),
+    entry_type: Optional[str] = Query(None, description="Only entries of this type (food, weight, steps, ...)"),
+    view: str = Query("full", pattern="^(full|summary)$", description="'summary' leaves out parsed_data and owner_id"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return instead of a view, e.g. timestamp,entry_type,total_calories"),
     current_user: models.User = Depends(deps.get_current_active_user)
 ):
     """
-    Retrieve health entries for the current user.
+    Retrieve health entries for the current user, newest first.
+    When there are more, the X-Next-Cursor response header holds the cursor for the next page.
+    `view=summary` or `fields=` return lean rows without loading parsed_data (id is always included);
+    fetch `GET /entries/{entry_id}` for an entry's details.
     """
-    logger.info(f"User {current_user.id} reading entries, skip: {skip}, limit: {limit}")
+    logger.info(f"User {current_user.id} reading entries, skip: {skip}, limit: {limit}, cursor: {cursor}, dates: {start_date_str} - {end_date_str}, type: {entry_type}")
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    start, end = _entry_filters(start_date_str, end_date_str, tz_offset_minutes, entry_type)
+    if fields is not None:
+        selected = [field.strip() for field in fields.split(",") if field.strip()]
+        if not selected or any(field not in ENTRY_FIELDS for field in selected):
+            raise HTTPException(status_code=400, detail=f"Invalid fields. Use any of: {', '.join(ENTRY_FIELDS)}.")
+        selected = list(dict.fromkeys(["id", *selected]))
+    elif view == "summary":
+        selected = list(schemas.HealthEntrySummary.model_fields)
+    else:
+        selected = None
+
     entries = crud.health_entry.get_multi_by_owner(
-        db=db, owner_id=current_user.id, skip=skip, limit=limit
+        db=db, owner_id=current_user.id, skip=skip, limit=limit + 1, after=after, # One extra row tells if there is a next page
+        start=start, end=end, entry_type=entry_type,
+        columns=list(dict.fromkeys([*selected, "timestamp"])) if selected else None, # timestamp for the cursor
     )
+    if len(entries) > limit:
+        entries = entries[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(entries[-1].timestamp, entries[-1].id)
     logger.info(f"Returning {len(entries)} entries for user {current_user.id}")
-    return entries
+    if fields is not None:
+        return [{field: getattr(entry, field) for field in selected} for entry in entries]
+    schema = schemas.HealthEntrySummary if view == "summary" else schemas.HealthEntry
+    return [schema.model_validate(entry, from_attributes=True) for entry in entries]
+
+
+@router.get("/export", response_class=StreamingResponse)
+def export_entries(
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson|parquet)$"),
+    include: Optional[str] = Query(None, description="Comma-separated optional columns: totals, items"),
+    start_date_str: Optional[str] = Query(None, description="Only entries on or after this local date (YYYY-MM-DD)"),
+    end_date_str: Optional[str] = Query(None, description="Only entries on or before this local date (YYYY-MM-DD)"),
+    tz_offset_minutes: int = Query(0, description="Client timezone offset from UTC in minutes (e.g., SGT is -480)"),
+    entry_type: Optional[str] = Query(None, description="Only entries of this type (food, weight, steps, ...)"),
+    current_user: models.User = Depends(deps.get_current_active_user)
+) -> StreamingResponse:
+    """
+    Download all of the current user's entries (or those matching the filters), oldest first,
+    as CSV, NDJSON or Parquet. Rows are streamed from a server-side cursor, so exports of any
+    size use constant memory. `include=totals` adds the food total columns and `include=items`
+    the parsed food items (JSON text in CSV and Parquet).
+    """
+    start, end = _entry_filters(start_date_str, end_date_str, tz_offset_minutes, entry_type)
+    groups = [group.strip() for group in (include or "").split(",") if group.strip()]
+    if any(group not in entry_export.OPTIONAL_COLUMNS for group in groups):
+        raise HTTPException(status_code=400, detail=f"Invalid include. Use any of: {', '.join(entry_export.OPTIONAL_COLUMNS)}.")
+    try:
+        entry_export.check_format_available(export_format)
+    except entry_export.ExportUnavailableError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    logger.info(f"User {current_user.id} exporting entries as {export_format}, include: {groups}, dates: {start_date_str} - {end_date_str}, type: {entry_type}")
+
+    filename = f"health-entries-{date.today().isoformat()}.{export_format}"
+    return StreamingResponse(
+        entry_export.stream_export(
+            SessionLocal, owner_id=current_user.id, export_format=export_format,
+            include=list(dict.fromkeys(groups)), start=start, end=end, entry_type=entry_type,
+        ),
+        media_type=entry_export.EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/{entry_id}", response_model=schemas.HealthEntry)
+def read_entry(
+    *,
+    db: Session = Depends(deps.get_db),
+    entry_id: int,
+    current_user: models.User = Depends(deps.get_current_active_user),
+):
+    """
+    Retrieve one health entry with its parsed details.
+    Only the owner can read their entry.
+    """
+    entry = crud.health_entry.get(db=db, id=entry_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Health entry not found")
+    if entry.owner_id != current_user.id:
+        logger.warning(f"Auth failure: User {current_user.id} cannot read entry {entry_id} owned by {entry.owner_id}")
+        raise HTTPException(status_code=403, detail="Not authorized to read this entry")
+    return entry
 
 @router.put("/{entry_id}", response_model=schemas.HealthEntry)
 def update_entry(
@@ -101,7 +476,8 @@ def update_entry(
     current_user: models.User = Depends(deps.get_current_active_user),
 ):
     """
-    Update a health entry. Requires new entry_text and re-parses with LLM.
+    Update a health entry from new entry_text, re-parsing it (an unchanged text is not
+    re-parsed). Food items that keep their name reuse their nutrition instead of new lookups.
     Only the owner can update their entry.
     """
     logger.info(f"User {current_user.id} attempting to update entry {entry_id}")
@@ -113,11 +489,40 @@ def update_entry(
         logger.warning(f"Auth failure: User {current_user.id} cannot update entry {entry_id} owned by {entry.owner_id}")
         raise HTTPException(status_code=403, detail="Not authorized to update this entry")
     
-    updated_entry = crud.health_entry.update(db=db, db_obj=entry, obj_in=entry_in)
+    deadline = Deadline(settings.REQUEST_DEADLINE_SECONDS)
+    updated_entry = crud.health_entry.update(db=db, db_obj=entry, obj_in=entry_in, deadline=deadline)
     logger.info(f"Entry {entry_id} updated successfully by user {current_user.id}")
     return updated_entry
 
 
+@router.patch("/{entry_id}/items", response_model=schemas.HealthEntry)
+def update_entry_items(
+    *, # Enforce keyword arguments
+    db: Session = Depends(deps.get_db),
+    entry_id: int,
+    items_in: schemas.HealthEntryItemsUpdate,
+    current_user: models.User = Depends(deps.get_current_active_user),
+):
+    """
+    Edit the quantity (or grams) of a food entry's items by index and recalculate its
+    totals, without re-parsing the text. Only the owner can update their entry.
+    """
+    if not items_in.items:
+        raise HTTPException(status_code=400, detail="At least one item edit must be provided.")
+    entry = crud.health_entry.get(db=db, id=entry_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Health entry not found")
+    if entry.owner_id != current_user.id:
+        logger.warning(f"Auth failure: User {current_user.id} cannot update entry {entry_id} owned by {entry.owner_id}")
+        raise HTTPException(status_code=403, detail="Not authorized to update this entry")
+    try:
+        updated_entry = crud.health_entry.update_items(db=db, db_obj=entry, edits=items_in.items)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.info(f"Items of entry {entry_id} updated by user {current_user.id}")
+    return updated_entry
+
+
 @router.delete("/{entry_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_entry(
     *, # Enforce keyword arguments
@@ -137,6 +542,4 @@ def delete_entry(
         raise HTTPException(status_code=404, detail="Health entry not found")
     
     logger.info(f"Entry {entry_id} deleted successfully by user {current_user.id}")
-    return 
-
-# Add endpoints for getting specific entry, updating, deleting later if needed 
\ No newline at end of file
+    return 
\ No newline at end of file
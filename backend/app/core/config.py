@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List, Union, Optional
+from typing import Dict, List, Optional, Tuple, Union
 from pydantic import AnyHttpUrl, field_validator, PostgresDsn
 from pydantic_core.core_schema import ValidationInfo
 from pydantic import computed_field
@@ -52,9 +52,137 @@ class Settings(BaseSettings):
         """
         return f"postgresql+psycopg2://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    @computed_field
+    @property
+    def ASYNC_SQLALCHEMY_DATABASE_URI(self) -> str:
+        """Same database through asyncpg, for the async engine."""
+        return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+
+    # --- Database Pool ---
+    # Applied to both the sync (psycopg2) and async (asyncpg) engines, each with its own pool,
+    # so size them together against Postgres max_connections (x uvicorn workers)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_PRE_PING: bool = True # Test connections on checkout; drops ones closed by the server or a restart
+    DB_POOL_RECYCLE_SECONDS: int = 1800 # Replace connections older than this (-1 = never)
+    # asyncpg prepared statements cached per connection; set 0 behind PgBouncer in transaction mode
+    DB_STATEMENT_CACHE_SIZE: int = 100
+
     # --- Google API Key --- 
     GOOGLE_API_KEY: str = "YOUR_GOOGLE_API_KEY"
 
+    # --- LLM Parsing ---
+    # Max concurrent Gemini calls per worker on the async parse path
+    LLM_MAX_CONCURRENT_CALLS: int = 64
+    # TTL of the server-side cached prompt prefix; 0 disables cached content (system instruction only)
+    LLM_PROMPT_CACHE_TTL_MINUTES: int = 60
+    # Build model clients and open the API channel at startup
+    LLM_WARMUP_ON_STARTUP: bool = True
+    # Batched parsing: max entries per LLM call, and the fraction of max_output_tokens a batch may fill
+    LLM_BATCH_MAX_ENTRIES: int = 25
+    LLM_BATCH_OUTPUT_HEADROOM: float = 0.8
+    # Max entries accepted by POST /entries/bulk
+    BULK_ENTRIES_MAX: int = 500
+
+    # --- Model Cascade ---
+    # Models tried in order, cheapest/fastest first. A tier's result is escalated to the next tier
+    # when it fails _validate_parsed_data, is an error, has a type in LLM_ESCALATE_ON_TYPES,
+    # or reports a confidence below LLM_ESCALATION_MIN_CONFIDENCE.
+    LLM_MODEL_TIERS: List[str] = ["gemini-2.0-flash-lite", "gemini-2.0-flash-exp"]
+    LLM_ESCALATION_MIN_CONFIDENCE: float = 0.6
+    LLM_ESCALATE_ON_TYPES: List[str] = ["unknown"]
+    LLM_ESCALATE_ON_API_ERROR: bool = True # Try the next tier when a tier's call fails
+    # USD per million (input, output) tokens, for the per-tier cost counters
+    LLM_TIER_COSTS_PER_MTOK: Dict[str, Tuple[float, float]] = {
+        "gemini-2.0-flash-lite": (0.075, 0.30),
+        "gemini-2.0-flash-exp": (0.10, 0.40),
+    }
+
+    # --- Parse Result Cache ---
+    PARSE_CACHE_ENABLED: bool = True
+    PARSE_CACHE_MAX_ENTRIES: int = 10000 # In-process LRU tier size
+    PARSE_CACHE_TTL_SECONDS: int = 60 * 60 # In-process LRU tier TTL
+    PARSE_CACHE_DB_TTL_DAYS: int = 30 # Postgres tier TTL
+
+    # --- Image Preprocessing ---
+    # Uploads are downscaled to fit IMAGE_MAX_EDGE_PX and re-encoded as JPEG before the LLM call
+    IMAGE_MAX_EDGE_PX: int = 1536
+    IMAGE_JPEG_QUALITY: int = 85
+    IMAGE_PREPROCESS_WORKERS: int = 2 # Worker processes for the Pillow work
+    IMAGE_MAX_UPLOAD_MB: int = 25
+
+    # --- Timeouts and Circuit Breakers ---
+    # End-to-end budget of one create/update request; each stage's timeout is capped by what is left
+    REQUEST_DEADLINE_SECONDS: float = 30.0
+    BULK_REQUEST_DEADLINE_SECONDS: float = 120.0
+    LLM_CALL_TIMEOUT_SECONDS: float = 20.0
+    OFF_CALL_TIMEOUT_SECONDS: float = 4.0
+    OFF_MIN_BUDGET_SECONDS: float = 0.5 # Skip OFF lookups when less than this is left
+    # A breaker opens when BREAKER_FAILURE_RATE of the calls in the window fail (min BREAKER_MIN_CALLS calls)
+    BREAKER_FAILURE_RATE: float = 0.5
+    BREAKER_MIN_CALLS: int = 10
+    BREAKER_WINDOW_SECONDS: float = 60.0
+    BREAKER_OPEN_SECONDS: float = 30.0 # Time before half-open probing
+    BREAKER_HALF_OPEN_PROBES: int = 2
+
+    # --- Nutrition Enrichment ---
+    ENRICHMENT_MAX_WORKERS: int = 32 # Global cap on concurrent OFF lookups per process
+    ENRICHMENT_MAX_PER_REQUEST: int = 8 # Concurrent OFF lookups for one entry
+
+    # --- Open Food Facts HTTP Client ---
+    OFF_HTTP_POOL_MAXSIZE: int = 32 # Kept-alive connections to OFF (matches ENRICHMENT_MAX_WORKERS)
+    OFF_HTTP_MAX_RETRIES: int = 2 # On 429/5xx and connection errors, within the request deadline
+    OFF_HTTP_BACKOFF_BASE_SECONDS: float = 0.25
+    OFF_HTTP_BACKOFF_MAX_SECONDS: float = 2.0
+
+    # --- Local Nutrition Database ---
+    # nutrition_products is filled by scripts/import_nutrition_dump.py and consulted before the OFF API
+    NUTRITION_LOCAL_DB_ENABLED: bool = True
+    NUTRITION_REMOTE_FALLBACK: bool = True # Query the public OFF API when the local table has no match
+    NUTRITION_LOCAL_MAX_CANDIDATES: int = 200 # Full-text matches ranked per lookup
+
+    # --- Product Name Matching ---
+    NAME_MATCH_THRESHOLD: float = 0.6 # Min similarity (0..1) between an item and a product name
+    NAME_MATCH_CANDIDATES: int = 10 # Products fetched and scored per lookup (local table and OFF)
+    NAME_INDEX_MAX_PRODUCTS: int = 50000 # Products from earlier OFF searches kept for matching
+    NAME_INDEX_MIN_SCORE: float = 0.85 # Use a remembered product without querying OFF at this score
+
+    # --- Nutrition Lookup Cache ---
+    # Open Food Facts results keyed on normalized item name; misses are cached too, for less time
+    NUTRITION_CACHE_ENABLED: bool = True
+    NUTRITION_CACHE_MAX_ENTRIES: int = 20000 # In-process TLRU tier size
+    NUTRITION_CACHE_MEMORY_TTL_SECONDS: int = 60 * 60 # Max in-process lifetime (picks up purges on other nodes)
+    NUTRITION_CACHE_POSITIVE_TTL_SECONDS: int = 30 * 24 * 60 * 60
+    NUTRITION_CACHE_NEGATIVE_TTL_SECONDS: int = 6 * 60 * 60
+    NUTRITION_CACHE_STALE_SECONDS: int = 7 * 24 * 60 * 60 # Expired entries still served while refreshed in the background
+    NUTRITION_CACHE_REFRESH_WORKERS: int = 2
+
+    # --- Parse Job Queue ---
+    # Worker threads per API process draining parse_jobs (0 = this node only enqueues)
+    PARSE_QUEUE_WORKERS: int = 2
+    PARSE_QUEUE_POLL_SECONDS: float = 1.0
+    PARSE_JOB_MAX_ATTEMPTS: int = 5
+    PARSE_JOB_BACKOFF_BASE_SECONDS: float = 5.0
+    PARSE_JOB_BACKOFF_MAX_SECONDS: float = 300.0
+    PARSE_JOB_LEASE_SECONDS: float = 300.0 # A running job not finished within this is reclaimed
+
+    # --- Daily Rollups ---
+    # UTC offsets kept rolled up per user; building another evicts the least recently read
+    DAILY_ROLLUP_MAX_ZONES_PER_USER: int = 4
+
+    # --- Entry Export ---
+    EXPORT_BATCH_ROWS: int = 2000 # Rows fetched per server-side cursor round trip and per streamed chunk
+    PARQUET_ROW_GROUP_ROWS: int = 100000 # Rows buffered per Parquet row group
+
+    # --- Health Data Import ---
+    IMPORT_BATCH_ROWS: int = 5000 # Records inserted (and committed) per batch
+    IMPORT_MAX_UPLOAD_MB: int = 2048 # Apple Health export.zip files reach hundreds of MB
+
+    # --- Admin ---
+    # Emails of users allowed to call /admin endpoints
+    ADMIN_EMAILS: List[str] = []
+
     # --- CORS --- 
     BACKEND_CORS_ORIGINS: List[str] = ["http://localhost:5173", "http://127.0.0.1:5173"]
 
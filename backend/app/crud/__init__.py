@@ -1,2 +1,4 @@
 from .crud_user import user
 from .crud_health_entry import health_entry
+from .crud_parse_job import parse_job
+from .crud_daily_rollup import daily_rollup
@@ -0,0 +1,243 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text, select, func, cast, type_coerce, and_, literal, literal_column, Date, Float
+from sqlalchemy.dialects.postgresql import insert, aggregate_order_by, ARRAY
+from pydantic import BaseModel
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, List, Tuple
+import logging
+
+from app.crud.base import CRUDBase
+from app.models.daily_rollup import DailyRollup, DailyRollupZone
+from app.models.health_entry import HealthEntry
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# First key of the per-user pg_advisory_xact_lock taken by rollup builds and refreshes
+ROLLUP_LOCK_NAMESPACE = 7301
+# last_read_at is only rewritten when older than this, so reports stay read-only
+_LAST_READ_RESOLUTION = timedelta(hours=1)
+# Writes touching more local days than this (e.g. imports) recompute the whole span at once
+_SPAN_REFRESH_MIN_DAYS = 8
+
+_ROLLUP_COLUMNS = (
+    "owner_id", "tz_offset_minutes", "local_date", "entry_count",
+    "food_entry_count", "calories", "protein_g", "carbs_g", "fat_g",
+    "steps_entry_count", "total_steps",
+    "weight_entry_count", "weight_kg_sum", "last_weight_kg", "last_weight_at",
+    "updated_at",
+)
+
+
+def _utc_naive(ts: datetime) -> datetime:
+    """Entry timestamps are stored as naive UTC; freshly built (unrefreshed) ones may be aware."""
+    if ts.tzinfo is not None:
+        return ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def local_date_for(ts: datetime, tz_offset_minutes: int) -> date:
+    return (_utc_naive(ts) - timedelta(minutes=tz_offset_minutes)).date()
+
+
+def utc_bounds_for(local_date: date, tz_offset_minutes: int) -> Tuple[datetime, datetime]:
+    """UTC [start, end) of a local day."""
+    start = datetime.combine(local_date, time.min) + timedelta(minutes=tz_offset_minutes)
+    return start, start + timedelta(days=1)
+
+
+def _day_totals(owner_id: int, tz_offset_minutes: int, *criteria):
+    """
+    SELECT of one daily_rollups row per local day with entries, aggregated in SQL from
+    the typed columns (no parsed_data decoding), in _ROLLUP_COLUMNS order.
+    """
+    # A literal (not a bind parameter) so the SELECT and GROUP BY expressions are identical
+    local_date = cast(
+        HealthEntry.timestamp - literal_column(f"interval '{int(tz_offset_minutes)} minutes'"), Date
+    )
+    is_food = and_(HealthEntry.entry_type == "food", HealthEntry.total_calories.isnot(None))
+    is_steps = and_(HealthEntry.entry_type == "steps", HealthEntry.value.isnot(None))
+    is_weight = and_(HealthEntry.entry_type == "weight", HealthEntry.value.isnot(None), HealthEntry.unit.ilike("kg%"))
+    latest_weights = func.array_agg(
+        aggregate_order_by(HealthEntry.value, HealthEntry.timestamp.desc(), HealthEntry.id.desc()),
+        type_=ARRAY(Float),
+    ).filter(is_weight)
+    return (
+        select(
+            literal(owner_id), literal(tz_offset_minutes), local_date,
+            func.count(),
+            func.count().filter(is_food),
+            func.coalesce(func.sum(HealthEntry.total_calories).filter(is_food), 0),
+            func.coalesce(func.sum(HealthEntry.total_protein_g).filter(is_food), 0),
+            func.coalesce(func.sum(HealthEntry.total_carbs_g).filter(is_food), 0),
+            func.coalesce(func.sum(HealthEntry.total_fat_g).filter(is_food), 0),
+            func.count().filter(is_steps),
+            func.coalesce(func.sum(HealthEntry.value).filter(is_steps), 0),
+            func.count().filter(is_weight),
+            func.coalesce(func.sum(HealthEntry.value).filter(is_weight), 0),
+            type_coerce(latest_weights, ARRAY(Float)).self_group()[1], # (array_agg(...) FILTER (...))[1]
+            func.max(HealthEntry.timestamp).filter(is_weight),
+            literal(datetime.utcnow()),
+        )
+        .where(HealthEntry.owner_id == owner_id, *criteria)
+        .group_by(local_date)
+    )
+
+
+class CRUDDailyRollup(CRUDBase[DailyRollup, BaseModel, BaseModel]):
+    def _lock_owner(self, db: Session, owner_id: int) -> None:
+        """Serializes rollup builds and refreshes for one user until the transaction ends."""
+        db.execute(text("SELECT pg_advisory_xact_lock(:namespace, :owner_id)"),
+                   {"namespace": ROLLUP_LOCK_NAMESPACE, "owner_id": owner_id})
+
+    def _zone_join(self, *columns, owner_id: int, tz_offset_minutes: int, start_date: date, end_date: date):
+        """
+        SELECT from the user's zone row, outer-joined to its rollups for the date range.
+        No rows means the zone has not been built; otherwise at least one row comes back
+        (rollup columns NULL when the range has no entries), with zone_last_read_at.
+        """
+        return (
+            select(DailyRollupZone.last_read_at.label("zone_last_read_at"), *columns)
+            .select_from(DailyRollupZone)
+            .outerjoin(self.model, and_(
+                self.model.owner_id == DailyRollupZone.owner_id,
+                self.model.tz_offset_minutes == DailyRollupZone.tz_offset_minutes,
+                self.model.local_date >= start_date,
+                self.model.local_date <= end_date,
+            ))
+            .where(DailyRollupZone.owner_id == owner_id, DailyRollupZone.tz_offset_minutes == tz_offset_minutes)
+        )
+
+    def _read(self, db: Session, stmt, *, owner_id: int, tz_offset_minutes: int) -> list:
+        """Runs a _zone_join statement, building the zone first if it does not exist yet."""
+        rows = db.execute(stmt).all()
+        if not rows:
+            self._build_zone(db, owner_id, tz_offset_minutes)
+            rows = db.execute(stmt).all()
+        if datetime.utcnow() - rows[0].zone_last_read_at > _LAST_READ_RESOLUTION:
+            db.query(DailyRollupZone).filter(
+                DailyRollupZone.owner_id == owner_id, DailyRollupZone.tz_offset_minutes == tz_offset_minutes
+            ).update({"last_read_at": datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+        return rows
+
+    def get_range(
+        self, db: Session, *, owner_id: int, tz_offset_minutes: int, start_date: date, end_date: date
+    ) -> List[DailyRollup]:
+        """Rollups for the local days start_date..end_date (inclusive) that have entries, oldest first."""
+        stmt = self._zone_join(
+            self.model, owner_id=owner_id, tz_offset_minutes=tz_offset_minutes, start_date=start_date, end_date=end_date
+        ).order_by(self.model.local_date)
+        rows = self._read(db, stmt, owner_id=owner_id, tz_offset_minutes=tz_offset_minutes)
+        return [row.DailyRollup for row in rows if row.DailyRollup is not None]
+
+    def summarize(
+        self, db: Session, *, owner_id: int, tz_offset_minutes: int, start_date: date, end_date: date
+    ):
+        """
+        Totals over the local days start_date..end_date in one grouped statement: day counts
+        (days with food / steps logged), nutrient and step sums, kg weigh-in count and sum,
+        and the latest day's last weight. Sums are None when the range has no entries.
+        """
+        food_day = self.model.food_entry_count > 0
+        latest_weights = func.array_agg(
+            aggregate_order_by(self.model.last_weight_kg, self.model.local_date.desc()), type_=ARRAY(Float)
+        ).filter(self.model.last_weight_kg.isnot(None))
+        stmt = self._zone_join(
+            func.count(self.model.local_date).filter(food_day).label("food_days"),
+            func.sum(self.model.calories).label("calories"),
+            func.sum(self.model.protein_g).label("protein_g"),
+            func.sum(self.model.carbs_g).label("carbs_g"),
+            func.sum(self.model.fat_g).label("fat_g"),
+            func.count(self.model.local_date).filter(self.model.steps_entry_count > 0).label("steps_days"),
+            func.sum(self.model.total_steps).label("total_steps"),
+            func.sum(self.model.weight_entry_count).label("weight_entry_count"),
+            func.sum(self.model.weight_kg_sum).label("weight_kg_sum"),
+            type_coerce(latest_weights, ARRAY(Float)).self_group()[1].label("last_weight_kg"),
+            owner_id=owner_id, tz_offset_minutes=tz_offset_minutes, start_date=start_date, end_date=end_date,
+        ).group_by(DailyRollupZone.last_read_at)
+        return self._read(db, stmt, owner_id=owner_id, tz_offset_minutes=tz_offset_minutes)[0]
+
+    def _build_zone(self, db: Session, owner_id: int, tz_offset_minutes: int) -> None:
+        """Builds a user's rollups for this UTC offset (committing them), evicting the least recently read offsets."""
+        self._lock_owner(db, owner_id)
+        if db.get(DailyRollupZone, (owner_id, tz_offset_minutes), populate_existing=True) is not None:
+            db.commit() # Built by a concurrent request while we waited for the lock
+            return
+        zones = (
+            db.query(DailyRollupZone)
+            .filter(DailyRollupZone.owner_id == owner_id)
+            .order_by(DailyRollupZone.last_read_at.desc())
+            .all()
+        )
+        for stale in zones[max(0, settings.DAILY_ROLLUP_MAX_ZONES_PER_USER - 1):]:
+            logger.info(f"Dropping daily rollups for user {owner_id}, offset {stale.tz_offset_minutes} (least recently read)")
+            self._delete_zone_rows(db, owner_id, stale.tz_offset_minutes)
+            db.delete(stale)
+        now = datetime.utcnow()
+        db.add(DailyRollupZone(owner_id=owner_id, tz_offset_minutes=tz_offset_minutes, built_at=now, last_read_at=now))
+        day_count = self._backfill(db, owner_id, tz_offset_minutes)
+        db.commit()
+        logger.info(f"Built {day_count} daily rollups for user {owner_id}, offset {tz_offset_minutes}")
+
+    def rebuild(self, db: Session, *, owner_id: int, tz_offset_minutes: int) -> int:
+        """Recomputes every rollup of one user and offset from the entries. Does not commit."""
+        self._lock_owner(db, owner_id)
+        self._delete_zone_rows(db, owner_id, tz_offset_minutes)
+        zone = db.get(DailyRollupZone, (owner_id, tz_offset_minutes))
+        if zone is None:
+            db.add(DailyRollupZone(owner_id=owner_id, tz_offset_minutes=tz_offset_minutes))
+        else:
+            zone.built_at = datetime.utcnow()
+        return self._backfill(db, owner_id, tz_offset_minutes)
+
+    def refresh_for_timestamps(self, db: Session, *, owner_id: int, timestamps: Iterable[datetime]) -> None:
+        """
+        Recomputes the local days containing these entry timestamps in every offset built
+        for the user. Call with the pending entry changes added to the session; it flushes
+        them and leaves the commit to the caller, so rollups change with the entries.
+        """
+        timestamps = [ts for ts in timestamps if ts is not None]
+        if not timestamps:
+            return
+        db.flush()
+        self._lock_owner(db, owner_id)
+        offsets = [
+            offset for (offset,) in
+            db.query(DailyRollupZone.tz_offset_minutes).filter(DailyRollupZone.owner_id == owner_id).all()
+        ]
+        for tz_offset_minutes in offsets:
+            local_dates = {local_date_for(ts, tz_offset_minutes) for ts in timestamps}
+            if len(local_dates) >= _SPAN_REFRESH_MIN_DAYS:
+                self._refresh_days(db, owner_id, tz_offset_minutes, min(local_dates), max(local_dates))
+            else:
+                for local_date in local_dates:
+                    self._refresh_days(db, owner_id, tz_offset_minutes, local_date, local_date)
+
+    def _refresh_days(self, db: Session, owner_id: int, tz_offset_minutes: int, first_date: date, last_date: date) -> None:
+        """Recomputes the local days first_date..last_date (inclusive) with one DELETE and one INSERT ... SELECT."""
+        utc_start = utc_bounds_for(first_date, tz_offset_minutes)[0]
+        utc_end = utc_bounds_for(last_date, tz_offset_minutes)[1]
+        db.query(self.model).filter(
+            self.model.owner_id == owner_id,
+            self.model.tz_offset_minutes == tz_offset_minutes,
+            self.model.local_date >= first_date,
+            self.model.local_date <= last_date,
+        ).delete(synchronize_session=False)
+        db.execute(insert(self.model).from_select(_ROLLUP_COLUMNS, _day_totals(
+            owner_id, tz_offset_minutes, HealthEntry.timestamp >= utc_start, HealthEntry.timestamp < utc_end
+        )))
+
+    def _backfill(self, db: Session, owner_id: int, tz_offset_minutes: int) -> int:
+        return db.execute(
+            insert(self.model).from_select(_ROLLUP_COLUMNS, _day_totals(owner_id, tz_offset_minutes))
+        ).rowcount
+
+    def _delete_zone_rows(self, db: Session, owner_id: int, tz_offset_minutes: int) -> None:
+        db.query(self.model).filter(
+            self.model.owner_id == owner_id,
+            self.model.tz_offset_minutes == tz_offset_minutes,
+        ).delete(synchronize_session=False)
+
+
+daily_rollup = CRUDDailyRollup(DailyRollup)
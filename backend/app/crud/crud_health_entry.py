@@ -1,19 +1,34 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, desc
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
 from datetime import date, timedelta, datetime, time, timezone
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+import asyncio
+import copy
+import threading
 # Import Optional and List from typing for compatibility with Python < 3.10
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, List, Dict, Any, Union, Tuple, AsyncIterator, Sequence
 import json # Import json for parsing if needed
 import logging # Import logging
 from fastapi.encoders import jsonable_encoder
 
 from app.crud.base import CRUDBase
-from app.models.health_entry import HealthEntry
-from app.schemas.health_entry import HealthEntryCreate, HealthEntryUpdate
+from app.models.health_entry import HealthEntry, ENTRY_TYPES
+from app.models.parse_job import ParseJob
+from app.crud.crud_parse_job import parse_job
+from app.crud.crud_daily_rollup import daily_rollup
+from app.schemas.health_entry import HealthEntryCreate, HealthEntryUpdate, HealthEntryItemEdit
 from app.schemas.report import WeeklySummary, TrendDataPoint, TrendReport, DailySummary # Import new schemas
-from app.services.llm_parser import parse_health_entry_text # Import parser
-from app.services.food_data_service import get_nutrition_from_off # Import OFF service
+from app.services.llm_parser import parse_health_entry_text, parse_health_entry_text_async, parse_health_entry_texts_batch_async, stream_health_entry_text_async # Import parser
+from app.services.nutrition_cache import nutrition_cache # Cached OFF lookups
+from app.services import name_matching
+from app.services.parse_cache import parse_cache
+from app.services.fast_parser import parse_simple_entry
+from app.services.resilience import Deadline, DependencyUnavailableError, DeadlineExceededError
+from app.core.config import settings
 
 # Get a logger instance for this module
 logger = logging.getLogger(__name__)
@@ -60,13 +75,35 @@ def _recalculate_food_totals(parsed_data: Dict[str, Any]) -> Dict[str, Any]:
     logger.info(f"Recalculated food totals: Cals={parsed_data['total_calories']}, P={parsed_data['total_protein_g']}")
     return parsed_data
 
+FOOD_TOTAL_KEYS = ('total_calories', 'total_protein_g', 'total_carbs_g', 'total_fat_g')
+
+def _food_total_columns(entry_type: str, parsed_data: Any) -> Dict[str, Optional[float]]:
+    """Values for the typed total_* columns: a food entry's parsed totals, or all None."""
+    if entry_type == 'food' and isinstance(parsed_data, dict):
+        try:
+            return {key: float(parsed_data.get(key) or 0) for key in FOOD_TOTAL_KEYS}
+        except (ValueError, TypeError):
+            logger.warning(f"Non-numeric food totals, not stored as columns: {[parsed_data.get(key) for key in FOOD_TOTAL_KEYS]}")
+    return dict.fromkeys(FOOD_TOTAL_KEYS)
+
+def _known_entry_type(entry_type: Optional[str]) -> str:
+    """entry_type is a Postgres enum: anything outside ENTRY_TYPES is saved as 'unknown'."""
+    if entry_type in ENTRY_TYPES:
+        return entry_type
+    logger.warning(f"Saving unrecognized entry type '{entry_type}' as 'unknown'")
+    return 'unknown'
+
+def _has_food_items(entry_type: str, parsed_data: Any) -> bool:
+    return entry_type == 'food' and isinstance(parsed_data, dict) and 'items' in parsed_data
+
 # --- NEW Helper Function for Nutrition Enrichment ---
-def _enrich_item_nutrition(item: Dict[str, Any]) -> Dict[str, Any]:
+def _enrich_item_nutrition(item: Dict[str, Any], deadline: Optional[Deadline] = None) -> Dict[str, Any]:
     """
     Attempts to enrich a food item dict with nutritional data from OFF 
     if calories are missing (None). Adds a nutrition_source field.
     Applies scaling based on specified_amount in grams if possible.
     VALIDATES product name match before using OFF data.
+    Falls back to the LLM estimate when OFF is unavailable or the request deadline is nearly spent.
     """
     if not isinstance(item, dict):
         return item # Return unchanged if not a dict
@@ -80,20 +117,25 @@ def _enrich_item_nutrition(item: Dict[str, Any]) -> Dict[str, Any]:
     # Only attempt OFF lookup if item name exists AND calories are explicitly None
     if item_name and calories is None:
         logger.debug(f"Item '{item_name}' missing calories, attempting OFF lookup.")
-        off_data = get_nutrition_from_off(item_name)
+        try:
+            off_data = nutrition_cache.lookup(item_name, deadline=deadline)
+        except DeadlineExceededError:
+            logger.warning(f"Skipping OFF lookup for '{item_name}': request deadline nearly exhausted.")
+            item['nutrition_source'] = 'LLM Estimate (OFF Skipped: Deadline)'
+            return item
+        except DependencyUnavailableError as e:
+            logger.warning(f"OFF unavailable for '{item_name}', keeping LLM estimate: {e}")
+            item['nutrition_source'] = 'LLM Estimate (OFF Unavailable)'
+            return item
         
         if off_data:
             off_product_name = off_data.get('product_name', '')
             logger.debug(f"Found OFF data for '{item_name}'. Product: '{off_product_name}', Source: {off_data.get('source', 'OpenFoodFacts')}")
             
             # --- !! Stricter Validation !! ---
-            # Basic check: Ensure at least one significant word from LLM item_name is in OFF product_name (case-insensitive)
-            # This is a simple heuristic, could be improved with fuzzy matching libraries if needed.
-            llm_keywords = set(word.lower() for word in item_name.split() if len(word) > 2) # Get significant words from LLM name
-            off_name_lower = off_product_name.lower()
-            is_match = any(keyword in off_name_lower for keyword in llm_keywords)
-            
-            if not is_match:
+            # Lookups already return the best-scoring candidate; this re-checks results
+            # cached before scoring existed (and any other source) against the same threshold.
+            if not name_matching.is_match(item_name, off_product_name):
                  logger.warning(f"OFF product name '{off_product_name}' does not seem to match LLM item '{item_name}'. Skipping OFF enrichment.")
                  item['nutrition_source'] = 'LLM Estimate (OFF Mismatch)' # Indicate mismatch
                  # Exit the enrichment block for this item
@@ -105,7 +147,7 @@ def _enrich_item_nutrition(item: Dict[str, Any]) -> Dict[str, Any]:
                 scaling_factor = None
                 amount = item.get('specified_amount')
                 amount_unit = item.get('specified_unit')
-                if amount is not None and amount_unit and amount_unit.lower() == 'g':
+                if amount is not None and isinstance(amount_unit, str) and amount_unit.lower() == 'g':
                     try: 
                         scaling_factor = float(amount) / 100.0
                         logger.debug(f"Applying scaling factor {scaling_factor} based on {amount}g")
@@ -144,6 +186,236 @@ def _enrich_item_nutrition(item: Dict[str, Any]) -> Dict[str, Any]:
 
     return item
 
+# Entry type of rows saved before their (queued) parse has run
+ENTRY_TYPE_PENDING = "pending"
+
+# --- Concurrent Enrichment ---
+# OFF lookups are blocking HTTP calls, so items are enriched on a shared thread pool.
+# The pool size is the global cap; each request keeps at most ENRICHMENT_MAX_PER_REQUEST in flight.
+_enrichment_executor: Optional[ThreadPoolExecutor] = None
+_enrichment_executor_lock = threading.Lock()
+
+def _get_enrichment_executor() -> ThreadPoolExecutor:
+    global _enrichment_executor
+    with _enrichment_executor_lock:
+        if _enrichment_executor is None:
+            _enrichment_executor = ThreadPoolExecutor(
+                max_workers=settings.ENRICHMENT_MAX_WORKERS, thread_name_prefix="enrich"
+            )
+        return _enrichment_executor
+
+def _needs_lookup(item: Any) -> bool:
+    return isinstance(item, dict) and bool(item.get('item')) and item.get('calories') is None
+
+def _enrich_item_safely(item: Dict[str, Any], deadline: Optional[Deadline]) -> Dict[str, Any]:
+    try:
+        return _enrich_item_nutrition(item, deadline)
+    except Exception as e:
+        logger.error(f"Unexpected error enriching item '{item.get('item')}', keeping LLM estimate: {e}", exc_info=True)
+        item['nutrition_source'] = 'LLM Estimate'
+        return item
+
+def _enrich_food_items(items: List[Any], deadline: Optional[Deadline] = None) -> List[Any]:
+    """
+    Enriches all items of a food entry, running the OFF lookups concurrently.
+    Returns the items in their original order.
+    """
+    lookup_indices = [i for i, item in enumerate(items) if _needs_lookup(item)]
+    results = list(items)
+    for i, item in enumerate(items):
+        if not _needs_lookup(item):
+            results[i] = _enrich_item_nutrition(item, deadline) # No network call
+    if len(lookup_indices) <= 1:
+        for i in lookup_indices:
+            results[i] = _enrich_item_safely(items[i], deadline)
+        return results
+
+    executor = _get_enrichment_executor()
+    to_submit = iter(lookup_indices)
+    in_flight: Dict[Future, int] = {}
+    def submit_next() -> None:
+        i = next(to_submit, None)
+        if i is not None:
+            in_flight[executor.submit(_enrich_item_safely, items[i], deadline)] = i
+    for _ in range(settings.ENRICHMENT_MAX_PER_REQUEST):
+        submit_next()
+    while in_flight:
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            results[in_flight.pop(future)] = future.result()
+            submit_next()
+    return results
+
+async def _enrich_food_items_as_completed(
+    items: List[Any], deadline: Optional[Deadline] = None
+) -> AsyncIterator[Tuple[int, Any]]:
+    """Async variant of _enrich_food_items yielding (index, enriched_item) as each lookup finishes."""
+    loop = asyncio.get_running_loop()
+    executor = _get_enrichment_executor()
+    limit = asyncio.Semaphore(settings.ENRICHMENT_MAX_PER_REQUEST)
+
+    async def enrich(index: int, item: Any) -> Tuple[int, Any]:
+        if not _needs_lookup(item):
+            return index, _enrich_item_nutrition(item, deadline)
+        async with limit:
+            return index, await loop.run_in_executor(executor, _enrich_item_safely, item, deadline)
+
+    tasks = [asyncio.ensure_future(enrich(index, item)) for index, item in enumerate(items)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+# --- Item Edits and Enrichment Reuse ---
+_NUTRITION_FIELDS = ('calories', 'protein_g', 'carbs_g', 'fat_g')
+
+def _item_key(item: Any) -> Optional[str]:
+    """Case- and whitespace-insensitive item name, to pair an item with its previous version."""
+    name = item.get('item') if isinstance(item, dict) else None
+    if not isinstance(name, str) or not name.strip():
+        return None
+    return ' '.join(name.lower().split())
+
+def _item_grams(item: Dict[str, Any]) -> Optional[float]:
+    """The item's specified amount if it is a positive number of grams, else None."""
+    amount = item.get('specified_amount')
+    unit = item.get('specified_unit')
+    if amount is None or not isinstance(unit, str) or unit.lower() != 'g':
+        return None
+    try:
+        grams = float(amount)
+    except (ValueError, TypeError):
+        return None
+    return grams if grams > 0 else None
+
+def _scaled_nutrition(item: Dict[str, Any], scale: float) -> Dict[str, Any]:
+    """The item's numeric nutrition values multiplied by scale, rounded like the enrichment does."""
+    scaled = {}
+    for field in _NUTRITION_FIELDS:
+        value = item.get(field)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            scaled[field] = round(value * scale) if field == 'calories' else round(value * scale, 1)
+    return scaled
+
+def _enrich_changed_food_items(
+    items: List[Any], previous_items: Any, deadline: Optional[Deadline] = None
+) -> List[Any]:
+    """
+    Enriches the items of a re-parsed food entry, reusing the nutrition of items the
+    entry already had under the same name (rescaled when only the gram amount changed)
+    instead of looking them up again. Only new or renamed items go to _enrich_food_items.
+    """
+    previous: Dict[str, Dict[str, Any]] = {}
+    for old in previous_items if isinstance(previous_items, list) else []:
+        key = _item_key(old)
+        if key and key not in previous and old.get('calories') is not None and 'nutrition_source' in old:
+            previous[key] = old
+
+    results = list(items)
+    remaining = []
+    for i, item in enumerate(items):
+        old = previous.get(_item_key(item)) if _needs_lookup(item) else None
+        new_grams = _item_grams(item) if old is not None else None
+        old_grams = _item_grams(old) if old is not None else None
+        if old is None or (new_grams is None) != (old_grams is None): # Per-portion and per-amount values don't compare
+            remaining.append(i)
+            continue
+        scale = new_grams / old_grams if new_grams is not None else 1.0
+        for field, value in _scaled_nutrition(old, scale).items():
+            if item.get(field) is None:
+                item[field] = value
+        if item.get('unit') is None and old.get('unit') is not None:
+            item['unit'] = old['unit']
+        item['nutrition_source'] = old['nutrition_source']
+    if len(remaining) < len(items):
+        logger.info(f"Reusing nutrition of {len(items) - len(remaining)} unchanged item(s), enriching {len(remaining)}.")
+    for i, item in zip(remaining, _enrich_food_items([items[i] for i in remaining], deadline)):
+        results[i] = item
+    return results
+
+# Which stage produced a parse result; recorded as parsed_data['parse_path'] on the saved entry
+PARSE_PATH_FAST = "fast_path"
+PARSE_PATH_CACHE = "cache"
+PARSE_PATH_LLM = "llm"
+PARSE_PATH_IMPORT = "import" # Imported from another app's export, not parsed
+
+def _with_parse_path(parsed_result: Dict[str, Any], path: str) -> Dict[str, Any]:
+    parsed_result['parse_path'] = path
+    return parsed_result
+
+def _parse_entry(
+    text: Optional[str], image_data: Optional[bytes] = None, deadline: Optional[Deadline] = None
+) -> Dict[str, Any]:
+    """
+    Parses an entry via the cheapest confident path: the local fast-path grammar,
+    then the parse-result cache, then the LLM (text-only entries only use the first two).
+    """
+    if not image_data:
+        fast_result = parse_simple_entry(text)
+        if fast_result is not None:
+            logger.info(f"Fast-path parsed entry as '{fast_result['type']}', skipping LLM.")
+            return _with_parse_path(fast_result, PARSE_PATH_FAST)
+    if image_data or not text or not settings.PARSE_CACHE_ENABLED:
+        return _with_parse_path(parse_health_entry_text(text=text, image_data=image_data, deadline=deadline), PARSE_PATH_LLM)
+    cached = parse_cache.get(text)
+    if cached is not None:
+        logger.info("Using cached parse result.")
+        return _with_parse_path(cached, PARSE_PATH_CACHE)
+    parsed_result = parse_health_entry_text(text=text, deadline=deadline)
+    parse_cache.set(text, parsed_result)
+    return _with_parse_path(parsed_result, PARSE_PATH_LLM)
+
+async def _parse_entry_locally_async(text: Optional[str], image_data: Optional[bytes] = None) -> Optional[Dict[str, Any]]:
+    """Tries the fast-path grammar and the parse-result cache; None means the LLM is needed."""
+    if image_data or not text:
+        return None
+    fast_result = parse_simple_entry(text)
+    if fast_result is not None:
+        logger.info(f"Fast-path parsed entry as '{fast_result['type']}', skipping LLM.")
+        return _with_parse_path(fast_result, PARSE_PATH_FAST)
+    if settings.PARSE_CACHE_ENABLED:
+        cached = await run_in_threadpool(parse_cache.get, text)
+        if cached is not None:
+            logger.info("Using cached parse result.")
+            return _with_parse_path(cached, PARSE_PATH_CACHE)
+    return None
+
+async def _store_llm_result_async(text: Optional[str], image_data: Optional[bytes], parsed_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Caches a fresh LLM result (text-only entries) and tags it with the LLM parse path."""
+    if text and not image_data and settings.PARSE_CACHE_ENABLED:
+        await run_in_threadpool(parse_cache.set, text, parsed_result)
+    return _with_parse_path(parsed_result, PARSE_PATH_LLM)
+
+async def _parse_entry_async(
+    text: Optional[str], image_data: Optional[bytes] = None, deadline: Optional[Deadline] = None
+) -> Dict[str, Any]:
+    """Async counterpart of _parse_entry; cache DB I/O runs in the threadpool."""
+    local_result = await _parse_entry_locally_async(text, image_data)
+    if local_result is not None:
+        return local_result
+    parsed_result = await parse_health_entry_text_async(text=text, image_data=image_data, deadline=deadline)
+    return await _store_llm_result_async(text, image_data, parsed_result)
+
+def _resolve_entry_timestamp(target_date_str: Optional[str]) -> datetime:
+    """
+    Uses the start of target_date_str (UTC) if valid, otherwise the current UTC time.
+    Naive, like the timestamp column (asyncpg rejects aware datetimes for it).
+    """
+    if target_date_str:
+        try:
+            target_dt = date.fromisoformat(target_date_str)
+            entry_timestamp = datetime.combine(target_dt, time.min)
+            logger.info(f"Using target date {target_dt}, generated timestamp: {entry_timestamp}")
+            return entry_timestamp
+        except ValueError:
+            logger.warning(f"Invalid target_date_str '{target_date_str}', falling back to current time.")
+            return datetime.now(timezone.utc).replace(tzinfo=None)
+    entry_timestamp = datetime.now(timezone.utc).replace(tzinfo=None)
+    logger.info(f"No target date provided, using current UTC time: {entry_timestamp}")
+    return entry_timestamp
+
 class CRUDHealthEntry(CRUDBase[HealthEntry, HealthEntryCreate, HealthEntryUpdate]):
     def create_with_owner(
         self,
@@ -151,71 +423,332 @@ class CRUDHealthEntry(CRUDBase[HealthEntry, HealthEntryCreate, HealthEntryUpdate
         *,
         obj_in: HealthEntryCreate,
         owner_id: int,
-        image_data: Optional[bytes] = None
+        image_data: Optional[bytes] = None,
+        image_url: Optional[str] = None,
+        deadline: Optional[Deadline] = None
     ) -> HealthEntry:
         logger.info(f"Attempting to create entry for user {owner_id}, text: '{obj_in.entry_text[:50] if obj_in.entry_text else '[No Text]' }...', target_date: {obj_in.target_date_str}, image: {bool(image_data)}")
         
-        parsed_result = parse_health_entry_text(text=obj_in.entry_text, image_data=image_data)
+        parsed_result = _parse_entry(obj_in.entry_text, image_data, deadline)
         logger.debug(f"LLM Parse Result: {parsed_result}")
+        return self._create_from_parse_result(
+            db, obj_in=obj_in, owner_id=owner_id, parsed_result=parsed_result, image_url=image_url, deadline=deadline
+        )
 
-        entry_timestamp: datetime
-        if obj_in.target_date_str:
-            try:
-                target_dt = date.fromisoformat(obj_in.target_date_str)
-                entry_timestamp = datetime.combine(target_dt, time.min, tzinfo=timezone.utc)
-                logger.info(f"Using target date {target_dt}, generated timestamp: {entry_timestamp}")
-            except ValueError:
-                logger.warning(f"Invalid target_date_str '{obj_in.target_date_str}', falling back to current time.")
-                entry_timestamp = datetime.now(timezone.utc)
-        else:
-            entry_timestamp = datetime.now(timezone.utc)
-            logger.info(f"No target date provided, using current UTC time: {entry_timestamp}")
-            
+    async def create_with_owner_async(
+        self,
+        db: AsyncSession,
+        *,
+        obj_in: HealthEntryCreate,
+        owner_id: int,
+        image_data: Optional[bytes] = None,
+        image_url: Optional[str] = None,
+        deadline: Optional[Deadline] = None
+    ) -> HealthEntry:
+        """
+        Non-blocking variant of create_with_owner for async endpoints.
+        The LLM call is awaited on the event loop (and is cancelled if the caller's
+        task is cancelled); the blocking OFF enrichment runs in the threadpool and the
+        DB writes are awaited on the async session.
+        """
+        logger.info(f"Attempting async create for user {owner_id}, text: '{obj_in.entry_text[:50] if obj_in.entry_text else '[No Text]' }...', target_date: {obj_in.target_date_str}, image: {bool(image_data)}")
+
+        parsed_result = await _parse_entry_async(obj_in.entry_text, image_data, deadline)
+        logger.debug(f"LLM Parse Result: {parsed_result}")
+        db_obj = await run_in_threadpool(
+            self._build_entry_from_parse_result,
+            obj_in=obj_in, owner_id=owner_id, parsed_result=parsed_result, image_url=image_url, deadline=deadline
+        )
+        return await db.run_sync(self._save_new_entry, db_obj)
+
+    async def create_many_with_owner_async(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: List[HealthEntryCreate],
+        owner_id: int,
+        deadline: Optional[Deadline] = None
+    ) -> List[HealthEntry]:
+        """
+        Creates many text entries at once: cache hits are reused, the rest are parsed
+        with batched LLM calls, and all rows are inserted in a single transaction.
+        """
+        logger.info(f"Attempting bulk create of {len(objs_in)} entries for user {owner_id}")
+        texts = [obj_in.entry_text or "" for obj_in in objs_in]
+
+        parsed_results: List[Optional[Dict[str, Any]]] = [
+            await _parse_entry_locally_async(text) for text in texts
+        ]
+        to_parse = [i for i, parsed in enumerate(parsed_results) if parsed is None]
+        logger.info(f"Bulk create: {len(texts) - len(to_parse)} resolved without the LLM, {len(to_parse)} entries to parse")
+
+        fresh_results = await parse_health_entry_texts_batch_async([texts[i] for i in to_parse], deadline=deadline)
+        for i, parsed in zip(to_parse, fresh_results):
+            parsed_results[i] = await _store_llm_result_async(texts[i], None, parsed)
+
+        db_objs = await run_in_threadpool(
+            lambda: [
+                self._build_entry_from_parse_result(obj_in=obj_in, owner_id=owner_id, parsed_result=parsed_result, deadline=deadline)
+                for obj_in, parsed_result in zip(objs_in, parsed_results)
+            ]
+        )
+        return await db.run_sync(self._save_new_entries, db_objs)
+
+    def _save_new_entries(self, db: Session, db_objs: List[HealthEntry]) -> List[HealthEntry]:
+        """Inserts entries of one owner in a single transaction."""
+        owner_id = db_objs[0].owner_id
+        db.add_all(db_objs)
+        db.flush() # Multi-row INSERT ... RETURNING assigns the ids
+        ids = [db_obj.id for db_obj in db_objs]
+        daily_rollup.refresh_for_timestamps(db, owner_id=owner_id, timestamps=[db_obj.timestamp for db_obj in db_objs])
+        db.commit()
+        # Reload all committed rows with one SELECT instead of a refresh per row
+        entries_by_id = {e.id: e for e in db.query(self.model).filter(self.model.id.in_(ids)).all()}
+        logger.info(f"Successfully bulk created {len(ids)} entries for user {owner_id}")
+        return [entries_by_id[entry_id] for entry_id in ids]
+
+    def _create_from_parse_result(
+        self,
+        db: Session,
+        *,
+        obj_in: HealthEntryCreate,
+        owner_id: int,
+        parsed_result: Dict[str, Any],
+        image_url: Optional[str] = None,
+        deadline: Optional[Deadline] = None
+    ) -> HealthEntry:
+        """Enriches a parse result, builds the HealthEntry row and commits it."""
+        db_obj = self._build_entry_from_parse_result(
+            obj_in=obj_in, owner_id=owner_id, parsed_result=parsed_result, image_url=image_url, deadline=deadline
+        )
+        return self._save_new_entry(db, db_obj)
+
+    async def create_with_owner_stream(
+        self,
+        db: AsyncSession,
+        *,
+        obj_in: HealthEntryCreate,
+        owner_id: int,
+        image_data: Optional[bytes] = None,
+        image_url: Optional[str] = None,
+        deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming variant of create_with_owner_async. Yields (event, data) pairs as each
+        stage finishes: 'llm_chunk' (text deltas while the LLM generates), 'parsed',
+        'item' (each food item once enriched), 'totals' and finally 'entry' (the saved row).
+        """
+        logger.info(f"Attempting streaming create for user {owner_id}, text: '{obj_in.entry_text[:50] if obj_in.entry_text else '[No Text]' }...', image: {bool(image_data)}")
+        yield "stage", {"stage": "parsing"}
+
+        parsed_result = await _parse_entry_locally_async(obj_in.entry_text, image_data)
+        if parsed_result is None:
+            async for kind, payload in stream_health_entry_text_async(obj_in.entry_text, image_data, deadline):
+                if kind == "chunk":
+                    yield "llm_chunk", {"text": payload}
+                elif kind == "escalate":
+                    yield "stage", {"stage": "escalating", **payload}
+                else:
+                    parsed_result = payload
+            parsed_result = await _store_llm_result_async(obj_in.entry_text, image_data, parsed_result)
+
+        entry_type, value, unit, parsed_data_to_save = self._split_parse_result(parsed_result)
+        yield "parsed", {"type": entry_type, "value": value, "unit": unit, "parsed_data": parsed_data_to_save}
+
+        if _has_food_items(entry_type, parsed_data_to_save):
+            # Items are enriched concurrently and streamed as they finish; 'index' gives their position
+            enriched_items = list(parsed_data_to_save.get('items', []))
+            async for index, enriched_item in _enrich_food_items_as_completed(enriched_items, deadline):
+                enriched_items[index] = enriched_item
+                yield "item", {"index": index, "item": enriched_item}
+            parsed_data_to_save['items'] = enriched_items
+            parsed_data_to_save = _recalculate_food_totals(parsed_data_to_save)
+            yield "totals", {key: parsed_data_to_save.get(key) for key in FOOD_TOTAL_KEYS}
+
+        db_obj = self._new_entry(
+            obj_in=obj_in, owner_id=owner_id, entry_type=entry_type, value=value, unit=unit,
+            parsed_data=parsed_data_to_save, image_url=image_url
+        )
+        yield "entry", await db.run_sync(self._save_new_entry, db_obj)
+
+    def _save_new_entry(self, db: Session, db_obj: HealthEntry) -> HealthEntry:
+        db.add(db_obj)
+        daily_rollup.refresh_for_timestamps(db, owner_id=db_obj.owner_id, timestamps=[db_obj.timestamp])
+        db.commit()
+        db.refresh(db_obj)
+        logger.info(f"Successfully created entry ID {db_obj.id} for user {db_obj.owner_id}")
+        return db_obj
+
+    def _split_parse_result(self, parsed_result: Dict[str, Any]) -> Tuple[str, Optional[float], Optional[str], Any]:
+        """Extracts (entry_type, value, unit, parsed_data) from a parser result, keeping the parse path."""
+        parse_path = parsed_result.pop('parse_path', None)
         entry_type = parsed_result.get('type', 'unknown')
         value = parsed_result.get('value')
         unit = parsed_result.get('unit')
         parsed_data_to_save = parsed_result.get('parsed_data') or parsed_result # Use inner dict if exists
+        if parse_path and isinstance(parsed_data_to_save, dict):
+            parsed_data_to_save['parse_path'] = parse_path
+        return entry_type, value, unit, parsed_data_to_save
 
-        # --- Enrich and Recalculate if Food ---
-        if entry_type == 'food' and isinstance(parsed_data_to_save, dict) and 'items' in parsed_data_to_save:
-            logger.debug(f"Enriching food items for new entry...")
-            enriched_items = []
-            for item in parsed_data_to_save.get('items', []):
-                enriched_items.append(_enrich_item_nutrition(item)) # Call helper
-            parsed_data_to_save['items'] = enriched_items
-            
-            logger.debug(f"Recalculating totals for new entry...")
-            parsed_data_to_save = _recalculate_food_totals(parsed_data_to_save) # Recalc after enrichment
-        # --------------------------------------
-            
+    def _new_entry(
+        self,
+        *,
+        obj_in: HealthEntryCreate,
+        owner_id: int,
+        entry_type: str,
+        value: Optional[float],
+        unit: Optional[str],
+        parsed_data: Any,
+        image_url: Optional[str] = None
+    ) -> HealthEntry:
         obj_in_data = jsonable_encoder(obj_in)
         obj_in_data.pop('target_date_str', None) 
-        
-        db_obj = self.model(
+        return self.model(
             **obj_in_data, 
             owner_id=owner_id, 
-            timestamp=entry_timestamp,
-            entry_type=entry_type, # Use determined type
+            timestamp=_resolve_entry_timestamp(obj_in.target_date_str),
+            entry_type=_known_entry_type(entry_type), # Use determined type
             value=value,         # Use determined value
             unit=unit,           # Use determined unit
-            parsed_data=parsed_data_to_save, # Use final processed data
+            parsed_data=parsed_data, # Use final processed data
+            image_url=image_url,
+            **_food_total_columns(entry_type, parsed_data),
+        )
+
+    def _enrich_parse_result(
+        self, parsed_result: Dict[str, Any], deadline: Optional[Deadline] = None
+    ) -> Tuple[str, Optional[float], Optional[str], Any]:
+        """Splits a parse result and, for food, enriches items (OFF lookups) and recalculates totals."""
+        entry_type, value, unit, parsed_data_to_save = self._split_parse_result(parsed_result)
+
+        # --- Enrich and Recalculate if Food ---
+        if _has_food_items(entry_type, parsed_data_to_save):
+            logger.debug(f"Enriching food items...")
+            parsed_data_to_save['items'] = _enrich_food_items(parsed_data_to_save.get('items', []), deadline)
+            
+            logger.debug(f"Recalculating totals...")
+            parsed_data_to_save = _recalculate_food_totals(parsed_data_to_save) # Recalc after enrichment
+        # --------------------------------------
+        return entry_type, value, unit, parsed_data_to_save
+
+    def _build_entry_from_parse_result(
+        self,
+        *,
+        obj_in: HealthEntryCreate,
+        owner_id: int,
+        parsed_result: Dict[str, Any],
+        image_url: Optional[str] = None,
+        deadline: Optional[Deadline] = None
+    ) -> HealthEntry:
+        """Enriches a parse result (OFF lookups + totals) and builds an unsaved HealthEntry."""
+        entry_type, value, unit, parsed_data_to_save = self._enrich_parse_result(parsed_result, deadline)
+        return self._new_entry(
+            obj_in=obj_in, owner_id=owner_id, entry_type=entry_type, value=value, unit=unit,
+            parsed_data=parsed_data_to_save, image_url=image_url
         )
 
+    # --- Deferred (queued) parsing ---
+
+    def create_pending_with_owner(
+        self,
+        db: Session,
+        *,
+        obj_in: HealthEntryCreate,
+        owner_id: int,
+        image_url: Optional[str] = None
+    ) -> Tuple[HealthEntry, ParseJob]:
+        """
+        Saves the raw entry as entry_type='pending' and enqueues its parse job in the
+        same transaction; a queue worker fills in the parsed fields later.
+        """
+        db_obj = self._new_entry(
+            obj_in=obj_in, owner_id=owner_id, entry_type=ENTRY_TYPE_PENDING, value=None, unit=None,
+            parsed_data=None, image_url=image_url
+        )
         db.add(db_obj)
+        db.flush() # Assigns the entry id for the job
+        job = parse_job.new_job(entry_id=db_obj.id, owner_id=owner_id)
+        db.add(job)
+        daily_rollup.refresh_for_timestamps(db, owner_id=owner_id, timestamps=[db_obj.timestamp])
         db.commit()
         db.refresh(db_obj)
-        logger.info(f"Successfully created entry ID {db_obj.id} for user {owner_id}")
+        logger.info(f"Created pending entry ID {db_obj.id} with parse job {job.id} for user {owner_id}")
+        return db_obj, job
+
+    def parse_for_entry(
+        self,
+        db: Session,
+        *,
+        db_obj: HealthEntry,
+        image_data: Optional[bytes] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """Parses a stored entry's text/image through the usual fast path -> cache -> LLM chain."""
+        return _parse_entry(db_obj.entry_text, image_data, deadline)
+
+    def apply_parse_result(
+        self,
+        db: Session,
+        *,
+        db_obj: HealthEntry,
+        parsed_result: Dict[str, Any],
+        deadline: Optional[Deadline] = None
+    ) -> HealthEntry:
+        """
+        Enriches a parse result and writes it onto an existing (pending) entry, keeping its
+        timestamp and image. Does not commit; the caller commits with its own bookkeeping.
+        """
+        entry_type, value, unit, parsed_data_to_save = self._enrich_parse_result(parsed_result, deadline)
+        db_obj.entry_type = _known_entry_type(entry_type)
+        db_obj.value = value
+        db_obj.unit = unit
+        db_obj.parsed_data = parsed_data_to_save
+        for key, total in _food_total_columns(entry_type, parsed_data_to_save).items():
+            setattr(db_obj, key, total)
+        db.add(db_obj)
+        daily_rollup.refresh_for_timestamps(db, owner_id=db_obj.owner_id, timestamps=[db_obj.timestamp])
         return db_obj
 
     def get_multi_by_owner(
-        self, db: Session, *, owner_id: int, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        owner_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Tuple[datetime, int]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        entry_type: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None
     ) -> List[HealthEntry]:
-        """Retrieve multiple health entries belonging to a specific owner."""
-        logger.info(f"Getting health entries for owner {owner_id}, skip: {skip}, limit: {limit}")
+        """
+        Retrieve multiple health entries belonging to a specific owner, newest first.
+        `after` is the (timestamp, id) of the last entry of the previous page (keyset
+        pagination: stable while entries are added, and as fast on page 100 as on page 1);
+        start/end bound the UTC timestamp as [start, end).
+        `columns` limits the columns loaded (id is always loaded); the rest, notably the
+        large parsed_data JSON, are deferred and must not be accessed on the results.
+        """
+        logger.info(f"Getting health entries for owner {owner_id}, skip: {skip}, limit: {limit}, after: {after}, range: {start} - {end}, type: {entry_type}")
+        query = db.query(self.model).filter(HealthEntry.owner_id == owner_id)
+        if columns is not None:
+            query = query.options(load_only(*(getattr(HealthEntry, column) for column in columns)))
+        if entry_type is not None:
+            query = query.filter(HealthEntry.entry_type == entry_type)
+        if start is not None:
+            query = query.filter(HealthEntry.timestamp >= start)
+        if end is not None:
+            query = query.filter(HealthEntry.timestamp < end)
+        if after is not None:
+            after_timestamp, after_id = after
+            query = query.filter(
+                HealthEntry.timestamp <= after_timestamp, # Index range bound; the OR below is the exact keyset test
+                or_(HealthEntry.timestamp < after_timestamp, HealthEntry.id < after_id),
+            )
         entries = (
-            db.query(self.model)
-            .filter(HealthEntry.owner_id == owner_id)
-            .order_by(HealthEntry.timestamp.desc()) # Keep order consistent
+            query
+            .order_by(HealthEntry.timestamp.desc(), HealthEntry.id.desc()) # id breaks timestamp ties, for stable pages
             .offset(skip)
             .limit(limit)
             .all()
@@ -228,7 +761,8 @@ class CRUDHealthEntry(CRUDBase[HealthEntry, HealthEntryCreate, HealthEntryUpdate
         db: Session,
         *,
         db_obj: HealthEntry,
-        obj_in: Union[HealthEntryUpdate, dict[str, Any]]
+        obj_in: Union[HealthEntryUpdate, dict[str, Any]],
+        deadline: Optional[Deadline] = None
     ) -> HealthEntry:
         if isinstance(obj_in, dict):
             new_text = obj_in.get("entry_text")
@@ -238,10 +772,14 @@ class CRUDHealthEntry(CRUDBase[HealthEntry, HealthEntryCreate, HealthEntryUpdate
         if new_text is None:
              logger.warning(f"Update called for Entry ID {db_obj.id} without new text. No update performed.")
              return db_obj # Return original object if no text provided
+        if new_text == db_obj.entry_text and db_obj.entry_type != 'unknown': # An unparsed entry is re-tried
+            logger.info(f"Entry ID {db_obj.id} text unchanged, skipping re-parse.")
+            return db_obj
 
         logger.info(f"Updating Entry ID: {db_obj.id}. Parsing new text: '{new_text[:50]}...'") 
-        parsed_result = parse_health_entry_text(new_text)
-        logger.info(f"Parser result for Entry ID {db_obj.id}: {parsed_result}")
+        parsed_result = _parse_entry(new_text, deadline=deadline)
+        parse_path = parsed_result.pop('parse_path', None)
+        logger.info(f"Parser result for Entry ID {db_obj.id} (via {parse_path}): {parsed_result}")
 
         entry_type = parsed_result.get("type", "unknown")
         value = None
@@ -256,12 +794,10 @@ class CRUDHealthEntry(CRUDBase[HealthEntry, HealthEntryCreate, HealthEntryUpdate
         elif entry_type == 'food':
             food_data = parsed_result.get('parsed_data')
             if isinstance(food_data, dict) and 'items' in food_data and isinstance(food_data['items'], list):
-                # --- Enrich items using helper ---
+                # --- Enrich items, reusing the nutrition of items that kept their name ---
                 logger.debug(f"Enriching food items for update entry {db_obj.id}...")
-                enriched_items = []
-                for item in food_data['items']:
-                     enriched_items.append(_enrich_item_nutrition(item)) # Call helper
-                food_data['items'] = enriched_items
+                previous_items = db_obj.parsed_data.get('items') if _has_food_items(db_obj.entry_type, db_obj.parsed_data) else None
+                food_data['items'] = _enrich_changed_food_items(food_data['items'], previous_items, deadline)
                 # ---------------------------------
 
                 # --- Recalculate totals (existing logic) ---
@@ -279,22 +815,106 @@ class CRUDHealthEntry(CRUDBase[HealthEntry, HealthEntryCreate, HealthEntryUpdate
             unit = parsed_result.get("unit")
             final_parsed_data_to_save = parsed_result
                 
+        if parse_path and isinstance(final_parsed_data_to_save, dict):
+            final_parsed_data_to_save['parse_path'] = parse_path
+
         # --- Prepare update data dictionary --- 
         update_data = {
             "entry_text": new_text,
-            "entry_type": entry_type,
+            "entry_type": _known_entry_type(entry_type),
             "value": value,
             "unit": unit,
             "parsed_data": final_parsed_data_to_save,
-            "timestamp": datetime.utcnow()
+            **_food_total_columns(entry_type, final_parsed_data_to_save),
         }
         
         logger.info(f"Saving update data for Entry ID {db_obj.id}: {{entry_type='{update_data['entry_type']}', value='{update_data['value']}'}} ...")
         
-        # Use the base class update method
-        updated_entry = super().update(db, db_obj=db_obj, obj_in=update_data)
+        for field, field_value in update_data.items():
+            setattr(db_obj, field, field_value)
+        db.add(db_obj)
+        # The entry keeps its timestamp (and day); its rollup is refreshed in the same transaction
+        daily_rollup.refresh_for_timestamps(db, owner_id=db_obj.owner_id, timestamps=[db_obj.timestamp])
+        db.commit()
+        db.refresh(db_obj)
         logger.info(f"Update complete for Entry ID: {db_obj.id}")
-        return updated_entry
+        return db_obj
+
+    def update_items(
+        self, db: Session, *, db_obj: HealthEntry, edits: Sequence[HealthEntryItemEdit]
+    ) -> HealthEntry:
+        """
+        Sets the quantity or gram amount of a food entry's items and recalculates its
+        totals, without re-parsing or new lookups. Gram edits rescale the item's nutrition.
+        Raises ValueError for edits that don't fit the entry's items.
+        """
+        if not _has_food_items(db_obj.entry_type, db_obj.parsed_data) or not isinstance(db_obj.parsed_data['items'], list):
+            raise ValueError("Only food entries with parsed items can be edited item by item.")
+        parsed_data = copy.deepcopy(db_obj.parsed_data) # A new object, so the JSON column is saved
+        items = parsed_data['items']
+        for edit in edits:
+            if not 0 <= edit.index < len(items) or not isinstance(items[edit.index], dict):
+                raise ValueError(f"No item at index {edit.index}.")
+            item = items[edit.index]
+            if (edit.quantity is None) == (edit.grams is None):
+                raise ValueError(f"Give either a quantity or grams for item {edit.index}.")
+            new_amount = edit.quantity if edit.quantity is not None else edit.grams
+            if new_amount <= 0:
+                raise ValueError(f"The new amount of item {edit.index} must be positive.")
+            if edit.grams is not None:
+                old_grams = _item_grams(item)
+                if old_grams is None:
+                    raise ValueError(f"Item {edit.index} ('{item.get('item')}') has no amount in grams; edit its quantity instead.")
+                item.update(_scaled_nutrition(item, edit.grams / old_grams))
+                item['specified_amount'] = edit.grams
+            else:
+                if 'specified_amount' in item: # Its nutrition is for the whole amount, quantity is not used
+                    raise ValueError(f"Item {edit.index} ('{item.get('item')}') is measured by amount; edit its grams instead.")
+                item['quantity'] = edit.quantity
+
+        logger.info(f"Applying {len(edits)} item edit(s) to Entry ID {db_obj.id}")
+        db_obj.parsed_data = _recalculate_food_totals(parsed_data)
+        for field, field_value in _food_total_columns('food', db_obj.parsed_data).items():
+            setattr(db_obj, field, field_value)
+        db.add(db_obj)
+        daily_rollup.refresh_for_timestamps(db, owner_id=db_obj.owner_id, timestamps=[db_obj.timestamp])
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def import_entries(self, db: Session, *, owner_id: int, records: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        Upserts imported entries (rows built by services.health_import) with one multi-row
+        INSERT keyed on the owner's external_id, refreshes the affected rollups and commits.
+        A record the owner already has is updated only if its value changed: daily totals
+        (Apple Health steps, Google Fit metrics) keep their ID when a newer export counts
+        more of the day, while per-sample IDs cover the value, so those stay untouched.
+        Returns (inserted, updated).
+        """
+        if not records:
+            return 0, 0
+        # One row per ID: ON CONFLICT DO UPDATE cannot touch the same row twice in a statement
+        rows_by_id = {
+            record["external_id"]: {**record, "owner_id": owner_id, "parsed_data": {**record["parsed_data"], "parse_path": PARSE_PATH_IMPORT}}
+            for record in records
+        }
+        stmt = pg_insert(HealthEntry)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[HealthEntry.owner_id, HealthEntry.external_id],
+            index_where=HealthEntry.external_id.isnot(None),
+            set_={"value": stmt.excluded.value, "entry_text": stmt.excluded.entry_text, "parsed_data": stmt.excluded.parsed_data},
+            where=HealthEntry.value.is_distinct_from(stmt.excluded.value),
+        )
+        # xmax is 0 only for rows this statement inserted, not ones it updated
+        written = db.execute(
+            stmt.returning(HealthEntry.timestamp, literal_column("xmax = 0")), list(rows_by_id.values()),
+        ).all()
+        daily_rollup.refresh_for_timestamps(db, owner_id=owner_id, timestamps=[timestamp for timestamp, _ in written])
+        db.commit()
+        inserted = sum(1 for _, is_insert in written if is_insert)
+        updated = len(written) - inserted
+        logger.info(f"Imported {len(records)} entries for user {owner_id}: {inserted} inserted, {updated} updated")
+        return inserted, updated
 
     def remove(self, db: Session, *, id: int, user_id: int) -> Optional[HealthEntry]:
         logger.info(f"Attempting to remove HealthEntry {id} for user {user_id}")
@@ -309,33 +929,13 @@ class CRUDHealthEntry(CRUDBase[HealthEntry, HealthEntryCreate, HealthEntryUpdate
             raise HTTPException(status_code=403, detail="Not authorized to delete this entry") 
             
         db.delete(obj)
+        daily_rollup.refresh_for_timestamps(db, owner_id=obj.owner_id, timestamps=[obj.timestamp])
         db.commit()
         logger.info(f"Successfully removed HealthEntry {id} for user {user_id}")
         return obj # Return the deleted object (optional)
 
     # --- Reporting Functions --- 
-    
-    def _get_utc_bounds_for_local_date(self, target_date: date, tz_offset_minutes: int) -> tuple[datetime, datetime]:
-        """Calculates the UTC start and end datetimes corresponding to a full local day."""
-        # Offset from UTC. Note: getTimezoneOffset() is opposite sign of common TZ notation (SGT=+8, offset=-480)
-        offset_delta = timedelta(minutes=-tz_offset_minutes) # Reverse sign for calculation
-        
-        # Local day start: YYYY-MM-DD 00:00:00 in local time
-        local_start_naive = datetime.combine(target_date, time.min)
-        # Convert to UTC by subtracting the offset
-        utc_start = local_start_naive - offset_delta
-
-        # Local day end is the start of the *next* local day
-        local_end_naive = datetime.combine(target_date + timedelta(days=1), time.min)
-        # Convert to UTC by subtracting the offset
-        utc_end = local_end_naive - offset_delta
-        
-        logger.debug(f"Local date: {target_date}, Offset mins: {tz_offset_minutes} ({offset_delta})")
-        logger.debug(f"Calculated UTC Bounds: {utc_start} to {utc_end}")
-        # Return UTC start (inclusive) and UTC end (exclusive for the next day's start)
-        return utc_start, utc_end
-        
-
+    # Reports read per-day rollups (crud_daily_rollup), kept current by every write above
     def get_weekly_summary(
         self, db: Session, *, user_id: int, target_date: date, tz_offset_minutes: int = 0
     ) -> WeeklySummary:
@@ -343,81 +943,25 @@ class CRUDHealthEntry(CRUDBase[HealthEntry, HealthEntryCreate, HealthEntryUpdate
         # Determine start (Monday) and end (Sunday) of the target week based on LOCAL date
         start_of_week_local = target_date - timedelta(days=target_date.weekday())
         end_of_week_local = start_of_week_local + timedelta(days=6)
-        
-        # Get UTC boundaries for the start and end days of the week
-        utc_week_start, _ = self._get_utc_bounds_for_local_date(start_of_week_local, tz_offset_minutes)
-        _, utc_week_end = self._get_utc_bounds_for_local_date(end_of_week_local, tz_offset_minutes)
-        
-        logger.debug(f"Querying weekly summary between UTC {utc_week_start} and {utc_week_end}")
 
-        # Query for entries within the adjusted UTC date range
-        query = db.query(HealthEntry).filter(
-            HealthEntry.owner_id == user_id,
-            HealthEntry.timestamp >= utc_week_start, # Use calculated UTC start
-            HealthEntry.timestamp < utc_week_end      # Use calculated UTC end (exclusive)
+        # One grouped statement over the week's (at most 7) daily rollups
+        totals = daily_rollup.summarize(
+            db, owner_id=user_id, tz_offset_minutes=tz_offset_minutes,
+            start_date=start_of_week_local, end_date=end_of_week_local
         )
-        
-        # --- Aggregations --- (Logic mostly unchanged, but applied to the correct UTC range)
-        # Weight Average
-        avg_weight = db.query(func.avg(HealthEntry.value)).filter(
-            HealthEntry.owner_id == user_id,
-            HealthEntry.timestamp >= utc_week_start,
-            HealthEntry.timestamp < utc_week_end,
-            HealthEntry.entry_type == 'weight',
-            HealthEntry.unit.ilike('kg%') # Keep corrected filter
-        ).scalar()
-
-        # Steps Aggregations
-        steps_aggregates = db.query(
-            func.sum(HealthEntry.value).label('total_steps'),
-            func.avg(HealthEntry.value).label('avg_daily_steps') # Note: This avg might be slightly off if days have varying entries
-        ).filter(
-            HealthEntry.owner_id == user_id,
-            HealthEntry.timestamp >= utc_week_start,
-            HealthEntry.timestamp < utc_week_end,
-            HealthEntry.entry_type == 'steps' # Keep corrected filter
-        ).first()
-
-        # Food Aggregations (Fetch entries based on new UTC range)
-        food_entries = query.filter(HealthEntry.entry_type == 'food').all()
-        
-        total_calories = 0
-        total_protein = 0
-        total_carbs = 0
-        total_fat = 0
-        food_day_count = set() # Recalculate based on actual timestamps
-        valid_food_entries = 0
-        for entry in food_entries:
-            if isinstance(entry.parsed_data, dict):
-                try:
-                    calories = float(entry.parsed_data.get('total_calories', 0))
-                    protein = float(entry.parsed_data.get('total_protein_g', 0))
-                    carbs = float(entry.parsed_data.get('total_carbs_g', 0))
-                    fat = float(entry.parsed_data.get('total_fat_g', 0))
-                    
-                    total_calories += calories
-                    total_protein += protein
-                    total_carbs += carbs
-                    total_fat += fat
-                    
-                    # Determine local date for counting unique food days
-                    entry_local_time = entry.timestamp + timedelta(minutes=-tz_offset_minutes)
-                    food_day_count.add(entry_local_time.date())
-                    valid_food_entries += 1
-                except (ValueError, TypeError): pass
-
-        num_food_days = len(food_day_count) if len(food_day_count) > 0 else 1
+        food_days = totals.food_days # Food averages are per day with food logged
+        steps_days = totals.steps_days # Likewise steps: per day with steps logged
 
         summary = WeeklySummary(
             week_start_date=start_of_week_local,
             week_end_date=end_of_week_local,
-            avg_daily_calories=(total_calories / num_food_days) if num_food_days > 0 and valid_food_entries > 0 else None,
-            avg_daily_protein_g=(total_protein / num_food_days) if num_food_days > 0 and valid_food_entries > 0 else None,
-            avg_daily_carbs_g=(total_carbs / num_food_days) if num_food_days > 0 and valid_food_entries > 0 else None,
-            avg_daily_fat_g=(total_fat / num_food_days) if num_food_days > 0 and valid_food_entries > 0 else None,
-            avg_weight_kg=avg_weight,
-            avg_daily_steps=steps_aggregates.avg_daily_steps if steps_aggregates else None, # This average might need rethinking for accuracy
-            total_steps=int(steps_aggregates.total_steps) if steps_aggregates and steps_aggregates.total_steps is not None else None,
+            avg_daily_calories=(totals.calories / food_days) if food_days else None,
+            avg_daily_protein_g=(totals.protein_g / food_days) if food_days else None,
+            avg_daily_carbs_g=(totals.carbs_g / food_days) if food_days else None,
+            avg_daily_fat_g=(totals.fat_g / food_days) if food_days else None,
+            avg_weight_kg=(totals.weight_kg_sum / totals.weight_entry_count) if totals.weight_entry_count else None,
+            avg_daily_steps=(totals.total_steps / steps_days) if steps_days else None,
+            total_steps=int(totals.total_steps) if steps_days else None,
         )
         logger.info(f"Weekly summary generated for user {user_id}, local week {start_of_week_local} to {end_of_week_local}")
         return summary
@@ -426,49 +970,21 @@ class CRUDHealthEntry(CRUDBase[HealthEntry, HealthEntryCreate, HealthEntryUpdate
         self, db: Session, *, user_id: int, start_date: date, end_date: date, tz_offset_minutes: int = 0
     ) -> TrendReport:
         logger.info(f"CRUD: Trends report user {user_id}, LOCAL dates {start_date} to {end_date}, offset {tz_offset_minutes}") # Log local dates
-        
-        utc_start, _ = self._get_utc_bounds_for_local_date(start_date, tz_offset_minutes)
-        _, utc_end = self._get_utc_bounds_for_local_date(end_date, tz_offset_minutes)
-        
-        logger.debug(f"Querying trends between UTC {utc_start} and {utc_end}")
-
-        # Weight Trends
-        weight_data = db.query(HealthEntry.timestamp, HealthEntry.value).filter(
-            HealthEntry.owner_id == user_id,
-            HealthEntry.timestamp >= utc_start,
-            HealthEntry.timestamp < utc_end,
-            HealthEntry.entry_type == 'weight', # Verify exact string 'weight'
-            HealthEntry.unit.ilike('kg%')
-        ).order_by(HealthEntry.timestamp.asc()).all()
-        logger.debug(f"Found {len(weight_data)} raw weight entries.") # Log count
-        weight_trends = [TrendDataPoint(timestamp=ts, value=val) for ts, val in weight_data if val is not None]
-
-        # Steps Trends
-        step_entries = db.query(HealthEntry.timestamp, HealthEntry.value).filter(
-            HealthEntry.owner_id == user_id,
-            HealthEntry.timestamp >= utc_start,
-            HealthEntry.timestamp < utc_end,
-            HealthEntry.entry_type == 'steps' # Verify exact string 'steps'
-        ).order_by(HealthEntry.timestamp.asc()).all()
-        logger.debug(f"Found {len(step_entries)} raw step entries.") # Log count
-
-        # Group steps by local date
-        daily_steps = {}
-        offset_delta = timedelta(minutes=-tz_offset_minutes)
-        for ts_utc, val in step_entries:
-            if val is None: continue
-            local_date = (ts_utc + offset_delta).date()
-            try:
-                daily_steps[local_date] = daily_steps.get(local_date, 0) + float(val)
-            except (ValueError, TypeError):
-                logger.warning(f"Could not convert step value '{val}' to float for date {local_date}")
-        logger.debug(f"Grouped daily steps (local dates): {daily_steps}") # Log grouped data
-            
+
+        days = daily_rollup.get_range(
+            db, owner_id=user_id, tz_offset_minutes=tz_offset_minutes, start_date=start_date, end_date=end_date
+        )
+
+        # One weight point per local day: the day's last weigh-in, at its own time
+        weight_trends = [
+            TrendDataPoint(timestamp=day.last_weight_at, value=day.last_weight_kg)
+            for day in days if day.last_weight_kg is not None
+        ]
         steps_trends = [
-            TrendDataPoint(timestamp=datetime.combine(day, time.min), value=total) 
-            for day, total in sorted(daily_steps.items())
+            TrendDataPoint(timestamp=datetime.combine(day.local_date, time.min), value=day.total_steps)
+            for day in days if day.steps_entry_count > 0
         ]
-        
+
         report = TrendReport(
             start_date=start_date,
             end_date=end_date,
@@ -482,64 +998,17 @@ class CRUDHealthEntry(CRUDBase[HealthEntry, HealthEntryCreate, HealthEntryUpdate
         self, db: Session, *, user_id: int, target_date: date, tz_offset_minutes: int = 0
     ) -> DailySummary:
         """Generates a daily summary for a given user and date, adjusted for local timezone."""
-        
-        # Calculate UTC bounds for the requested local date
-        utc_start, utc_end = self._get_utc_bounds_for_local_date(target_date, tz_offset_minutes)
-        
         logger.info(f"CRUD: Daily summary user {user_id}, local date {target_date}, offset {tz_offset_minutes}")
-        # Base query using calculated UTC bounds
-        entries = db.query(HealthEntry).filter(
-            HealthEntry.owner_id == user_id,
-            HealthEntry.timestamp >= utc_start, 
-            HealthEntry.timestamp < utc_end # Use exclusive end for day boundary
-        ).all()
-        
-        logger.debug(f"Found {len(entries)} total entries for the adjusted UTC range.")
-
-        # Calculate total calories from food entries
-        total_calories = 0
-        food_entries = [e for e in entries if e.entry_type == 'food']
-        logger.debug(f"Found {len(food_entries)} food entries.")
-        for entry in food_entries:
-            logger.debug(f"Processing food entry {entry.id}: Text='{entry.entry_text}', Parsed='{entry.parsed_data}'")
-            if entry.parsed_data and isinstance(entry.parsed_data, dict):
-                calories = entry.parsed_data.get('total_calories', 0)
-                if calories is None: calories = 0
-                try:
-                     total_calories += float(calories)
-                     logger.debug(f"  Added {calories} kcal. Running total: {total_calories}")
-                except (ValueError, TypeError):
-                     logger.warning(f"  Could not parse calories ('{calories}') as float for entry {entry.id}.")
-            else:
-                logger.debug(f"  Skipping calorie calculation for entry {entry.id}: No valid parsed_data dictionary.")
-
-        # Calculate total steps using SQL aggregation
-        total_steps_query = db.query(func.sum(HealthEntry.value)).filter(
-            HealthEntry.owner_id == user_id,
-            HealthEntry.timestamp >= utc_start,
-            HealthEntry.timestamp < utc_end,
-            HealthEntry.entry_type == 'steps' 
-        ).scalar()
-        total_steps = total_steps_query if total_steps_query is not None else 0
-        logger.debug(f"SQL query result for total steps: {total_steps_query}. Using value: {total_steps}")
-
-        # Get the last recorded weight for the day
-        last_weight_entry = db.query(HealthEntry.value).filter(
-            HealthEntry.owner_id == user_id,
-            HealthEntry.timestamp >= utc_start,
-            HealthEntry.timestamp < utc_end,
-            HealthEntry.entry_type == 'weight', 
-            HealthEntry.unit.ilike('kg%') 
-        ).order_by(desc(HealthEntry.timestamp)).first()
-        last_weight_kg = last_weight_entry[0] if last_weight_entry else None
-        logger.debug(f"SQL query result for last weight: {last_weight_entry}. Using value: {last_weight_kg}")
+        totals = daily_rollup.summarize(
+            db, owner_id=user_id, tz_offset_minutes=tz_offset_minutes, start_date=target_date, end_date=target_date
+        )
 
         # Create summary object (using the original target_date for the label)
         summary_data = DailySummary(
-            date=target_date, 
-            total_calories=total_calories,
-            total_steps=total_steps,
-            last_weight_kg=last_weight_kg
+            date=target_date,
+            total_calories=round(totals.calories or 0),
+            total_steps=round(totals.total_steps or 0),
+            last_weight_kg=totals.last_weight_kg
         )
         logger.info(f"Generated Daily Summary (Local Date {target_date}): {summary_data}")
         return summary_data
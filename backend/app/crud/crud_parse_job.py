@@ -0,0 +1,143 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, and_, or_
+from pydantic import BaseModel
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any
+import random
+import logging
+
+from app.crud.base import CRUDBase
+from app.models.parse_job import ParseJob
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+def _retry_delay_seconds(attempts: int) -> float:
+    """Exponential backoff with jitter: base * 2^(attempts-1), capped, then scaled by 0.5-1.0."""
+    delay = min(
+        settings.PARSE_JOB_BACKOFF_MAX_SECONDS,
+        settings.PARSE_JOB_BACKOFF_BASE_SECONDS * 2 ** max(0, attempts - 1)
+    )
+    return delay * random.uniform(0.5, 1.0)
+
+class CRUDParseJob(CRUDBase[ParseJob, BaseModel, BaseModel]):
+    def new_job(self, *, entry_id: int, owner_id: int) -> ParseJob:
+        """Builds an unsaved job; callers add it in the same transaction as its pending entry."""
+        now = datetime.utcnow()
+        return self.model(
+            entry_id=entry_id, owner_id=owner_id, status=JOB_QUEUED,
+            attempts=0, max_attempts=settings.PARSE_JOB_MAX_ATTEMPTS,
+            created_at=now, run_after=now,
+        )
+
+    def get_for_owner(self, db: Session, *, id: int, owner_id: int) -> Optional[ParseJob]:
+        return db.query(self.model).filter(self.model.id == id, self.model.owner_id == owner_id).first()
+
+    def claim_next(self, db: Session, *, worker_id: str) -> Optional[ParseJob]:
+        """
+        Claims the oldest due job (or a running job whose lease expired, e.g. its worker died)
+        and marks it running. SKIP LOCKED lets concurrent workers claim different rows without waiting.
+        """
+        now = datetime.utcnow()
+        lease_expired = now - timedelta(seconds=settings.PARSE_JOB_LEASE_SECONDS)
+        job = (
+            db.query(self.model)
+            .filter(or_(
+                and_(self.model.status == JOB_QUEUED, self.model.run_after <= now),
+                and_(self.model.status == JOB_RUNNING, self.model.locked_at < lease_expired),
+            ))
+            .order_by(self.model.run_after)
+            .with_for_update(skip_locked=True)
+            .limit(1)
+            .first()
+        )
+        if not job:
+            db.rollback() # End the (empty) locking transaction
+            return None
+        if job.status == JOB_RUNNING:
+            logger.warning(f"Reclaiming parse job {job.id} from {job.locked_by}: lease expired.")
+        job.status = JOB_RUNNING
+        job.stage = "parsing"
+        job.attempts += 1
+        job.locked_at = now
+        job.locked_by = worker_id
+        if job.started_at is None:
+            job.started_at = now
+        db.commit()
+        logger.info(f"Worker {worker_id} claimed parse job {job.id} (entry {job.entry_id}, attempt {job.attempts}/{job.max_attempts})")
+        return job
+
+    def mark_stage(self, db: Session, *, job: ParseJob, stage: str) -> None:
+        job.stage = stage
+        db.commit()
+
+    def mark_succeeded(self, db: Session, *, job: ParseJob) -> None:
+        """Commits the job's completion together with any pending changes to its entry."""
+        job.status = JOB_SUCCEEDED
+        job.stage = None
+        job.last_error = None
+        job.locked_at = None
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        logger.info(f"Parse job {job.id} succeeded after {job.attempts} attempt(s)")
+
+    def mark_attempt_failed(self, db: Session, *, job: ParseJob, error: str) -> bool:
+        """
+        Records a failed attempt and schedules a retry with backoff. Returns True when
+        attempts are exhausted and the job is now failed (the caller finalizes the entry).
+        """
+        job.last_error = error[:1000]
+        job.locked_at = None
+        job.stage = None
+        if job.attempts >= job.max_attempts:
+            job.status = JOB_FAILED
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            logger.error(f"Parse job {job.id} failed permanently after {job.attempts} attempts: {error}")
+            return True
+        delay = _retry_delay_seconds(job.attempts)
+        job.status = JOB_QUEUED
+        job.run_after = datetime.utcnow() + timedelta(seconds=delay)
+        db.commit()
+        logger.warning(f"Parse job {job.id} attempt {job.attempts} failed, retrying in {delay:.1f}s: {error}")
+        return False
+
+    def queue_stats(self, db: Session) -> Dict[str, Any]:
+        """Queue depth by status plus lag: how long due jobs have waited and how long claims took."""
+        now = datetime.utcnow()
+        counts = dict(
+            db.query(self.model.status, func.count(self.model.id)).group_by(self.model.status).all()
+        )
+        due_count, oldest_due = (
+            db.query(func.count(self.model.id), func.min(self.model.run_after))
+            .filter(self.model.status == JOB_QUEUED, self.model.run_after <= now)
+            .one()
+        )
+        hour_ago = now - timedelta(hours=1)
+        avg_wait = (
+            db.query(func.avg(func.extract("epoch", self.model.started_at - self.model.created_at)))
+            .filter(self.model.started_at >= hour_ago)
+            .scalar()
+        )
+        finished_last_hour = (
+            db.query(func.count(self.model.id))
+            .filter(self.model.status == JOB_SUCCEEDED, self.model.finished_at >= hour_ago)
+            .scalar()
+        )
+        return {
+            "queued": counts.get(JOB_QUEUED, 0),
+            "due": due_count,
+            "running": counts.get(JOB_RUNNING, 0),
+            "succeeded": counts.get(JOB_SUCCEEDED, 0),
+            "failed": counts.get(JOB_FAILED, 0),
+            "succeeded_last_hour": finished_last_hour,
+            "oldest_due_age_seconds": (now - oldest_due).total_seconds() if oldest_due else None,
+            "avg_claim_wait_seconds_last_hour": float(avg_wait) if avg_wait is not None else None,
+        }
+
+parse_job = CRUDParseJob(ParseJob)
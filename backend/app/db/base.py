@@ -2,4 +2,9 @@
 # imported by Alembic or used by create_all
 from app.db.base_class import Base  # noqa
 from app.models.user import User  # noqa
-from app.models.health_entry import HealthEntry # noqa 
\ No newline at end of file
+from app.models.health_entry import HealthEntry # noqa
+from app.models.parse_cache import ParseCacheEntry # noqa
+from app.models.parse_job import ParseJob # noqa
+from app.models.nutrition_cache import NutritionCacheEntry # noqa
+from app.models.nutrition_product import NutritionProduct # noqa
+from app.models.daily_rollup import DailyRollup, DailyRollupZone # noqa
@@ -1,22 +1,45 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
+# Pool settings shared by both engines (see "Database Pool" in config.py)
+_POOL_OPTIONS = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+)
+
 # Create the SQLAlchemy engine
 # Use the correct setting name from config.py
 # Remove connect_args as it's specific to SQLite
 engine = create_engine(
-    str(settings.SQLALCHEMY_DATABASE_URI) # Convert Dsn to string for engine
+    str(settings.SQLALCHEMY_DATABASE_URI), # Convert Dsn to string for engine
+    **_POOL_OPTIONS
 )
 
 # Create a session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for the async endpoints: DB I/O is awaited on the event loop instead of
+# holding a threadpool thread. Connections are only opened on first use.
+async_engine = create_async_engine(
+    # SQLAlchemy's own cache of asyncpg prepared statements, on top of asyncpg's
+    f"{settings.ASYNC_SQLALCHEMY_DATABASE_URI}?prepared_statement_cache_size={settings.DB_STATEMENT_CACHE_SIZE}",
+    connect_args={"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+    **_POOL_OPTIONS
+)
+
+# expire_on_commit=False: attributes must not lazy-load after commit, as that is blocking I/O
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
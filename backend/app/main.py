@@ -4,9 +4,6 @@ from starlette.middleware.cors import CORSMiddleware
 
 from app.api.v1.api import api_router
 from app.core.config import settings
-# Import Base and engine for table creation
-from app.db.base import Base # Assuming models are imported here or in base_class
-from app.db.session import engine
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -20,17 +17,9 @@ print(f"INFO: Attempting to use database URI: {settings.SQLALCHEMY_DATABASE_URI}
 print("-" * 80)
 # --- END DIAGNOSTIC PRINT ---
 
-# --- Create database tables --- 
-# This should run once on startup if tables don't exist.
-# Ensure your models (User, HealthEntry) are imported via app.db.base
-print("INFO: Attempting to create database tables (if they don't exist)...")
-try:
-    Base.metadata.create_all(bind=engine)
-    print("INFO: Database tables checked/created successfully.")
-except Exception as e:
-    print(f"ERROR: Failed during table creation: {e}")
-    # Depending on the error, you might want the app to exit or continue
-# --- End Create Tables --- 
+# --- Database tables ---
+# The schema is managed with Alembic: run `alembic upgrade head` before starting the app.
+
 
 # Mount static files directory for uploads
 app.mount("/static", StaticFiles(directory="static"), name="static")
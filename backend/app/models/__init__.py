@@ -1,2 +1,7 @@
 from .user import User
 from .health_entry import HealthEntry
+from .parse_cache import ParseCacheEntry
+from .parse_job import ParseJob
+from .nutrition_cache import NutritionCacheEntry
+from .nutrition_product import NutritionProduct
+from .daily_rollup import DailyRollup, DailyRollupZone
\ No newline at end of file
@@ -0,0 +1,45 @@
+import datetime
+from sqlalchemy import Column, Integer, Date, DateTime, Float, ForeignKey
+
+from app.db.base_class import Base
+
+
+class DailyRollup(Base):
+    """
+    Per-user totals for one local day, read by the summary and trend reports instead of
+    the raw entries. Local days depend on the client's UTC offset, so rows are kept per
+    offset (see DailyRollupZone) and refreshed in the same transaction as entry writes.
+    """
+    __tablename__ = "daily_rollups"
+
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    tz_offset_minutes = Column(Integer, primary_key=True) # As sent by clients: UTC - local (SGT = -480)
+    local_date = Column(Date, primary_key=True)
+
+    entry_count = Column(Integer, nullable=False, default=0) # All entries, any type
+
+    food_entry_count = Column(Integer, nullable=False, default=0) # Food entries with usable totals
+    calories = Column(Float, nullable=False, default=0)
+    protein_g = Column(Float, nullable=False, default=0)
+    carbs_g = Column(Float, nullable=False, default=0)
+    fat_g = Column(Float, nullable=False, default=0)
+
+    steps_entry_count = Column(Integer, nullable=False, default=0)
+    total_steps = Column(Float, nullable=False, default=0)
+
+    weight_entry_count = Column(Integer, nullable=False, default=0) # Weights in kg only
+    weight_kg_sum = Column(Float, nullable=False, default=0)
+    last_weight_kg = Column(Float, nullable=True)
+    last_weight_at = Column(DateTime, nullable=True) # UTC timestamp of last_weight_kg's entry
+
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+
+
+class DailyRollupZone(Base):
+    """A UTC offset whose daily_rollups have been built for a user and are kept up to date."""
+    __tablename__ = "daily_rollup_zones"
+
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    tz_offset_minutes = Column(Integer, primary_key=True)
+    built_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+    last_read_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False) # For evicting unused offsets
@@ -1,30 +1,56 @@
 import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, JSON, Index, Enum
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
 
+# Stored as the Postgres enum health_entry_type; anything else is saved as 'unknown'.
+# Includes every type the LLM prompt asks for (exercise..note only keep a summary).
+ENTRY_TYPES = (
+    "food", "weight", "steps", "exercise", "medication", "symptom", "note", "unknown", "error", "pending",
+)
+
 
 class HealthEntry(Base):
     __tablename__ = "health_entries"
 
     id = Column(Integer, primary_key=True, index=True)
-    entry_text = Column(String, index=True, nullable=False)
+    entry_text = Column(String, nullable=False)
     timestamp = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
     owner = relationship("User") # Basic relationship to User model
 
     # Structured data fields filled by LLM parsing
-    entry_type = Column(String, index=True, nullable=True) # e.g., 'food', 'weight', 'steps', 'unknown'
+    entry_type = Column(Enum(*ENTRY_TYPES, name="health_entry_type"), index=True, nullable=True)
     value = Column(Float, nullable=True) # For weight or steps
     unit = Column(String, nullable=True) # e.g., 'kg', 'lbs', 'steps'
     parsed_data = Column(JSON, nullable=True) # Store raw JSON from LLM (e.g., food items list)
 
+    # Food totals copied out of parsed_data so reports can SUM them in SQL.
+    # Set together for food entries with usable totals, NULL otherwise.
+    total_calories = Column(Float, nullable=True)
+    total_protein_g = Column(Float, nullable=True)
+    total_carbs_g = Column(Float, nullable=True)
+    total_fat_g = Column(Float, nullable=True)
+
     # We will add more structured fields later (e.g., type, value, units, parsed_food_data)
     # entry_type = Column(String, index=True)
     # value = Column(Float)
     # units = Column(String)
     # parsed_data = Column(JSON)
 
-    image_url = Column(String, nullable=True) # Add image URL field 
\ No newline at end of file
+    image_url = Column(String, nullable=True) # Add image URL field
+
+    # Stable ID of a record imported from another app (e.g. Apple Health), so re-imports skip or update it
+    external_id = Column(String, nullable=True)
+
+    # Every list/report query filters one owner's entries by timestamp range (and often entry_type)
+    __table_args__ = (
+        Index("ix_health_entries_owner_id_timestamp", "owner_id", "timestamp"),
+        Index("ix_health_entries_owner_id_entry_type_timestamp", "owner_id", "entry_type", "timestamp"),
+        Index(
+            "uq_health_entries_owner_id_external_id", "owner_id", "external_id",
+            unique=True, postgresql_where=external_id.isnot(None),
+        ),
+    )
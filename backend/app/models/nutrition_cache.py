@@ -0,0 +1,15 @@
+import datetime
+from sqlalchemy import Column, String, DateTime, JSON, Boolean
+
+from app.db.base_class import Base
+
+
+class NutritionCacheEntry(Base):
+    """Persistent tier of the Open Food Facts lookup cache, including misses."""
+    __tablename__ = "nutrition_cache"
+
+    query = Column(String, primary_key=True) # Normalized item name
+    found = Column(Boolean, nullable=False) # False = OFF had no usable product (negative entry)
+    data = Column(JSON, nullable=True) # get_nutrition_from_off result when found
+    fetched_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True) # Stale (but still served while refreshing) after this
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Float, Index, UniqueConstraint, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from app.db.base_class import Base
+
+
+class NutritionProduct(Base):
+    """
+    Local copy of per-100g nutrition facts imported from Open Food Facts / USDA
+    FoodData Central dumps (scripts/import_nutrition_dump.py). Looked up before
+    the public OFF search API.
+    """
+    __tablename__ = "nutrition_products"
+
+    id = Column(Integer, primary_key=True)
+    source = Column(String, nullable=False) # 'off' | 'usda'
+    external_id = Column(String, nullable=False) # OFF barcode / USDA fdc_id
+    product_name = Column(String, nullable=False)
+    name_normalized = Column(String, nullable=False) # See local_nutrition.normalize_product_name
+    calories_100g = Column(Float, nullable=False)
+    protein_100g = Column(Float, nullable=False)
+    carbs_100g = Column(Float, nullable=False)
+    fat_100g = Column(Float, nullable=False)
+    popularity = Column(Integer, nullable=False, default=0) # OFF unique scans; ranks equally good matches
+    # Stored so ranking matches doesn't re-tokenize every candidate name
+    name_search = Column(TSVECTOR, Computed("to_tsvector('english', name_normalized)", persisted=True))
+
+    __table_args__ = (
+        UniqueConstraint("source", "external_id", name="uq_nutrition_products_source_external_id"),
+        # Exact-name lookups
+        Index("ix_nutrition_products_name_normalized", "name_normalized"),
+        # Word matches on product name (built-in full-text search; no extension needed)
+        Index("ix_nutrition_products_name_search", "name_search", postgresql_using="gin"),
+    )
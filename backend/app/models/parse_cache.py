@@ -0,0 +1,16 @@
+import datetime
+from sqlalchemy import Column, String, DateTime, JSON
+
+from app.db.base_class import Base
+
+
+class ParseCacheEntry(Base):
+    """Persistent tier of the LLM parse-result cache (survives restarts)."""
+    __tablename__ = "llm_parse_cache"
+
+    # sha256 of prompt version + model cascade signature + normalized entry text
+    cache_key = Column(String(64), primary_key=True)
+    model_name = Column(String, nullable=False)
+    prompt_version = Column(String, nullable=False)
+    result = Column(JSON, nullable=False) # Raw parser output, before OFF enrichment
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
@@ -0,0 +1,33 @@
+import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+
+from app.db.base_class import Base
+
+
+class ParseJob(Base):
+    """
+    Background parse of a 'pending' HealthEntry. The table is the queue: workers claim
+    due rows with SELECT ... FOR UPDATE SKIP LOCKED, so any number of workers/nodes can drain it.
+    """
+    __tablename__ = "parse_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    entry_id = Column(Integer, ForeignKey("health_entries.id", ondelete="CASCADE"), nullable=False, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+
+    status = Column(String, nullable=False, default="queued") # queued | running | succeeded | failed
+    stage = Column(String, nullable=True) # Progress within a run: parsing | enriching | saving
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    last_error = Column(String, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+    run_after = Column(DateTime, default=datetime.datetime.utcnow, nullable=False) # Not claimable before this (backoff)
+    started_at = Column(DateTime, nullable=True) # First claim, for queue lag
+    locked_at = Column(DateTime, nullable=True) # Lease start of the current run
+    locked_by = Column(String, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_parse_jobs_status_run_after", "status", "run_after"),
+    )
@@ -1,3 +1,4 @@
 from .token import Token, TokenPayload
 from .user import User, UserCreate
-from .health_entry import HealthEntry, HealthEntryCreate, HealthEntryUpdate
+from .health_entry import HealthEntry, HealthEntryCreate, HealthEntryUpdate, HealthEntryItemEdit, HealthEntryItemsUpdate, HealthEntryBulkCreate, HealthEntrySummary, ParseJobAccepted, ParseJobStatus
+from .admin import ParseCacheStats, CircuitBreakerState, ParseQueueStats, LLMTierStats
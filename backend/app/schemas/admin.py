@@ -0,0 +1,113 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+
+# --- Cache Schemas ---
+
+class ParseCacheStats(BaseModel):
+    memory_hits: int
+    db_hits: int
+    hits: int
+    misses: int
+    stores: int
+    db_errors: int
+    hit_rate: Optional[float] = None
+    memory_size: int
+    memory_max_size: int
+
+
+class NutritionCacheStats(BaseModel):
+    memory_hits: int
+    db_hits: int
+    stale_hits: int # Served after expiry while a refresh ran
+    negative_hits: int # Lookups answered with a cached "not found"
+    hits: int
+    misses: int
+    stores: int
+    refreshes: int
+    refresh_failures: int
+    db_errors: int
+    hit_rate: Optional[float] = None
+    memory_size: int
+    memory_max_size: int
+    refreshes_in_flight: int
+    db_entries: int
+    db_negative_entries: int
+    db_stale_entries: int
+
+
+class NutritionCacheEntry(BaseModel):
+    query: str # Normalized item name
+    found: bool
+    data: Optional[Dict[str, Any]] = None
+    fetched_at: datetime
+    expires_at: datetime
+    stale: bool
+    servable: bool # False once past the stale window (treated as a miss)
+    in_memory: bool # In this process's memory tier
+
+
+class NutritionCachePurgeResult(BaseModel):
+    deleted: int
+
+
+# --- Circuit Breaker Schemas ---
+
+class CircuitBreakerState(BaseModel):
+    name: str
+    state: str # closed | open | half_open
+    calls_in_window: int
+    failures_in_window: int
+    failure_rate: Optional[float] = None
+    rejected_calls: int
+    times_opened: int
+    retry_in_seconds: Optional[float] = None
+
+
+# --- HTTP Client Schemas ---
+
+class HttpClientStats(BaseModel):
+    name: str
+    calls: int # Logical requests (each may take several attempts)
+    retries: int
+    retries_by_reason: Dict[str, int] # HTTP status or connection error type
+    failed_calls: int
+    requests_sent: int # Attempts that reached the connection pool
+    new_connections: int
+    connection_reuse_rate: Optional[float] = None
+    pool_maxsize: int
+    coalesced_calls: int # Lookups that waited on an identical in-flight request
+    coalescing_rate: Optional[float] = None
+    in_flight: int
+
+
+# --- Parse Queue Schemas ---
+
+class ParseQueueStats(BaseModel):
+    queued: int
+    due: int # Queued and past their run_after (i.e. waiting for a worker)
+    running: int
+    succeeded: int
+    failed: int
+    succeeded_last_hour: int
+    oldest_due_age_seconds: Optional[float] = None # Queue lag
+    avg_claim_wait_seconds_last_hour: Optional[float] = None
+    local_workers: int
+
+
+# --- Model Cascade Schemas ---
+
+class LLMTierStats(BaseModel):
+    model: str
+    tier: Optional[int] = None # Position in LLM_MODEL_TIERS; None for models no longer configured
+    calls: int
+    errors: int
+    accepted: int # Results used from this tier
+    escalations: int # Results sent on to the next tier
+    escalation_rate: Optional[float] = None
+    escalation_reasons: Dict[str, int]
+    latency_p50_ms: Optional[float] = None
+    latency_p95_ms: Optional[float] = None
+    input_tokens: int
+    output_tokens: int
+    cost_usd: float
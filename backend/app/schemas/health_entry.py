@@ -15,6 +15,11 @@ class HealthEntryCreate(HealthEntryBase):
     pass # Only needs entry_text and target_date_str from user
 
 
+# Properties to receive via API on bulk creation (e.g. a pasted day or imported notes)
+class HealthEntryBulkCreate(BaseModel):
+    entries: List[HealthEntryCreate]
+
+
 # Properties to receive on item update
 class HealthEntryUpdate(BaseModel): # Not inheriting Base, only receive text
     entry_text: Optional[str] = None
@@ -22,6 +27,18 @@ class HealthEntryUpdate(BaseModel): # Not inheriting Base, only receive text
     # Specific update logic might be needed for parsed data, etc.
 
 
+# One food item edit (`PATCH /entries/{id}/items`): the item's index in parsed_data['items']
+# and its new quantity, or its new amount in grams for items measured by weight
+class HealthEntryItemEdit(BaseModel):
+    index: int
+    quantity: Optional[float] = None
+    grams: Optional[float] = None
+
+
+class HealthEntryItemsUpdate(BaseModel):
+    items: List[HealthEntryItemEdit]
+
+
 # Properties shared by models stored in DB
 class HealthEntryInDBBase(HealthEntryBase):
     id: int
@@ -33,6 +50,11 @@ class HealthEntryInDBBase(HealthEntryBase):
     unit: Optional[str] = None
     parsed_data: Optional[Dict[str, Any]] = None # Store parsed JSON details
     image_url: Optional[str] = None # Add image_url here
+    # Food totals copied out of parsed_data, so lists can show them without it
+    total_calories: Optional[float] = None
+    total_protein_g: Optional[float] = None
+    total_carbs_g: Optional[float] = None
+    total_fat_g: Optional[float] = None
 
     class Config:
         orm_mode = True # Changed from from_attributes=True for compatibility
@@ -44,6 +66,48 @@ class HealthEntry(HealthEntryInDBBase):
     pass # Inherits all fields from HealthEntryInDBBase
 
 
+# Compact list item (`GET /entries/?view=summary`): no parsed_data; fetch `GET /entries/{id}` for details
+class HealthEntrySummary(BaseModel):
+    id: int
+    timestamp: dt.datetime
+    entry_text: Optional[str] = None
+    entry_type: Optional[str] = None
+    value: Optional[float] = None
+    unit: Optional[str] = None
+    total_calories: Optional[float] = None
+    total_protein_g: Optional[float] = None
+    total_carbs_g: Optional[float] = None
+    total_fat_g: Optional[float] = None
+    image_url: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+
 # Properties stored in DB (if needed, often same as HealthEntryInDBBase)
 class HealthEntryInDB(HealthEntryInDBBase):
-    pass 
\ No newline at end of file
+    pass 
+
+
+# Returned with 202 when an entry is saved for background parsing
+class ParseJobAccepted(BaseModel):
+    job_id: int
+    entry_id: int
+    status: str
+    status_url: str
+
+
+# Status of a background parse job
+class ParseJobStatus(BaseModel):
+    job_id: int
+    entry_id: int
+    status: str # queued | running | succeeded | failed
+    stage: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    last_error: Optional[str] = None
+    created_at: dt.datetime
+    started_at: Optional[dt.datetime] = None
+    finished_at: Optional[dt.datetime] = None
+    next_attempt_at: Optional[dt.datetime] = None
+    entry: Optional[HealthEntry] = None # Set once the job has finished
@@ -0,0 +1,206 @@
+import csv
+import importlib.util
+import io
+import json
+import logging
+from datetime import datetime
+from typing import Any, Iterator, List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.health_entry import HealthEntry
+
+logger = logging.getLogger(__name__)
+
+# format -> media type
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+BASE_COLUMNS = ("id", "timestamp", "entry_type", "value", "unit", "entry_text", "image_url")
+# Optional column groups, selected with `include=`
+OPTIONAL_COLUMNS = {
+    "totals": ("total_calories", "total_protein_g", "total_carbs_g", "total_fat_g"),
+    "items": ("items",), # parsed_data['items'] of food entries; JSON text in CSV and Parquet
+}
+
+
+class ExportUnavailableError(Exception):
+    """The requested format needs a library that is not installed."""
+
+
+def export_columns(include: Sequence[str]) -> List[str]:
+    columns = list(BASE_COLUMNS)
+    for group in include:
+        columns.extend(OPTIONAL_COLUMNS[group])
+    return columns
+
+
+def _iter_batches(
+    db: Session,
+    *,
+    owner_id: int,
+    columns: Sequence[str],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    entry_type: Optional[str] = None,
+) -> Iterator[List[Any]]:
+    """
+    Yields the owner's entries, oldest first, in lists of EXPORT_BATCH_ROWS rows read
+    from a server-side cursor, so memory does not grow with the size of the history.
+    """
+    selected = [
+        HealthEntry.parsed_data["items"].label("items") if column == "items" else getattr(HealthEntry, column)
+        for column in columns
+    ]
+    stmt = select(*selected).where(HealthEntry.owner_id == owner_id)
+    if entry_type is not None:
+        stmt = stmt.where(HealthEntry.entry_type == entry_type)
+    if start is not None:
+        stmt = stmt.where(HealthEntry.timestamp >= start)
+    if end is not None:
+        stmt = stmt.where(HealthEntry.timestamp < end)
+    stmt = stmt.order_by(HealthEntry.timestamp, HealthEntry.id).execution_options(yield_per=settings.EXPORT_BATCH_ROWS)
+    yield from db.execute(stmt).partitions()
+
+
+def _json_text(value: Any) -> Optional[str]:
+    return None if value is None else json.dumps(value, separators=(",", ":"))
+
+
+def _csv_chunks(batches: Iterator[List[Any]], columns: Sequence[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    items_index = columns.index("items") if "items" in columns else None
+    for batch in batches:
+        for row in batch:
+            row = list(row)
+            row[1] = row[1].isoformat()
+            if items_index is not None:
+                row[items_index] = _json_text(row[items_index])
+            writer.writerow(row)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _ndjson_chunks(batches: Iterator[List[Any]], columns: Sequence[str]) -> Iterator[bytes]:
+    for batch in batches:
+        lines = []
+        for row in batch:
+            record = dict(zip(columns, row))
+            record["timestamp"] = record["timestamp"].isoformat()
+            lines.append(json.dumps(record, separators=(",", ":")))
+        yield ("\n".join(lines) + "\n").encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands its bytes out as chunks, while keeping the absolute
+    position the Parquet writer needs for the footer offsets."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_chunks(batches: Iterator[List[Any]], columns: Sequence[str]) -> Iterator[bytes]:
+    """Writes one Parquet row group per PARQUET_ROW_GROUP_ROWS rows and streams each as it is finished."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {
+        "id": pa.int64(), "timestamp": pa.timestamp("us"), "value": pa.float64(),
+        "total_calories": pa.float64(), "total_protein_g": pa.float64(),
+        "total_carbs_g": pa.float64(), "total_fat_g": pa.float64(),
+    }
+    schema = pa.schema([(column, types.get(column, pa.string())) for column in columns])
+    items_index = columns.index("items") if "items" in columns else None
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    pending: List[Any] = []
+
+    def write_row_group() -> bytes:
+        table = pa.Table.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(zip(*pending), schema)], schema=schema
+        )
+        writer.write_table(table, row_group_size=len(pending))
+        pending.clear()
+        return sink.drain()
+
+    try:
+        for batch in batches:
+            for row in batch:
+                if items_index is not None:
+                    row = list(row)
+                    row[items_index] = _json_text(row[items_index])
+                pending.append(row)
+            if len(pending) >= settings.PARQUET_ROW_GROUP_ROWS:
+                yield write_row_group()
+        if pending:
+            yield write_row_group()
+    finally:
+        writer.close() # Writes the footer (or closes the file after an error)
+    yield sink.drain()
+
+
+def check_format_available(export_format: str) -> None:
+    """Raises ExportUnavailableError if the format's optional dependency is missing."""
+    if export_format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise ExportUnavailableError("Parquet export needs pyarrow; install it or use csv/ndjson.")
+
+
+def stream_export(
+    session_factory,
+    *,
+    owner_id: int,
+    export_format: str,
+    include: Sequence[str] = (),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    entry_type: Optional[str] = None,
+) -> Iterator[bytes]:
+    """
+    Streams the owner's entries in the given format. Opens its own session from
+    session_factory, as the body is sent after the request-scoped one is closed.
+    """
+    columns = export_columns(include)
+    writers = {"csv": _csv_chunks, "ndjson": _ndjson_chunks, "parquet": _parquet_chunks}
+    db = session_factory()
+    rows = 0
+    try:
+        def counted(batches: Iterator[List[Any]]) -> Iterator[List[Any]]:
+            nonlocal rows
+            for batch in batches:
+                rows += len(batch)
+                yield batch
+
+        batches = _iter_batches(db, owner_id=owner_id, columns=columns, start=start, end=end, entry_type=entry_type)
+        for chunk in writers[export_format](counted(batches), columns):
+            if chunk:
+                yield chunk
+        logger.info(f"Exported {rows} entries for user {owner_id} as {export_format} (include: {list(include)})")
+    finally:
+        db.close()
@@ -0,0 +1,107 @@
+import logging
+import re
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+# Deterministic parser for trivial weight/steps entries ("weight 81.2 kg", "walked 9,400 steps").
+# It only answers when the WHOLE entry matches one of the grammars below and the value is
+# plausible; anything else returns None and falls through to the LLM.
+
+KG_PER_LB = 0.45359237
+
+# Plausible ranges; values outside them are left to the LLM
+WEIGHT_KG_RANGE = (20.0, 400.0)
+STEPS_RANGE = (1, 200_000)
+
+_NUMBER = r"\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?"
+
+_WEIGHT_UNITS = {
+    "kg": "kg", "kgs": "kg", "kilo": "kg", "kilos": "kg", "kilogram": "kg", "kilograms": "kg",
+    "lb": "lb", "lbs": "lb", "pound": "lb", "pounds": "lb",
+}
+
+_WEIGHT_RE = re.compile(
+    r"""^
+    (?:(?:my\s+)?(?:body\s*)?(?:weight|weighed|weigh|wt)(?:\s+(?:is|was|in\s+at|today|this\s+morning))*\s*[:=]?\s*)?
+    (?:weighed\s+in\s+at\s+|i\s+weigh\s+|i\s+weighed\s+)?
+    (?P<value>""" + _NUMBER + r""")\s*
+    (?P<unit>kgs?|kilos?|kilograms?|lbs?|pounds?)
+    (?:\s+(?:today|this\s+morning|morning|in\s+the\s+morning))?
+    $""",
+    re.IGNORECASE | re.VERBOSE,
+)
+
+_STEPS_RE = re.compile(
+    r"""^
+    (?:(?:i\s+)?(?:walked|did|took|hit|logged|got)\s+)?
+    (?:(?:about|around|roughly|approx\.?)\s+)?
+    (?P<value>""" + _NUMBER + r""")\s*(?P<thousands>k)?\s*
+    steps?
+    (?:\s+(?:today|walked|taken|total|so\s+far))?
+    $""",
+    re.IGNORECASE | re.VERBOSE,
+)
+
+_STEPS_LABEL_RE = re.compile(
+    r"""^
+    (?:step\s*count|steps?)(?:\s+(?:today|walked|taken|total))?\s*[:=]?\s*
+    (?P<value>""" + _NUMBER + r""")\s*(?P<thousands>k)?
+    $""",
+    re.IGNORECASE | re.VERBOSE,
+)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.strip().rstrip(".!").split())
+
+
+def _to_float(raw: str) -> float:
+    return float(raw.replace(",", ""))
+
+
+def _parse_weight(text: str) -> Optional[Dict[str, Any]]:
+    match = _WEIGHT_RE.match(text)
+    if not match:
+        return None
+    value = _to_float(match.group("value"))
+    unit = _WEIGHT_UNITS[match.group("unit").lower()]
+    parsed_data: Dict[str, Any] = {"original_text": text}
+    if unit == "lb":
+        parsed_data["original_value"] = value
+        parsed_data["original_unit"] = "lb"
+        value = round(value * KG_PER_LB, 1)
+    if not WEIGHT_KG_RANGE[0] <= value <= WEIGHT_KG_RANGE[1]:
+        return None
+    return {"type": "weight", "value": value, "unit": "kg", "parsed_data": parsed_data}
+
+
+def _parse_steps(text: str) -> Optional[Dict[str, Any]]:
+    match = _STEPS_RE.match(text) or _STEPS_LABEL_RE.match(text)
+    if not match:
+        return None
+    raw = match.group("value")
+    if "." in raw and not match.group("thousands"):
+        return None # Steps are whole numbers: "10.000" is dot-grouped thousands or a typo, let the LLM decide
+    value = _to_float(raw)
+    if match.group("thousands"):
+        value *= 1000
+    if value != int(value) or not STEPS_RANGE[0] <= value <= STEPS_RANGE[1]:
+        return None
+    return {"type": "steps", "value": int(value), "unit": "steps", "parsed_data": {"original_text": text}}
+
+
+def parse_simple_entry(text: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Returns an LLM-shaped parse result ({type, value, unit, parsed_data}) for trivial
+    weight/steps entries, or None when the text is not confidently one of them.
+    """
+    if not text:
+        return None
+    normalized = _normalize(text)
+    if not normalized or len(normalized) > 60:
+        return None
+    result = _parse_weight(normalized) or _parse_steps(normalized)
+    if result:
+        logger.debug(f"Fast-path parsed '{normalized}' as {result['type']}={result['value']}")
+    return result
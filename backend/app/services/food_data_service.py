@@ -1,75 +1,139 @@
 import requests
+import json
 import logging
 from typing import Optional, Dict, Any
 
+from app.core.config import settings
+from app.services.resilience import Deadline, DependencyUnavailableError, CircuitOpenError, call_timeout, off_breaker
+from app.services.local_nutrition import lookup_local, normalize_product_name
+from app.services.http_client import PooledHttpClient, SingleFlight
+from app.services.name_matching import best_match, product_name_index
+
 logger = logging.getLogger(__name__)
 
 # Open Food Facts API endpoint
 OFF_API_URL = "https://world.openfoodfacts.org/api/v2/search"
 
-def get_nutrition_from_off(item_name: str) -> Optional[Dict[str, Any]]:
+# One keep-alive session for all OFF lookups (threads share its connection pool)
+off_client = PooledHttpClient(
+    "openfoodfacts",
+    pool_maxsize=settings.OFF_HTTP_POOL_MAXSIZE,
+    max_retries=settings.OFF_HTTP_MAX_RETRIES,
+    backoff_base_seconds=settings.OFF_HTTP_BACKOFF_BASE_SECONDS,
+    backoff_max_seconds=settings.OFF_HTTP_BACKOFF_MAX_SECONDS,
+)
+# Concurrent lookups of the same (normalized) item share one OFF request
+off_single_flight = SingleFlight()
+
+def get_nutrition_from_off(item_name: str, deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
     """
     Searches Open Food Facts for an item and returns nutritional data per 100g.
+    The imported nutrition_products table is tried first; the public API is only
+    queried when it has no match and NUTRITION_REMOTE_FALLBACK is on, over a pooled,
+    retrying session; concurrent lookups of the same item share one request.
+    Candidates are scored with name_matching and the best one above
+    NAME_MATCH_THRESHOLD is returned (with its match_score); products seen in
+    earlier searches are matched from an in-memory index first.
     Returns None if not found or data is insufficient.
+    Raises DependencyUnavailableError if OFF is failing (breaker open, request error)
+    or the request's deadline leaves too little time for a lookup.
     """
+    if settings.NUTRITION_LOCAL_DB_ENABLED:
+        local_data = lookup_local(item_name)
+        if local_data:
+            return local_data
+    if not settings.NUTRITION_REMOTE_FALLBACK:
+        logger.info(f"No local nutrition data for '{item_name}' and remote fallback is disabled")
+        return None
+
+    known = product_name_index.search(item_name, settings.NAME_INDEX_MIN_SCORE)
+    if known:
+        logger.info(f"Matched '{item_name}' to known OFF product '{known['product_name']}' (score {known['match_score']})")
+        return known
+
+    key = normalize_product_name(item_name) or item_name
+    result = off_single_flight.do(key, lambda: _search_off(item_name, deadline), deadline=deadline)
+    return dict(result) if result else result # Callers sharing a flight each get their own copy
+
+
+def _search_off(item_name: str, deadline: Optional[Deadline]) -> Optional[Dict[str, Any]]:
+    # Checked before the breaker guard: running out of our own budget is not an OFF failure
+    call_timeout(deadline, settings.OFF_CALL_TIMEOUT_SECONDS, settings.OFF_MIN_BUDGET_SECONDS)
     logger.info(f"Querying Open Food Facts for: {item_name}")
     params = {
         "search_terms": item_name,
         "search_simple": 1,
         "action": "process",
         "json": 1,
-        "page_size": 1, # Get only the top result for simplicity
+        "page_size": settings.NAME_MATCH_CANDIDATES, # Scored locally; OFF's top hit is often not the best match
         # Request specific fields for efficiency
         "fields": "product_name,nutriments" 
     }
     
     try:
-        response = requests.get(OFF_API_URL, params=params, timeout=10) # Added timeout
-        response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
-        
+        with off_breaker.guard():
+            response = off_client.get(
+                OFF_API_URL, params=params, deadline=deadline,
+                timeout_cap=settings.OFF_CALL_TIMEOUT_SECONDS, min_budget=settings.OFF_MIN_BUDGET_SECONDS,
+            )
+            response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
+    except CircuitOpenError:
+        logger.info(f"Skipping OFF lookup for '{item_name}': circuit breaker open")
+        raise
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Error querying Open Food Facts API: {e}", exc_info=False)
+        raise DependencyUnavailableError(f"Open Food Facts request failed: {e}") from e
+
+    try:
         data = response.json()
         
         if not data or data.get('count', 0) == 0 or not data.get('products'):
             logger.info(f"No products found on OFF for: {item_name}")
             return None
-            
-        product = data['products'][0]
-        nutriments = product.get('nutriments')
-        
-        if not nutriments:
-            logger.info(f"No nutriments data found on OFF for product: {product.get('product_name')}")
-            return None
-            
-        # Extract relevant values per 100g. Keys might vary (e.g., energy-kcal_100g or energy_100g)
-        # Check common variations for calories
-        calories_100g = nutriments.get('energy-kcal_100g') or \
-                        nutriments.get('energy_100g') # Often in kJ, needs conversion if only this available
-        # TODO: Add kJ to kcal conversion if needed: kj / 4.184 approx
-                        
-        protein_100g = nutriments.get('proteins_100g')
-        carbs_100g = nutriments.get('carbohydrates_100g')
-        fat_100g = nutriments.get('fat_100g')
-        
-        # Check if essential data is present
-        if calories_100g is None or protein_100g is None or carbs_100g is None or fat_100g is None:
-            logger.warning(f"Incomplete nutriments data from OFF for: {product.get('product_name')}")
-            return None
-            
-        # Return data per 100g
-        nutrition_data = {
-            "calories_100g": float(calories_100g),
-            "protein_100g": float(protein_100g),
-            "carbs_100g": float(carbs_100g),
-            "fat_100g": float(fat_100g),
-            "source": "OpenFoodFacts",
-            "product_name": product.get('product_name') # Include name for logging/debug
-        }
-        logger.info(f"Found OFF data for '{item_name}' ('{nutrition_data['product_name']}')") #: {nutrition_data}") # Simplified log
-        return nutrition_data
+
+        candidates = [c for c in (_nutrition_from_product(p) for p in data['products']) if c]
+    except (KeyError, IndexError, ValueError, TypeError, json.JSONDecodeError) as e:
+        logger.error(f"Error processing Open Food Facts response: {e}", exc_info=False)
+        return None
+
+    product_name_index.add(candidates)
+    match = best_match(item_name, candidates)
+    if not match:
+        logger.info(f"None of {len(candidates)} usable OFF products matched '{item_name}'")
+        return None
+    logger.info(f"Found OFF data for '{item_name}' ('{match['product_name']}', score {match['match_score']})")
+    return match
+
+
+def _nutrition_from_product(product: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Per-100g data from one OFF search result, or None if it lacks any of the values."""
+    nutriments = product.get('nutriments')
+    
+    if not nutriments or not product.get('product_name'):
+        logger.debug(f"No nutriments data found on OFF for product: {product.get('product_name')}")
+        return None
         
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error querying Open Food Facts API: {e}", exc_info=False)
+    # Extract relevant values per 100g. Keys might vary (e.g., energy-kcal_100g or energy_100g)
+    # Check common variations for calories
+    calories_100g = nutriments.get('energy-kcal_100g') or \
+                    nutriments.get('energy_100g') # Often in kJ, needs conversion if only this available
+    # TODO: Add kJ to kcal conversion if needed: kj / 4.184 approx
+                    
+    protein_100g = nutriments.get('proteins_100g')
+    carbs_100g = nutriments.get('carbohydrates_100g')
+    fat_100g = nutriments.get('fat_100g')
+    
+    # Check if essential data is present
+    if calories_100g is None or protein_100g is None or carbs_100g is None or fat_100g is None:
+        logger.debug(f"Incomplete nutriments data from OFF for: {product.get('product_name')}")
         return None
-    except (KeyError, IndexError, ValueError, json.JSONDecodeError) as e:
-        logger.error(f"Error processing Open Food Facts response: {e}", exc_info=False)
-        return None 
\ No newline at end of file
+        
+    # Return data per 100g
+    return {
+        "calories_100g": float(calories_100g),
+        "protein_100g": float(protein_100g),
+        "carbs_100g": float(carbs_100g),
+        "fat_100g": float(fat_100g),
+        "source": "OpenFoodFacts",
+        "product_name": product.get('product_name') # Include name for logging/debug
+    }
@@ -0,0 +1,241 @@
+import csv
+import hashlib
+import io
+import logging
+import os
+import zipfile
+from contextlib import contextmanager
+from datetime import date, datetime, time, timezone
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from xml.etree.ElementTree import ParseError, iterparse
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.services.fast_parser import KG_PER_LB, WEIGHT_KG_RANGE
+
+logger = logging.getLogger(__name__)
+
+# Imports of other apps' exports: records map straight to steps/weight entries (no LLM).
+# Each record (for Apple Health steps, each day) yields an insert row for
+# crud.health_entry.import_entries, or None when it is of a supported type but its
+# value cannot be used.
+
+IMPORT_SOURCES = ("apple_health", "google_fit")
+
+_APPLE_STEPS = "HKQuantityTypeIdentifierStepCount"
+_APPLE_BODY_MASS = "HKQuantityTypeIdentifierBodyMass"
+_APPLE_DATE_FORMAT = "%Y-%m-%d %H:%M:%S %z"
+
+# Google Fit (Takeout) "Daily activity metrics.csv" columns
+_FIT_DATE = "Date"
+_FIT_STEPS = "Step count"
+_FIT_WEIGHT = "Average weight (kg)"
+
+
+class ImportFormatError(ValueError):
+    """The file is not an export we can read."""
+
+
+def detect_source(filename: str) -> str:
+    """Guesses the export type from the file name: Apple Health .zip/.xml or Google Fit .csv."""
+    extension = os.path.splitext(filename.lower())[1]
+    if extension in (".zip", ".xml"):
+        return "apple_health"
+    if extension == ".csv":
+        return "google_fit"
+    raise ImportFormatError("Unrecognised export file. Upload Apple Health's export.zip/export.xml or a Google Fit daily metrics CSV.")
+
+
+@contextmanager
+def open_export(export: Union[str, BinaryIO], source: str) -> Iterator[BinaryIO]:
+    """
+    Opens the export (a path, or a seekable binary file) for streaming; for an Apple
+    Health zip, its export.xml is read without extracting it.
+    """
+    if source == "apple_health" and zipfile.is_zipfile(export):
+        with zipfile.ZipFile(export) as archive:
+            names = [name for name in archive.namelist() if os.path.basename(name) == "export.xml"]
+            if not names:
+                raise ImportFormatError("The zip has no export.xml.")
+            with archive.open(names[0]) as stream:
+                yield stream
+    elif isinstance(export, str):
+        with open(export, "rb") as stream:
+            yield stream
+    else:
+        export.seek(0) # is_zipfile may have moved it
+        yield export
+
+
+def _weight_row(external_id: str, timestamp: datetime, value: float, unit: str, parsed_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Weight in kg like the fast-path parser (pounds converted, original kept); None if implausible."""
+    if unit == "lb":
+        parsed_data["original_value"] = value
+        parsed_data["original_unit"] = "lb"
+        value = round(value * KG_PER_LB, 1)
+    elif unit != "kg":
+        return None
+    if not WEIGHT_KG_RANGE[0] <= value <= WEIGHT_KG_RANGE[1]:
+        return None
+    return {
+        "external_id": external_id, "timestamp": timestamp, "entry_type": "weight", "value": value, "unit": "kg",
+        "entry_text": f"{value:g} kg", "parsed_data": parsed_data,
+    }
+
+
+def _steps_row(external_id: str, timestamp: datetime, value: float, parsed_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if value < 0:
+        return None
+    steps = int(round(value))
+    return {
+        "external_id": external_id, "timestamp": timestamp, "entry_type": "steps", "value": steps, "unit": "steps",
+        "entry_text": f"{steps} steps", "parsed_data": parsed_data,
+    }
+
+
+def _apple_sample(attrs: Dict[str, str]) -> Optional[Tuple[float, datetime]]:
+    """(value, start as an aware datetime) of a Record, or None if either is unreadable."""
+    try:
+        return float(attrs["value"]), datetime.strptime(attrs["startDate"], _APPLE_DATE_FORMAT)
+    except (KeyError, ValueError):
+        return None
+
+
+def _apple_weight_record(attrs: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    sample = _apple_sample(attrs)
+    if sample is None:
+        return None
+    value, start = sample
+    # Identical records (the same sample exported twice) get the same ID
+    key = "|".join(attrs.get(name, "") for name in ("type", "sourceName", "startDate", "endDate", "unit", "value"))
+    external_id = "apple_health:" + hashlib.sha1(key.encode()).hexdigest()
+    parsed_data = {
+        "source": "apple_health", "source_name": attrs.get("sourceName"),
+        "start": attrs.get("startDate"), "end": attrs.get("endDate"),
+    }
+    timestamp = start.astimezone(timezone.utc).replace(tzinfo=None)
+    return _weight_row(external_id, timestamp, value, attrs.get("unit", ""), parsed_data)
+
+
+def iter_apple_health_records(stream: BinaryIO) -> Iterator[Optional[Dict[str, Any]]]:
+    """
+    Streams body-mass Records from an Apple Health export.xml as they are read, then
+    one steps row per day. An iPhone and a Watch both record the same walk, so a day's
+    steps are the total of the one source (device or app) that counted the most that
+    day; summing every StepCount sample would double-count. Days are the samples' local
+    dates, stored at 12:00 UTC like Google Fit's, and a day's row keeps its ID so a newer
+    export that covers more of the day updates it. Elements are discarded as soon as they
+    are read, so memory stays constant for any file size apart from one total per day
+    and source.
+    """
+    daily_steps: Dict[date, Dict[str, float]] = {}
+    root = None
+    try:
+        for event, element in iterparse(stream, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = element
+                continue
+            if element.tag == "Record":
+                record_type = element.get("type")
+                if record_type == _APPLE_BODY_MASS:
+                    yield _apple_weight_record(element.attrib)
+                elif record_type == _APPLE_STEPS:
+                    sample = _apple_sample(element.attrib)
+                    if sample is None or sample[0] < 0:
+                        yield None
+                    else:
+                        by_source = daily_steps.setdefault(sample[1].date(), {})
+                        source_name = element.get("sourceName", "")
+                        by_source[source_name] = by_source.get(source_name, 0.0) + sample[0]
+            root.clear() # Drops finished top-level elements (Record, Workout, ...); open ones are unaffected
+    except ParseError as e:
+        raise ImportFormatError(f"Not a readable Apple Health export.xml ({e}).") from e
+
+    for day in sorted(daily_steps):
+        source_name, steps = max(daily_steps[day].items(), key=lambda item: item[1])
+        parsed_data = {"source": "apple_health", "source_name": source_name, "date": day.isoformat()}
+        yield _steps_row(f"apple_health:{day.isoformat()}:steps", datetime.combine(day, time(12)), steps, parsed_data)
+
+
+def iter_google_fit_records(stream: BinaryIO) -> Iterator[Optional[Dict[str, Any]]]:
+    """
+    Streams daily steps and average weight from a Google Fit (Takeout) daily activity
+    metrics CSV. Days are stored at 12:00 UTC, which falls on the same local date for
+    any UTC offset within +/-12h.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    try:
+        fieldnames = reader.fieldnames
+    except UnicodeDecodeError as e:
+        raise ImportFormatError("Not a UTF-8 CSV file.") from e
+    if not fieldnames or _FIT_DATE not in fieldnames:
+        raise ImportFormatError(f"Expected a Google Fit daily metrics CSV with a '{_FIT_DATE}' column.")
+    for row in reader:
+        try:
+            day = date.fromisoformat(row[_FIT_DATE])
+        except ValueError:
+            yield None
+            continue
+        timestamp = datetime.combine(day, time(12))
+        parsed_data = {"source": "google_fit", "date": day.isoformat()}
+        for column, entry_type in ((_FIT_STEPS, "steps"), (_FIT_WEIGHT, "weight")):
+            raw = (row.get(column) or "").strip()
+            if not raw:
+                continue
+            external_id = f"google_fit:{day.isoformat()}:{entry_type}"
+            try:
+                value = float(raw)
+            except ValueError:
+                yield None
+                continue
+            if entry_type == "steps":
+                yield _steps_row(external_id, timestamp, value, dict(parsed_data))
+            else:
+                yield _weight_row(external_id, timestamp, value, "kg", dict(parsed_data))
+
+
+def import_records(
+    db: Session, *, owner_id: int, records: Iterable[Optional[Dict[str, Any]]], batch_size: Optional[int] = None
+) -> Iterator[Dict[str, int]]:
+    """
+    Inserts records in batches (one transaction each, so an interrupted import keeps its
+    progress and a re-run skips what is already there), yielding running counts after
+    each batch: records read, imported, updated (daily totals that changed since an
+    earlier import), duplicates (already imported) and invalid.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_ROWS
+    progress = {"records": 0, "imported": 0, "updated": 0, "duplicates": 0, "invalid": 0}
+    batch: List[Dict[str, Any]] = []
+
+    def flush() -> None:
+        inserted, updated = crud.health_entry.import_entries(db, owner_id=owner_id, records=batch)
+        progress["imported"] += inserted
+        progress["updated"] += updated
+        progress["duplicates"] += len(batch) - inserted - updated
+        batch.clear()
+
+    for record in records:
+        progress["records"] += 1
+        if record is None:
+            progress["invalid"] += 1
+            continue
+        batch.append(record)
+        if len(batch) >= batch_size:
+            flush()
+            yield dict(progress)
+    if batch:
+        flush()
+    logger.info(f"Imported health data for user {owner_id}: {progress}")
+    yield dict(progress)
+
+
+def import_export_file(
+    db: Session, *, owner_id: int, export: Union[str, BinaryIO], source: str, batch_size: Optional[int] = None
+) -> Iterator[Dict[str, int]]:
+    """Streams an export file (path or binary file) into the owner's entries; see import_records."""
+    parsers = {"apple_health": iter_apple_health_records, "google_fit": iter_google_fit_records}
+    with open_export(export, source) as stream:
+        yield from import_records(db, owner_id=owner_id, records=parsers[source](stream), batch_size=batch_size)
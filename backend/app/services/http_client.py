@@ -0,0 +1,185 @@
+import logging
+import random
+import threading
+import time
+from typing import Optional, Dict, Any, Callable, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.services.resilience import Deadline, DeadlineExceededError, call_timeout
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller runs the function,
+    later callers wait for and share its result (or exception) instead of repeating it.
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result: Any = None
+            self.error: Optional[BaseException] = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, "SingleFlight._Call"] = {}
+        self._counters = {"calls": 0, "executed": 0, "coalesced": 0}
+
+    def do(self, key: str, fn: Callable[[], T], deadline: Optional[Deadline] = None) -> T:
+        with self._lock:
+            self._counters["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+                self._counters["executed"] += 1
+            else:
+                self._counters["coalesced"] += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+            return call.result
+
+        # Follower: wait for the leader, but not past our own deadline
+        if not call.done.wait(deadline.remaining() if deadline else None):
+            raise DeadlineExceededError(f"Request deadline exceeded waiting for in-flight call '{key}'")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            in_flight = len(self._calls)
+        return {
+            **counters,
+            "in_flight": in_flight,
+            "coalescing_rate": (counters["coalesced"] / counters["calls"]) if counters["calls"] else None,
+        }
+
+
+class PooledHttpClient:
+    """
+    Shared keep-alive requests.Session for one upstream API, with a bounded connection
+    pool and jittered exponential-backoff retries on 429/5xx and connection errors.
+
+    Retries are done here rather than by urllib3 so each attempt's timeout and each
+    backoff sleep are fitted into the caller's request deadline.
+    """
+
+    def __init__(self, name: str, pool_maxsize: int, max_retries: int,
+                 backoff_base_seconds: float, backoff_max_seconds: float):
+        self.name = name
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base_seconds
+        self._backoff_max = backoff_max_seconds
+        self._session = requests.Session()
+        # Concurrency is bounded upstream (ENRICHMENT_MAX_WORKERS); the pool keeps up to
+        # pool_maxsize connections alive per host and discards extras instead of blocking
+        self._adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+        self._session.mount("https://", self._adapter)
+        self._session.mount("http://", self._adapter)
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "retries": 0, "failed_calls": 0}
+        self._retries_by_reason: Dict[str, int] = {}
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """Full-jitter exponential backoff; a Retry-After header (in seconds) sets the floor."""
+        delay = random.uniform(0, min(self._backoff_max, self._backoff_base * 2 ** attempt))
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), self._backoff_max))
+        return delay
+
+    def _note_failure(self) -> None:
+        with self._lock:
+            self._counters["failed_calls"] += 1
+
+    def _note_retry(self, reason: str) -> None:
+        with self._lock:
+            self._counters["retries"] += 1
+            self._retries_by_reason[reason] = self._retries_by_reason.get(reason, 0) + 1
+
+    def get(self, url: str, *, params: Optional[Dict[str, Any]] = None, deadline: Optional[Deadline] = None,
+            timeout_cap: float, min_budget: float = 0.0) -> requests.Response:
+        """
+        GET with retries. Returns the last response (callers check its status) or raises
+        the last requests.RequestException / DeadlineExceededError.
+        """
+        with self._lock:
+            self._counters["calls"] += 1
+        attempt = 0
+        while True:
+            timeout = call_timeout(deadline, timeout_cap, min_budget)
+            response = None
+            try:
+                response = self._session.get(url, params=params, timeout=timeout)
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                if attempt >= self._max_retries:
+                    self._note_failure()
+                    return response
+                reason = str(response.status_code)
+            except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+                if attempt >= self._max_retries:
+                    self._note_failure()
+                    raise
+                reason = type(e).__name__
+            except requests.exceptions.RequestException:
+                # e.g. a read timeout: the attempt already used its share of the deadline
+                self._note_failure()
+                raise
+
+            delay = self._backoff(attempt, response)
+            if deadline is not None and deadline.remaining() < delay + min_budget:
+                # No time for another attempt; hand back what we have
+                self._note_failure()
+                if response is not None:
+                    return response
+                raise DeadlineExceededError(f"No time left to retry {self.name} request ({reason})")
+            if response is not None:
+                response.close() # Return the connection to the pool
+            self._note_retry(reason)
+            logger.info(f"Retrying {self.name} request in {delay:.2f}s after {reason} (attempt {attempt + 1}/{self._max_retries})")
+            time.sleep(delay)
+            attempt += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Request counters plus connection reuse, read from the urllib3 pools."""
+        requests_sent = new_connections = 0
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                requests_sent += pool.num_requests
+                new_connections += pool.num_connections
+        with self._lock:
+            counters = dict(self._counters)
+            reasons = dict(self._retries_by_reason)
+        return {
+            "name": self.name,
+            **counters,
+            "retries_by_reason": reasons,
+            "requests_sent": requests_sent,
+            "new_connections": new_connections,
+            # Share of requests sent on an already-open (kept-alive) connection
+            "connection_reuse_rate": (1 - new_connections / requests_sent) if requests_sent else None,
+            "pool_maxsize": self._adapter._pool_maxsize,
+        }
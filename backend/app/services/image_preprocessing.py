@@ -0,0 +1,141 @@
+import asyncio
+import io
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Dict, Any, Tuple
+
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+
+try:
+    from pillow_heif import register_heif_opener
+except ImportError: # Optional: without it HEIC/HEIF uploads cannot be decoded and are rejected
+    register_heif_opener = None
+else:
+    register_heif_opener()
+
+logger = logging.getLogger(__name__)
+
+# Enough bytes to identify every format we accept
+IMAGE_HEADER_BYTES = 32
+
+_HEIF_BRANDS = {b"heic", b"heix", b"hevc", b"hevx", b"heim", b"heis", b"mif1", b"msf1"}
+
+
+class ImagePreprocessingError(Exception):
+    """The upload could not be decoded, so it cannot be re-encoded without its metadata."""
+
+
+class ImagePreprocessingUnavailable(ImagePreprocessingError):
+    """A preprocessing worker died (e.g. OOM-killed on a huge image); the pool is rebuilt on the next call."""
+
+
+def sniff_image_type(header: bytes) -> Optional[str]:
+    """Identifies an image MIME type from its first bytes, without decoding the image."""
+    if header.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    if header[4:8] == b"ftyp" and header[8:12] in _HEIF_BRANDS:
+        return "image/heic" if header[8:12].startswith(b"he") else "image/heif"
+    return None
+
+
+def _downscale_and_recompress(data: bytes, max_edge: int, quality: int) -> Tuple[bytes, int, int]:
+    """
+    CPU-bound Pillow work, run in a worker process: applies the EXIF orientation,
+    fits the image within max_edge, and re-encodes it as JPEG without EXIF/metadata.
+    """
+    with Image.open(io.BytesIO(data)) as img:
+        img.draft("RGB", (max_edge, max_edge)) # Lets JPEG decode at reduced scale; must precede any load
+        img = ImageOps.exif_transpose(img)
+        if img.mode in ("RGBA", "LA", "P"):
+            img = img.convert("RGBA")
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[-1])
+            img = background
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+        img.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+        out = io.BytesIO()
+        # No exif= argument, so no EXIF (GPS, device info) is written
+        img.save(out, format="JPEG", quality=quality, optimize=True)
+        return out.getvalue(), img.width, img.height
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: workers must not inherit the server's threads, sockets or DB connections
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_PREPROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def _discard_executor(executor: ProcessPoolExecutor) -> None:
+    """Drops a broken pool so the next call starts fresh workers, unless another call already replaced it."""
+    global _executor
+    if _executor is executor:
+        _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def preprocess_image(data: bytes, mime_type: str) -> Dict[str, Any]:
+    """
+    Downscales/recompresses an uploaded image off the event loop before it is sent
+    to the model. Returns the bytes and MIME type to use plus size/timing stats.
+    The re-encoded JPEG is always used, even when it is larger than the upload, as it
+    is the copy without EXIF (GPS location, device). Raises ImagePreprocessingError if
+    Pillow cannot decode the image (e.g. HEIC without pillow-heif installed), and
+    ImagePreprocessingUnavailable if the worker process died while handling it.
+    """
+    start = time.perf_counter()
+    executor = _get_executor()
+    try:
+        loop = asyncio.get_running_loop()
+        processed, width, height = await loop.run_in_executor(
+            executor,
+            _downscale_and_recompress,
+            data, settings.IMAGE_MAX_EDGE_PX, settings.IMAGE_JPEG_QUALITY,
+        )
+    except BrokenProcessPool as e:
+        logger.error(f"Image preprocessing worker died ({mime_type}, {len(data)} bytes); restarting the pool: {e}")
+        _discard_executor(executor)
+        raise ImagePreprocessingUnavailable("Image preprocessing is temporarily unavailable.") from e
+    except (OSError, ValueError, Image.DecompressionBombError) as e: # UnidentifiedImageError is an OSError
+        logger.warning(f"Could not decode uploaded image ({mime_type}, {len(data)} bytes): {e}")
+        raise ImagePreprocessingError(f"Could not decode the {mime_type} image.") from e
+    result: Dict[str, Any] = {
+        "data": processed,
+        "mime_type": "image/jpeg",
+        "original_bytes": len(data),
+        "width": width,
+        "height": height,
+    }
+    result["processed_bytes"] = len(result["data"])
+    result["preprocess_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    logger.info(
+        f"Image preprocessed: {result['original_bytes']} -> {result['processed_bytes']} bytes "
+        f"({result['mime_type']}) in {result['preprocess_ms']} ms"
+    )
+    return result
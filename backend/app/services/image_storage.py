@@ -1,7 +1,6 @@
 # backend/app/services/image_storage.py
 import os
 import uuid
-from fastapi import UploadFile
 import logging
 from typing import Optional
 
@@ -12,32 +11,35 @@ UPLOAD_DIR = "static/uploads"
 # Ensure this directory exists relative to where you run uvicorn
 os.makedirs(UPLOAD_DIR, exist_ok=True) 
 
-def save_upload_file(upload_file: UploadFile) -> Optional[str]:
-    """Saves uploaded file to local dir and returns its URL path."""
+_MIME_EXTENSIONS = {
+    "image/jpeg": ".jpg", "image/png": ".png", "image/gif": ".gif",
+    "image/webp": ".webp", "image/heic": ".heic", "image/heif": ".heif",
+}
+
+def save_image_bytes(data: bytes, mime_type: str) -> Optional[str]:
+    """Saves (preprocessed) image bytes to local dir and returns its URL path."""
+    ext = _MIME_EXTENSIONS.get(mime_type)
+    if not ext:
+        logger.warning(f"Attempted to save unsupported image type: {mime_type}")
+        return None
     try:
-        # Create unique filename
-        # Ensure filename is secure, avoid path traversal (though uuid helps)
-        ext = os.path.splitext(upload_file.filename)[1]
-        # Basic validation for common image extensions
-        if ext.lower() not in ['.png', '.jpg', '.jpeg', '.gif', '.webp']:
-             logger.warning(f"Attempted to upload non-image file extension: {ext}")
-             return None # Or raise an error
-        
         filename = f"{uuid.uuid4()}{ext}"
         file_path = os.path.join(UPLOAD_DIR, filename)
-
-        # Read the file content safely
-        # Consider adding size limit checks here before reading
-        # content = await upload_file.read() # Use await if function is async
-        content = upload_file.file.read()
-        
         with open(file_path, "wb") as buffer:
-            buffer.write(content)
-        
-        # Return URL path relative to static mount
-        url_path = f"/static/uploads/{filename}" 
-        logger.info(f"Image saved locally to {file_path}, URL path: {url_path}")
+            buffer.write(data)
+        url_path = f"/static/uploads/{filename}"
+        logger.info(f"Image saved locally to {file_path} ({len(data)} bytes), URL path: {url_path}")
         return url_path
     except Exception as e:
-        logger.error(f"Failed to save upload file {upload_file.filename}: {e}", exc_info=True)
-        return None 
\ No newline at end of file
+        logger.error(f"Failed to save image bytes ({mime_type}): {e}", exc_info=True)
+        return None
+
+def read_image_bytes(url_path: str) -> Optional[bytes]:
+    """Reads back an image saved by this module, given its URL path."""
+    file_path = os.path.join(UPLOAD_DIR, os.path.basename(url_path))
+    try:
+        with open(file_path, "rb") as f:
+            return f.read()
+    except OSError as e:
+        logger.error(f"Failed to read stored image {file_path}: {e}")
+        return None
@@ -0,0 +1,99 @@
+import logging
+import statistics
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, List
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_LATENCY_SAMPLES = 1000 # Per tier, for percentiles
+
+
+def _percentile(samples: List[float], pct: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct))], 1)
+
+
+class TierMetrics:
+    """
+    Per-model counters for the parse cascade: calls, errors, latency, tokens,
+    estimated cost, and how often (and why) a tier's result was escalated.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tiers: Dict[str, Dict[str, Any]] = {}
+
+    def _tier(self, model_name: str) -> Dict[str, Any]:
+        tier = self._tiers.get(model_name)
+        if tier is None:
+            tier = {
+                "calls": 0, "errors": 0, "accepted": 0, "escalations": 0, "escalation_reasons": {},
+                "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0,
+                "latencies_ms": deque(maxlen=_LATENCY_SAMPLES),
+            }
+            self._tiers[model_name] = tier
+        return tier
+
+    def record_call(self, model_name: str, latency_ms: float, usage: Any = None, error: bool = False) -> None:
+        input_tokens = getattr(usage, "prompt_token_count", 0) or 0
+        output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+        input_rate, output_rate = settings.LLM_TIER_COSTS_PER_MTOK.get(model_name, (0.0, 0.0))
+        with self._lock:
+            tier = self._tier(model_name)
+            tier["calls"] += 1
+            tier["errors"] += int(error)
+            tier["latencies_ms"].append(latency_ms)
+            tier["input_tokens"] += input_tokens
+            tier["output_tokens"] += output_tokens
+            tier["cost_usd"] += (input_tokens * input_rate + output_tokens * output_rate) / 1_000_000
+
+    def record_accepted(self, model_name: str, count: int = 1) -> None:
+        """A result from this tier was used (a batch call can produce several)."""
+        with self._lock:
+            self._tier(model_name)["accepted"] += count
+
+    def record_escalation(self, model_name: str, reason: str) -> None:
+        with self._lock:
+            tier = self._tier(model_name)
+            tier["escalations"] += 1
+            tier["escalation_reasons"][reason] = tier["escalation_reasons"].get(reason, 0) + 1
+        logger.info(f"Escalating parse from {model_name}: {reason}")
+
+    def snapshot(self, tiers: List[str]) -> List[Dict[str, Any]]:
+        """Stats for the configured tiers (in cascade order), then any other models seen."""
+        with self._lock:
+            names = list(tiers) + [name for name in self._tiers if name not in tiers]
+            result = []
+            for position, name in enumerate(names):
+                tier = self._tier(name)
+                latencies = list(tier["latencies_ms"])
+                outcomes = tier["accepted"] + tier["escalations"]
+                result.append({
+                    "model": name,
+                    "tier": position if name in tiers else None,
+                    "calls": tier["calls"],
+                    "errors": tier["errors"],
+                    "accepted": tier["accepted"],
+                    "escalations": tier["escalations"],
+                    # Share of this tier's parse results sent on to a stronger tier
+                    "escalation_rate": round(tier["escalations"] / outcomes, 4) if outcomes else None,
+                    "escalation_reasons": dict(tier["escalation_reasons"]),
+                    "latency_p50_ms": round(statistics.median(latencies), 1) if latencies else None,
+                    "latency_p95_ms": _percentile(latencies, 0.95),
+                    "input_tokens": tier["input_tokens"],
+                    "output_tokens": tier["output_tokens"],
+                    "cost_usd": round(tier["cost_usd"], 6),
+                })
+            return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._tiers.clear()
+
+
+tier_metrics = TierMetrics()
@@ -1,17 +1,28 @@
 import google.generativeai as genai
+import asyncio
 import os
-from typing import Optional, Dict, Any
+import threading
+import time as time_module
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
 import json
 import logging # Import logging
+import re
 from app.core.config import settings
-import io
-from PIL import Image # Need Pillow installed (pip install Pillow)
+from app.services.image_preprocessing import IMAGE_HEADER_BYTES, sniff_image_type
+from app.services.resilience import Deadline, DependencyUnavailableError, call_timeout, gemini_breaker
+from app.services.llm_metrics import tier_metrics
 
 logger = logging.getLogger(__name__) # Get logger
 
 # Configure the Gemini API client
 genai.configure(api_key=settings.GOOGLE_API_KEY)
 
+# Model used when no cascade tiers are configured (settings.LLM_MODEL_TIERS)
+LLM_MODEL_NAME = 'gemini-2.0-flash-exp'
+# Bump whenever PROMPT_INSTRUCTION changes so cached parse results are invalidated
+PROMPT_VERSION = "3"
+
 # Define the generation config and safety settings (adjust as needed)
 generation_config = {
 "temperature": 0.3,
@@ -27,6 +38,18 @@ safety_settings = [
     {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
 ]
 
+def model_tiers() -> List[str]:
+    """The parse cascade, cheapest/fastest model first."""
+    return list(settings.LLM_MODEL_TIERS) or [LLM_MODEL_NAME]
+
+def cascade_signature() -> str:
+    """Identifies the cascade configuration (models + escalation rules) for parse-cache keys."""
+    rules = f"conf<{settings.LLM_ESCALATION_MIN_CONFIDENCE};types={','.join(sorted(settings.LLM_ESCALATE_ON_TYPES))}"
+    return f"{'>'.join(model_tiers())}|{rules}"
+
+# Types the prompt asks to summarize rather than extract values from
+SUMMARY_ENTRY_TYPES = ('exercise', 'medication', 'symptom', 'note')
+
 def _validate_parsed_data(parsed_json: Dict[str, Any]) -> bool:
     """Basic validation for expected keys based on type."""
     entry_type = parsed_json.get('type')
@@ -56,7 +79,7 @@ def _validate_parsed_data(parsed_json: Dict[str, Any]) -> bool:
             logger.warning(f"Steps entry parsed JSON missing value: {parsed_json}")
             return False
         
-    elif entry_type == 'unknown' or entry_type == 'error':
+    elif entry_type in SUMMARY_ENTRY_TYPES or entry_type == 'unknown' or entry_type == 'error':
         pass # Allow these types through
         
     else:
@@ -87,17 +110,8 @@ def _parse_llm_response_to_dict(response_text: str) -> Dict[str, Any]:
         logger.error(f"Unexpected error parsing LLM response: {e}", exc_info=True)
         return {"type": "error", "error_detail": "Unexpected error parsing LLM response", "raw_response": response_text}
 
-def parse_health_entry_text(text: Optional[str], image_data: Optional[bytes] = None) -> Dict[str, Any]:
-    """Parses health entry text and/or image using the appropriate Gemini model."""
-    
-    logger.info(f"Parsing health entry. Text provided: {bool(text)}. Image data provided: {bool(image_data)}")
-
-    if not text and not image_data:
-        logger.warning("parse_health_entry_text called with no text and no image data.")
-        return {"type": "error", "error_detail": "No text or image provided for parsing"}
-
-    # Define the base prompt structure (adjust as needed)
-    prompt_instruction = """
+# Define the base prompt structure (adjust as needed)
+PROMPT_INSTRUCTION = """
     Analyze the following health log entry (text and/or image).
     Identify the type of entry (e.g., 'food', 'weight', 'steps', 'exercise', 'medication', 'symptom', 'note').
     Extract key information relevant to the type.
@@ -105,11 +119,13 @@ def parse_health_entry_text(text: Optional[str], image_data: Optional[bytes] = N
     For 'weight', extract value and unit (prefer kg).
     For 'steps', extract value.
     For others, provide a brief summary.
+    Always include a top-level "confidence" between 0 and 1: how sure you are of the type and the extracted values.
     Return the result ONLY as a JSON object within ```json ... ``` tags.
     Example Food Output:
     ```json
     {
       "type": "food",
+      "confidence": 0.9,
       "parsed_data": {
         "items": [
           {"item": "Apple", "quantity": 1, "unit": "piece", "calories": 95, "protein_g": 0.5, "carbs_g": 25, "fat_g": 0.3},
@@ -126,6 +142,7 @@ def parse_health_entry_text(text: Optional[str], image_data: Optional[bytes] = N
     ```json
     {
       "type": "weight",
+      "confidence": 0.95,
       "value": 75.5,
       "unit": "kg",
       "parsed_data": { "original_text": "Weight 75.5 kg" }
@@ -133,38 +150,228 @@ def parse_health_entry_text(text: Optional[str], image_data: Optional[bytes] = N
     ```
     If the input cannot be reliably parsed, return:
     ```json
-    { "type": "unknown", "parsed_data": { "original_text": "..." } }
+    { "type": "unknown", "confidence": 0.2, "parsed_data": { "original_text": "..." } }
     ```
     """
 
+# Limits how many Gemini calls a single worker keeps in flight on the async path.
+# Created lazily so it binds to the running event loop.
+_llm_semaphore: Optional[asyncio.Semaphore] = None
+
+def _get_llm_semaphore() -> asyncio.Semaphore:
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENT_CALLS)
+    return _llm_semaphore
+
+# --- Reusable model clients ---
+# One GenerativeModel per model name per process. PROMPT_INSTRUCTION is attached
+# once as cached content (or as the system instruction when caching is unavailable)
+# instead of being re-sent in every request's contents.
+_models: Dict[str, genai.GenerativeModel] = {}
+_model_expiry: Dict[str, Optional[datetime]] = {}
+_models_lock = threading.Lock()
+
+def _create_model(model_name: str) -> Tuple[genai.GenerativeModel, Optional[datetime]]:
+    ttl_minutes = settings.LLM_PROMPT_CACHE_TTL_MINUTES
+    if ttl_minutes > 0:
+        try:
+            cached_prompt = genai.caching.CachedContent.create(
+                model=f"models/{model_name}",
+                display_name=f"health-entry-prompt-v{PROMPT_VERSION}",
+                system_instruction=PROMPT_INSTRUCTION,
+                ttl=timedelta(minutes=ttl_minutes),
+            )
+            model = genai.GenerativeModel.from_cached_content(
+                cached_prompt,
+                generation_config=generation_config,
+                safety_settings=safety_settings
+            )
+            logger.info(f"Created Gemini client for {model_name} with cached prompt prefix ({cached_prompt.name}).")
+            # Rebuild a little before the cache expires server-side
+            return model, datetime.now(timezone.utc) + timedelta(minutes=ttl_minutes) - timedelta(minutes=1)
+        except Exception as e:
+            # e.g. the prompt is below the model's minimum cacheable token count
+            logger.warning(f"Prompt caching unavailable for {model_name}, using system instruction instead: {e}")
+
+    model = genai.GenerativeModel(
+        model_name,
+        generation_config=generation_config,
+        safety_settings=safety_settings,
+        system_instruction=PROMPT_INSTRUCTION
+    )
+    logger.info(f"Created Gemini client for {model_name} with system instruction.")
+    return model, None
+
+def _get_model(model_name: str = LLM_MODEL_NAME) -> genai.GenerativeModel:
+    """Returns the process-wide client for model_name, building it on first use."""
+    with _models_lock:
+        model = _models.get(model_name)
+        expires_at = _model_expiry.get(model_name)
+        if model is None or (expires_at is not None and datetime.now(timezone.utc) >= expires_at):
+            model, expires_at = _create_model(model_name)
+            _models[model_name] = model
+            _model_expiry[model_name] = expires_at
+        return model
+
+def warm_up_llm_clients() -> None:
+    """
+    Builds the model clients and makes a cheap count_tokens call so the channel,
+    auth and prompt cache are ready before the first user request.
+    """
+    if settings.GOOGLE_API_KEY == "YOUR_GOOGLE_API_KEY":
+        logger.warning("Skipping LLM warm-up: GOOGLE_API_KEY is not configured.")
+        return
+    for model_name in model_tiers():
+        start = time_module.perf_counter()
+        try:
+            _get_model(model_name).count_tokens("warm-up")
+            logger.info(f"LLM client warm-up for {model_name} completed in {(time_module.perf_counter() - start) * 1000:.0f} ms.")
+        except Exception as e:
+            logger.warning(f"LLM client warm-up for {model_name} failed (will retry lazily on first request): {e}")
+
+def _build_image_part(image_data: bytes) -> Dict[str, Any]:
+    """Validates image bytes and returns the inline-data prompt part for Gemini."""
+    # Only the header is inspected; uploads are already downscaled/re-encoded by image_preprocessing
+    mime_type = sniff_image_type(image_data[:IMAGE_HEADER_BYTES])
+    # Gemini supports PNG, JPEG, WEBP, HEIC, HEIF
+    if not mime_type or mime_type == "image/gif":
+        raise ValueError(f"Unsupported image format: {mime_type or 'unknown'}")
+    logger.debug(f"Detected image format: {mime_type} ({len(image_data)} bytes)")
+    return {"mime_type": mime_type, "data": image_data}
+
+def _build_prompt_parts(text: Optional[str], image_data: Optional[bytes] = None) -> List[Any]:
+    # PROMPT_INSTRUCTION is carried by the model client (cached content / system instruction)
+    prompt_parts: List[Any] = []
+    if text:
+        prompt_parts.append(text)
+    if image_data:
+        prompt_parts.append(_build_image_part(image_data))
+    return prompt_parts
+
+def _generate(prompt_parts: List[Any], deadline: Optional[Deadline] = None, model_name: str = LLM_MODEL_NAME):
+    """One Gemini call behind the circuit breaker, with the timeout capped by the request deadline."""
+    timeout = call_timeout(deadline, settings.LLM_CALL_TIMEOUT_SECONDS)
+    start = time_module.perf_counter()
+    try:
+        with gemini_breaker.guard():
+            response = _get_model(model_name).generate_content(prompt_parts, request_options={"timeout": timeout})
+    except DependencyUnavailableError:
+        raise # Not attempted; not a tier call
+    except Exception:
+        tier_metrics.record_call(model_name, (time_module.perf_counter() - start) * 1000, error=True)
+        raise
+    tier_metrics.record_call(model_name, (time_module.perf_counter() - start) * 1000, getattr(response, "usage_metadata", None))
+    return response
+
+async def _generate_async(prompt_parts: List[Any], deadline: Optional[Deadline] = None, model_name: str = LLM_MODEL_NAME):
+    """Async counterpart of _generate. Call it after acquiring the LLM semaphore so queueing counts against the deadline."""
+    timeout = call_timeout(deadline, settings.LLM_CALL_TIMEOUT_SECONDS)
+    start = time_module.perf_counter()
+    try:
+        with gemini_breaker.guard():
+            response = await _get_model(model_name).generate_content_async(prompt_parts, request_options={"timeout": timeout})
+    except DependencyUnavailableError:
+        raise
+    except Exception:
+        tier_metrics.record_call(model_name, (time_module.perf_counter() - start) * 1000, error=True)
+        raise
+    tier_metrics.record_call(model_name, (time_module.perf_counter() - start) * 1000, getattr(response, "usage_metadata", None))
+    return response
+
+# --- Model Cascade ---
+
+def _escalation_reason(parsed: Dict[str, Any]) -> Optional[str]:
+    """Why a tier's result should go to a stronger model, or None if it can be used."""
+    entry_type = parsed.get("type")
+    if entry_type == "error":
+        return "error"
+    if not _validate_parsed_data(parsed):
+        return "invalid"
+    if entry_type in settings.LLM_ESCALATE_ON_TYPES:
+        return f"type_{entry_type}"
+    confidence = parsed.get("confidence")
+    if isinstance(confidence, (int, float)) and confidence < settings.LLM_ESCALATION_MIN_CONFIDENCE:
+        return "low_confidence"
+    return None
+
+def _run_cascade(prompt_parts: List[Any], deadline: Optional[Deadline] = None, start_tier: int = 0) -> Dict[str, Any]:
+    """
+    Sends the prompt to each tier in turn, starting at start_tier, until a result needs no
+    escalation. The last tier's result is returned as is. Raises if the last tier's call fails.
+    """
+    tiers = model_tiers()
+    start_tier = min(start_tier, len(tiers) - 1)
+    parsed: Optional[Dict[str, Any]] = None
+    for index in range(start_tier, len(tiers)):
+        model_name, is_last = tiers[index], index == len(tiers) - 1
+        try:
+            response = _generate(prompt_parts, deadline, model_name)
+        except DependencyUnavailableError:
+            if parsed is not None:
+                return parsed # Out of budget/breaker open: keep the weaker tier's answer
+            raise
+        except Exception as e:
+            if is_last or not settings.LLM_ESCALATE_ON_API_ERROR:
+                raise
+            logger.warning(f"LLM tier {model_name} failed, escalating: {e}")
+            tier_metrics.record_escalation(model_name, "api_error")
+            continue
+        parsed = _parse_llm_response_to_dict(response.text)
+        reason = _escalation_reason(parsed)
+        if reason is None or is_last:
+            logger.info(f"LLM tier {model_name} result accepted (type: {parsed.get('type')}).")
+            tier_metrics.record_accepted(model_name)
+            return parsed
+        tier_metrics.record_escalation(model_name, reason)
+    return parsed
+
+async def _run_cascade_async(prompt_parts: List[Any], deadline: Optional[Deadline] = None, start_tier: int = 0) -> Dict[str, Any]:
+    """Async counterpart of _run_cascade."""
+    tiers = model_tiers()
+    start_tier = min(start_tier, len(tiers) - 1)
+    parsed: Optional[Dict[str, Any]] = None
+    for index in range(start_tier, len(tiers)):
+        model_name, is_last = tiers[index], index == len(tiers) - 1
+        try:
+            response = await _generate_async(prompt_parts, deadline, model_name)
+        except DependencyUnavailableError:
+            if parsed is not None:
+                return parsed
+            raise
+        except Exception as e:
+            if is_last or not settings.LLM_ESCALATE_ON_API_ERROR:
+                raise
+            logger.warning(f"LLM tier {model_name} failed, escalating: {e}")
+            tier_metrics.record_escalation(model_name, "api_error")
+            continue
+        parsed = _parse_llm_response_to_dict(response.text)
+        reason = _escalation_reason(parsed)
+        if reason is None or is_last:
+            logger.info(f"LLM tier {model_name} result accepted (type: {parsed.get('type')}).")
+            tier_metrics.record_accepted(model_name)
+            return parsed
+        tier_metrics.record_escalation(model_name, reason)
+    return parsed
+
+def parse_health_entry_text(
+    text: Optional[str], image_data: Optional[bytes] = None, deadline: Optional[Deadline] = None
+) -> Dict[str, Any]:
+    """Parses health entry text and/or image using the appropriate Gemini model."""
+    
+    logger.info(f"Parsing health entry. Text provided: {bool(text)}. Image data provided: {bool(image_data)}")
+
+    if not text and not image_data:
+        logger.warning("parse_health_entry_text called with no text and no image data.")
+        return {"type": "error", "error_detail": "No text or image provided for parsing"}
+
     try:
         if image_data:
             logger.debug("Image data provided, attempting multi-modal parsing.")
             try:
-                # Attempt to open image to validate and get format
-                img = Image.open(io.BytesIO(image_data))
-                # Gemini supports PNG, JPEG, WEBP, HEIC, HEIF
-                mime_type = Image.MIME.get(img.format)
-                if not mime_type or not mime_type.startswith('image/'):
-                    raise ValueError(f"Unsupported image format: {img.format}")
-                logger.debug(f"Detected image format: {img.format} ({mime_type})")
-
-                # --- Use gemini-1.5-pro-latest for multi-modal --- 
-                vision_model = genai.GenerativeModel(
-                    'gemini-2.0-flash-exp', 
-                    generation_config=generation_config,
-                    safety_settings=safety_settings
-                )
-                prompt_parts = [prompt_instruction]
-                if text:
-                    prompt_parts.append(text)
-                prompt_parts.append({"mime_type": mime_type, "data": image_data})
-                
-                response = vision_model.generate_content(prompt_parts)
-                # --- End model usage change ---
-                
+                parsed = _run_cascade(_build_prompt_parts(text, image_data), deadline)
                 logger.info("Multi-modal LLM call successful.")
-                return _parse_llm_response_to_dict(response.text)
+                return parsed
 
             except Exception as img_e:
                 logger.error(f"Multi-modal LLM attempt failed (image error or API call): {img_e}", exc_info=True)
@@ -180,18 +387,9 @@ def parse_health_entry_text(text: Optional[str], image_data: Optional[bytes] = N
         # This block executes if image_data is None OR if image processing failed and we fell back
         if text:
             logger.debug("Using text-only parsing.")
-            # --- Use gemini-1.5-flash for text-only --- 
-            text_model = genai.GenerativeModel(
-                'gemini-2.0-flash-exp',
-                generation_config=generation_config,
-                safety_settings=safety_settings
-            ) 
-            prompt_parts = [prompt_instruction, text]
-            response = text_model.generate_content(prompt_parts)
-            # --- End model usage change ---
-            
+            parsed = _run_cascade(_build_prompt_parts(text), deadline)
             logger.info("Text-only LLM call successful.")
-            return _parse_llm_response_to_dict(response.text)
+            return parsed
         else:
             # This case should theoretically not be reached if the initial check passed,
             # but included for robustness.
@@ -203,6 +401,244 @@ def parse_health_entry_text(text: Optional[str], image_data: Optional[bytes] = N
         logger.error(f"LLM parsing failed: {e}", exc_info=True)
         return {"type": "error", "error_detail": str(e), "raw_response": None}
 
+async def parse_health_entry_text_async(
+    text: Optional[str], image_data: Optional[bytes] = None, deadline: Optional[Deadline] = None,
+    start_tier: int = 0
+) -> Dict[str, Any]:
+    """
+    Async counterpart of parse_health_entry_text using generate_content_async,
+    so a parse never blocks the event loop. Cancelling the awaiting task
+    (e.g. on client disconnect) cancels the in-flight Gemini call.
+    start_tier skips cheaper cascade tiers (used when a batch result was already escalated).
+    """
+    logger.info(f"Parsing health entry (async). Text provided: {bool(text)}. Image data provided: {bool(image_data)}")
+
+    if not text and not image_data:
+        logger.warning("parse_health_entry_text_async called with no text and no image data.")
+        return {"type": "error", "error_detail": "No text or image provided for parsing"}
+
+    async with _get_llm_semaphore():
+        try:
+            if image_data:
+                logger.debug("Image data provided, attempting multi-modal parsing.")
+                try:
+                    parsed = await _run_cascade_async(_build_prompt_parts(text, image_data), deadline, start_tier)
+                    logger.info("Multi-modal LLM call successful.")
+                    return parsed
+                except Exception as img_e:
+                    logger.error(f"Multi-modal LLM attempt failed (image error or API call): {img_e}", exc_info=True)
+                    if not text:
+                        return {"type": "error", "error_detail": f"Image processing failed: {img_e}"}
+                    logger.warning("Falling back to text-only parsing due to image processing/API error.")
+
+            logger.debug("Using text-only parsing.")
+            parsed = await _run_cascade_async(_build_prompt_parts(text), deadline, start_tier)
+            logger.info("Text-only LLM call successful.")
+            return parsed
+
+        except Exception as e:
+            # CancelledError is a BaseException, so a cancelled call propagates past this handler
+            logger.error(f"LLM parsing failed: {e}", exc_info=True)
+            return {"type": "error", "error_detail": str(e), "raw_response": None}
+
+async def stream_health_entry_text_async(
+    text: Optional[str], image_data: Optional[bytes] = None, deadline: Optional[Deadline] = None
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Streaming variant of parse_health_entry_text_async. Yields ("chunk", text_delta)
+    as the first cascade tier generates, ("escalate", {"model", "reason"}) if its result is
+    re-parsed (non-streamed) by stronger tiers, then exactly one ("result", parsed_dict).
+    """
+    logger.info(f"Streaming parse of health entry. Text provided: {bool(text)}. Image data provided: {bool(image_data)}")
+
+    if not text and not image_data:
+        yield "result", {"type": "error", "error_detail": "No text or image provided for parsing"}
+        return
+
+    tiers = model_tiers()
+    async with _get_llm_semaphore():
+        attempts = [(text, image_data)] if image_data else []
+        if text:
+            attempts.append((text, None)) # Text-only fallback if the multi-modal attempt fails before streaming
+        last_error: Optional[Exception] = None
+        for attempt_text, attempt_image in attempts:
+            chunks: List[str] = []
+            started: Optional[float] = None
+            try:
+                prompt_parts = _build_prompt_parts(attempt_text, attempt_image)
+                timeout = call_timeout(deadline, settings.LLM_CALL_TIMEOUT_SECONDS)
+                with gemini_breaker.guard():
+                    started = time_module.perf_counter()
+                    response = await _get_model(tiers[0]).generate_content_async(
+                        prompt_parts, stream=True, request_options={"timeout": timeout}
+                    )
+                    async for chunk in response:
+                        delta = chunk.text
+                        chunks.append(delta)
+                        yield "chunk", delta
+                tier_metrics.record_call(tiers[0], (time_module.perf_counter() - started) * 1000, getattr(response, "usage_metadata", None))
+            except Exception as e:
+                logger.error(f"Streaming LLM call failed (image: {bool(attempt_image)}): {e}", exc_info=True)
+                last_error = e
+                if started is not None and not isinstance(e, DependencyUnavailableError):
+                    tier_metrics.record_call(tiers[0], (time_module.perf_counter() - started) * 1000, error=True)
+                if chunks:
+                    break # Partial output was already sent; don't restart the stream
+                if started is not None and len(tiers) > 1 and settings.LLM_ESCALATE_ON_API_ERROR:
+                    tier_metrics.record_escalation(tiers[0], "api_error")
+                    yield "escalate", {"model": tiers[1], "reason": "api_error"}
+                    try:
+                        yield "result", await _run_cascade_async(prompt_parts, deadline, start_tier=1)
+                        return
+                    except Exception as escalated_e:
+                        last_error = escalated_e
+                continue
+            logger.info("Streaming LLM call successful.")
+            parsed = _parse_llm_response_to_dict("".join(chunks))
+            reason = _escalation_reason(parsed)
+            if reason is not None and len(tiers) > 1:
+                tier_metrics.record_escalation(tiers[0], reason)
+                yield "escalate", {"model": tiers[1], "reason": reason}
+                try:
+                    parsed = await _run_cascade_async(prompt_parts, deadline, start_tier=1)
+                except Exception as e:
+                    logger.error(f"Escalated parse failed, keeping the {tiers[0]} result: {e}")
+            else:
+                tier_metrics.record_accepted(tiers[0])
+            yield "result", parsed
+            return
+
+    yield "result", {"type": "error", "error_detail": str(last_error), "raw_response": None}
+
+# --- Batched Parsing ---
+
+BATCH_PROMPT_TEMPLATE = """
+    The input below contains {count} SEPARATE health log entries, each prefixed with its index in square brackets.
+    Parse each entry independently, exactly as you would a single entry.
+    For this request only, the output format differs from your instructions: instead of a single JSON object,
+    return ONLY a JSON array within ```json ... ``` tags containing one result object per entry,
+    in the same order, each with an extra "index" key holding the entry's index.
+    """
+
+# Rough output-token cost of one parsed entry, used to size batches against max_output_tokens
+_BATCH_TOKENS_PER_ENTRY = 60
+_BATCH_TOKENS_PER_FOOD_ITEM = 45
+_BATCH_ARRAY_OVERHEAD_TOKENS = 20
+_FOOD_ITEM_SEPARATORS = re.compile(r",|\band\b|\bwith\b|\+|;", re.IGNORECASE)
+
+def _estimate_output_tokens(text: str) -> int:
+    """Estimates how many output tokens the JSON result for one entry will take."""
+    item_count = len(_FOOD_ITEM_SEPARATORS.split(text))
+    return _BATCH_TOKENS_PER_ENTRY + _BATCH_TOKENS_PER_FOOD_ITEM * item_count
+
+def plan_entry_batches(texts: List[str], max_output_tokens: Optional[int] = None) -> List[List[int]]:
+    """
+    Greedily groups entry indices into batches whose estimated JSON output fits
+    in the model's output-token limit (with headroom), capped at LLM_BATCH_MAX_ENTRIES.
+    """
+    limit = max_output_tokens or generation_config["max_output_tokens"]
+    budget = int(limit * settings.LLM_BATCH_OUTPUT_HEADROOM) - _BATCH_ARRAY_OVERHEAD_TOKENS
+    batches: List[List[int]] = []
+    current: List[int] = []
+    used = 0
+    for i, text in enumerate(texts):
+        cost = _estimate_output_tokens(text)
+        if current and (used + cost > budget or len(current) >= settings.LLM_BATCH_MAX_ENTRIES):
+            batches.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def _parse_llm_response_to_list(response_text: str) -> Optional[List[Any]]:
+    """Extracts the JSON array from a batched LLM response, or None if it is malformed."""
+    json_start = response_text.find('```json')
+    json_end = response_text.rfind('```')
+    if json_start == -1 or json_end <= json_start:
+        logger.warning(f"Batched LLM response has no JSON block: {response_text[:100]}...")
+        return None
+    try:
+        parsed = json.loads(response_text[json_start + 7:json_end].strip())
+    except json.JSONDecodeError as e:
+        logger.error(f"JSON decode error parsing batched LLM response: {e}")
+        return None
+    return parsed if isinstance(parsed, list) else None
+
+def _build_batch_prompt(texts: List[str]) -> str:
+    lines = [BATCH_PROMPT_TEMPLATE.format(count=len(texts))]
+    lines.extend(f"[{i}] {text}" for i, text in enumerate(texts))
+    return "\n".join(lines)
+
+async def _parse_batch_async(
+    texts: List[str], deadline: Optional[Deadline] = None
+) -> List[Tuple[Optional[Dict[str, Any]], int]]:
+    """
+    One call to the first cascade tier for a batch; returns per-entry (result, retry tier):
+    the result is None where missing or needing escalation, and the tier an individual
+    retry should start at is 1 only for entries the first tier parsed but escalated.
+    """
+    results: List[Tuple[Optional[Dict[str, Any]], int]] = [(None, 0)] * len(texts)
+    model_name = model_tiers()[0]
+    async with _get_llm_semaphore():
+        try:
+            response = await _generate_async([_build_batch_prompt(texts)], deadline, model_name)
+        except Exception as e:
+            logger.error(f"Batched LLM call for {len(texts)} entries failed: {e}", exc_info=True)
+            return results # Nothing was parsed: retries start at the first tier again
+
+    parsed_list = _parse_llm_response_to_list(response.text)
+    if parsed_list is None:
+        return results
+    for position, parsed in enumerate(parsed_list):
+        if not isinstance(parsed, dict):
+            continue
+        index = parsed.pop("index", position)
+        if not isinstance(index, int) or not 0 <= index < len(texts):
+            logger.warning(f"Batched LLM result has out-of-range index {index!r}, skipping.")
+            continue
+        reason = _escalation_reason(parsed)
+        if reason is None:
+            results[index] = (parsed, 0)
+            tier_metrics.record_accepted(model_name)
+        else:
+            results[index] = (None, 1)
+            tier_metrics.record_escalation(model_name, reason)
+    return results
+
+async def parse_health_entry_texts_batch_async(texts: List[str], deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+    """
+    Parses many text entries with as few LLM calls as possible. Entries are packed
+    into batches sized to the output-token limit, batches run concurrently, and each
+    element of the returned JSON array is checked with the cascade's escalation rules.
+    Entries missing from a batch response (or from a failed batch call) are re-parsed
+    individually from the first cascade tier; entries needing escalation from the second.
+    Results are returned in input order.
+    """
+    if not texts:
+        return []
+    batches = plan_entry_batches(texts)
+    logger.info(f"Parsing {len(texts)} entries in {len(batches)} batched LLM call(s).")
+    batch_results = await asyncio.gather(*(_parse_batch_async([texts[i] for i in batch], deadline) for batch in batches))
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+    retry_tiers: Dict[int, int] = {}
+    for batch, batch_result in zip(batches, batch_results):
+        for i, (parsed, retry_tier) in zip(batch, batch_result):
+            results[i] = parsed
+            retry_tiers[i] = retry_tier
+
+    retry_indices = [i for i, parsed in enumerate(results) if parsed is None]
+    if retry_indices:
+        logger.warning(f"Re-parsing {len(retry_indices)} entries individually after batch failures.")
+        retried = await asyncio.gather(*(
+            parse_health_entry_text_async(texts[i], deadline=deadline, start_tier=retry_tiers[i]) for i in retry_indices
+        ))
+        for i, parsed in zip(retry_indices, retried):
+            results[i] = parsed
+    return results
+
 # Example usage (for testing):
 # if __name__ == "__main__":
 #     test_text = "Had 2 eggs and a slice of toast for breakfast, weight 81kg"
@@ -0,0 +1,108 @@
+import logging
+import re
+import time
+from typing import Optional, Dict, Any, List
+
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.db.session import engine
+from app.models.nutrition_product import NutritionProduct
+from app.services.name_matching import best_match
+
+logger = logging.getLogger(__name__)
+
+_TS_CONFIG = literal_column("'english'")
+
+# Reported as nutrition_source on enriched items
+SOURCE_LABELS = {
+    "off": "OpenFoodFacts (Local)",
+    "usda": "USDA FoodData Central (Local)",
+}
+
+
+def normalize_product_name(name: str) -> str:
+    """Lowercase, punctuation-free, single-spaced name. Used both when importing and when looking up."""
+    return " ".join(re.sub(r"[^\w\s]", " ", name.lower()).split())
+
+
+_RESULT_COLUMNS = (
+    NutritionProduct.calories_100g,
+    NutritionProduct.protein_100g,
+    NutritionProduct.carbs_100g,
+    NutritionProduct.fat_100g,
+    NutritionProduct.source,
+    NutritionProduct.product_name,
+)
+
+
+def _to_result(row) -> Dict[str, Any]:
+    return {
+        "calories_100g": row.calories_100g,
+        "protein_100g": row.protein_100g,
+        "carbs_100g": row.carbs_100g,
+        "fat_100g": row.fat_100g,
+        "source": SOURCE_LABELS.get(row.source, row.source),
+        "product_name": row.product_name,
+    }
+
+
+def search_local(item_name: str, limit: int) -> List[Dict[str, Any]]:
+    """
+    Candidate products for an item from the imported nutrition_products table, in the
+    same shape as get_nutrition_from_off results: exact normalized-name matches (btree)
+    if there are any, else full-text matches (GIN) on all of the item's words, else on
+    any of them, ranked by relevance, popularity and name length.
+    Returns [] when nothing matches or the table cannot be read.
+    """
+    name = normalize_product_name(item_name)
+    if not name:
+        return []
+    start = time.perf_counter()
+    try:
+        # Plain Core selects on a pooled connection: this runs once per food item
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(*_RESULT_COLUMNS)
+                .where(NutritionProduct.name_normalized == name)
+                .order_by(NutritionProduct.popularity.desc())
+                .limit(limit)
+            ).all()
+            queries = (
+                func.plainto_tsquery(_TS_CONFIG, name), # every word
+                func.to_tsquery(_TS_CONFIG, " | ".join(name.split())), # any word
+            )
+            for query in queries:
+                if rows:
+                    break
+                # Rank a bounded set of matches so common words ("milk") stay cheap
+                candidates = (
+                    select(NutritionProduct.id)
+                    .where(NutritionProduct.name_search.op("@@")(query))
+                    .limit(settings.NUTRITION_LOCAL_MAX_CANDIDATES)
+                    .subquery()
+                )
+                rows = conn.execute(
+                    select(*_RESULT_COLUMNS)
+                    .join(candidates, NutritionProduct.id == candidates.c.id)
+                    .order_by(
+                        func.ts_rank(NutritionProduct.name_search, query).desc(),
+                        NutritionProduct.popularity.desc(),
+                        func.length(NutritionProduct.name_normalized),
+                    )
+                    .limit(limit)
+                ).all()
+    except SQLAlchemyError as e:
+        logger.error(f"Local nutrition lookup failed for '{item_name}': {e}", exc_info=False)
+        return []
+    logger.debug(f"{len(rows)} local nutrition candidates for '{item_name}' ({(time.perf_counter() - start) * 1000:.2f} ms)")
+    return [_to_result(row) for row in rows]
+
+
+def lookup_local(item_name: str) -> Optional[Dict[str, Any]]:
+    """The best-scoring local candidate for an item above NAME_MATCH_THRESHOLD, or None."""
+    match = best_match(item_name, search_local(item_name, settings.NAME_MATCH_CANDIDATES))
+    if match:
+        logger.info(f"Local nutrition match for '{item_name}': '{match['product_name']}' (score {match['match_score']})")
+    return match
@@ -0,0 +1,229 @@
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Optional, Dict, Any, List, Tuple, FrozenSet, Set
+
+from app.core.config import settings
+
+# Scoring of food-database product names against the LLM's item names.
+# Names are reduced to singular, synonym-folded word tokens; a candidate scores by how
+# many query words it contains (misspellings count via trigram similarity) and, less,
+# by how few extra words it has. Brands and descriptors make product names longer
+# than item names, so coverage of the query matters more than exactness. Two rules
+# keep a product that merely shares a word from matching: it must contain most of the
+# item ("butter" is not "peanut butter"), and its head noun must be one of the item's
+# words ("milk chocolate" is chocolate, not "milk").
+
+_QUERY_COVERAGE_WEIGHT = 0.7
+_CANDIDATE_COVERAGE_WEIGHT = 0.3
+_FUZZY_TOKEN_MIN_SIMILARITY = 0.5 # Trigram similarity for two words to count as the same (typos)
+_MIN_QUERY_COVERAGE = 0.6 # Below this share of the item's words, the product is another food
+_HEAD_MISMATCH_FACTOR = 0.6 # Score multiplier when the product's head noun is not in the item
+
+# The head noun of a product name precedes these ("Milk, whole, 3.25%", "Bananas (loose)")
+_HEAD_SEGMENT_END = re.compile(r",|\(|\s-\s|/")
+# Words product names put after the head noun ("Peanut Butter Crunchy", "Milk Semi Skimmed")
+_TRAILING_DESCRIPTORS = frozenset({
+    "crunchy", "smooth", "creamy", "raw", "fresh", "organic", "plain", "natural", "original", "classic",
+    "light", "lite", "skimmed", "skim", "semi", "whole", "unsweetened", "sweetened", "salted", "unsalted",
+    "cooked", "boiled", "fried", "grilled", "roasted", "sliced", "frozen", "canned", "dried",
+    "low", "reduced", "fat", "sugar", "free", "fillet", "floret", "chunk", "slice", "piece", "portion", "pack", "mini",
+})
+
+_STOPWORDS = frozenset({"a", "an", "the", "of", "with", "and", "in", "on", "for", "to", "my", "some", "de", "x"})
+
+# Spelling variants and regional names, folded to one form
+_SYNONYMS = {
+    "yoghurt": "yogurt", "yogourt": "yogurt",
+    "courgette": "zucchini", "aubergine": "eggplant", "beetroot": "beet",
+    "prawn": "shrimp", "coriander": "cilantro", "rocket": "arugula",
+    "garbanzo": "chickpea", "porridge": "oatmeal", "doughnut": "donut",
+    "catsup": "ketchup", "capsicum": "pepper", "mince": "ground",
+}
+
+# Plurals the suffix rules below get wrong
+_IRREGULAR_PLURALS = {
+    "cookies": "cookie", "brownies": "brownie", "smoothies": "smoothie", "pies": "pie",
+    "veggies": "veggie", "leaves": "leaf", "loaves": "loaf", "halves": "half",
+    "fries": "fries", "grits": "grits",
+}
+
+
+def singularize(word: str) -> str:
+    if word in _IRREGULAR_PLURALS:
+        return _IRREGULAR_PLURALS[word]
+    if len(word) <= 3:
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y" # berries -> berry
+    if word.endswith(("ches", "shes", "sses", "xes", "zes", "oes")):
+        return word[:-2] # peaches, radishes, tomatoes
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def name_tokens(name: str) -> Tuple[str, ...]:
+    """Lowercase singular word tokens with synonyms folded and stopwords dropped, in order."""
+    words = re.sub(r"[^\w\s]", " ", (name or "").lower()).split()
+    tokens = []
+    for word in words:
+        if word in _STOPWORDS:
+            continue
+        word = singularize(word)
+        tokens.append(_SYNONYMS.get(word, word))
+    return tuple(tokens)
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """pg_trgm-style trigrams of each word, padded with two leading and one trailing space."""
+    grams: Set[str] = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def _trigram_similarity(a: str, b: str) -> float:
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def _token_similarity(token: str, others: Tuple[str, ...]) -> float:
+    if token in others:
+        return 1.0
+    best = max((_trigram_similarity(token, other) for other in others), default=0.0)
+    # A likely misspelling counts for most of a word, scaled by how close it is
+    return 0.5 + best / 2 if best >= _FUZZY_TOKEN_MIN_SIMILARITY else 0.0
+
+
+def head_token(name: str) -> Optional[str]:
+    """
+    Last word of the name before any comma/parenthesis/dash, skipping quantities and
+    trailing descriptors: 'chocolate' for 'Milk chocolate', 'milk' for 'Milk, whole,
+    3.25% milkfat', 'butter' for 'Peanut Butter Crunchy'.
+    """
+    tokens = name_tokens(_HEAD_SEGMENT_END.split(name or "", 1)[0]) or name_tokens(name)
+    words = [token for token in tokens if not any(ch.isdigit() for ch in token)]
+    while len(words) > 1 and words[-1] in _TRAILING_DESCRIPTORS:
+        words.pop()
+    return words[-1] if words else None
+
+
+def _head_noun_matches(query: str, candidate: str) -> bool:
+    """Whether the candidate's head noun is one of the query's words (misspellings count)."""
+    head = head_token(candidate)
+    return head is not None and _token_similarity(head, name_tokens(query)) > 0
+
+
+def similarity(query: str, candidate: str) -> float:
+    """0..1 score of how well a product name (candidate) matches an item name (query)."""
+    q_tokens, c_tokens = name_tokens(query), name_tokens(candidate)
+    if not q_tokens or not c_tokens:
+        return 0.0
+    query_coverage = sum(_token_similarity(t, c_tokens) for t in q_tokens) / len(q_tokens)
+    if query_coverage < _MIN_QUERY_COVERAGE:
+        return 0.0
+    candidate_coverage = sum(_token_similarity(t, q_tokens) for t in c_tokens) / len(c_tokens)
+    score = _QUERY_COVERAGE_WEIGHT * query_coverage + _CANDIDATE_COVERAGE_WEIGHT * candidate_coverage
+    if not _head_noun_matches(query, candidate):
+        score *= _HEAD_MISMATCH_FACTOR
+    return score
+
+
+def is_match(query: str, candidate: str, threshold: Optional[float] = None) -> bool:
+    threshold = settings.NAME_MATCH_THRESHOLD if threshold is None else threshold
+    return similarity(query, candidate) >= threshold
+
+
+def best_match(query: str, candidates: List[Dict[str, Any]],
+               threshold: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    The candidate (a nutrition dict with 'product_name') scoring highest above the
+    threshold, with its score as 'match_score'. Ties go to a matching head noun, then
+    to the earlier candidate (the source's own ranking). None when nothing qualifies.
+    """
+    threshold = settings.NAME_MATCH_THRESHOLD if threshold is None else threshold
+    best, best_key = None, None
+    for position, candidate in enumerate(candidates):
+        name = candidate.get("product_name") or ""
+        score = similarity(query, name)
+        if score < threshold:
+            continue
+        key = (round(score, 4), _head_noun_matches(query, name), -position)
+        if best_key is None or key > best_key:
+            best, best_key = candidate, key
+    if best is None:
+        return None
+    return {**best, "match_score": round(best_key[0], 3)}
+
+
+class ProductNameIndex:
+    """
+    Bounded in-memory trigram index of product names seen in earlier OFF searches,
+    with their nutrition data, so a close variant of a known product ("bananas",
+    "ripe banana") is answered without another round trip. Least recently added or
+    used products are evicted first.
+    """
+
+    def __init__(self, max_products: int):
+        self._max_products = max_products
+        self._lock = threading.Lock()
+        self._products: "OrderedDict[str, Tuple[Dict[str, Any], FrozenSet[str]]]" = OrderedDict()
+        self._postings: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def _remove(self, key: str) -> None:
+        _, grams = self._products.pop(key)
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(key)
+                if not posting:
+                    del self._postings[gram]
+
+    def add(self, products: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            for product in products:
+                key = " ".join(name_tokens(product.get("product_name") or ""))
+                if not key:
+                    continue
+                if key in self._products:
+                    self._remove(key)
+                grams = trigrams(key)
+                self._products[key] = (dict(product), grams)
+                for gram in grams:
+                    self._postings.setdefault(gram, set()).add(key)
+            while len(self._products) > self._max_products:
+                self._remove(next(iter(self._products)))
+
+    def search(self, query: str, threshold: float, limit: int = 20) -> Optional[Dict[str, Any]]:
+        """Best known product for the query above the threshold, or None."""
+        key = " ".join(name_tokens(query))
+        if not key:
+            return None
+        with self._lock:
+            shared = Counter()
+            for gram in trigrams(key):
+                for product_key in self._postings.get(gram, ()):
+                    shared[product_key] += 1
+            candidates = [self._products[product_key][0] for product_key, _ in shared.most_common(limit)]
+        match = best_match(query, candidates, threshold)
+        if match is not None:
+            with self._lock:
+                matched_key = " ".join(name_tokens(match.get("product_name") or ""))
+                if matched_key in self._products:
+                    self._products.move_to_end(matched_key) # Keep products that get used
+        return match
+
+    def clear(self) -> None:
+        with self._lock:
+            self._products.clear()
+            self._postings.clear()
+
+
+product_name_index = ProductNameIndex(max_products=settings.NAME_INDEX_MAX_PRODUCTS)
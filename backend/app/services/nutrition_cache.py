@@ -0,0 +1,271 @@
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, NamedTuple, Set
+
+from cachetools import TLRUCache
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.nutrition_cache import NutritionCacheEntry
+from app.services.food_data_service import get_nutrition_from_off
+from app.services.resilience import Deadline, DependencyUnavailableError
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_item_name(name: str) -> str:
+    """Case-, punctuation- and whitespace-insensitive form of a food item name used as the cache key."""
+    return " ".join(re.sub(r"[^\w\s]", " ", name.lower()).split())
+
+
+class _Cached(NamedTuple):
+    data: Optional[Dict[str, Any]] # None for a negative entry
+    expires_at: datetime # UTC; served stale (and refreshed in the background) after this
+
+
+class NutritionLookupCache:
+    """
+    Two-tier cache of Open Food Facts lookups keyed on normalized item name:
+    an in-process TLRU tier in front of the nutrition_cache table.
+
+    Products found are kept for NUTRITION_CACHE_POSITIVE_TTL_SECONDS, misses
+    ("No products found", incomplete nutriments) for the much shorter
+    NUTRITION_CACHE_NEGATIVE_TTL_SECONDS. For NUTRITION_CACHE_STALE_SECONDS after
+    an entry expires it is still returned, while a background thread re-queries OFF.
+    Transient OFF failures (breaker open, request errors, deadline) are never cached.
+
+    Lookups run on the enrichment thread pool, so the Postgres tier uses its own
+    short-lived sessions rather than the request's.
+    """
+
+    def __init__(self, maxsize: int, memory_ttl_seconds: int):
+        self._memory_ttl = timedelta(seconds=memory_ttl_seconds)
+        self._memory: TLRUCache = TLRUCache(maxsize=maxsize, ttu=self._memory_expiry, timer=datetime.utcnow)
+        self._lock = threading.Lock()
+        self._refreshing: Set[str] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._counters = {
+            "memory_hits": 0, "db_hits": 0, "stale_hits": 0, "negative_hits": 0, "misses": 0,
+            "stores": 0, "refreshes": 0, "refresh_failures": 0, "db_errors": 0,
+        }
+
+    @property
+    def _stale_window(self) -> timedelta:
+        return timedelta(seconds=settings.NUTRITION_CACHE_STALE_SECONDS)
+
+    def _memory_expiry(self, key: str, value: _Cached, now: datetime) -> datetime:
+        # Bounded by NUTRITION_CACHE_MEMORY_TTL_SECONDS so purges/refreshes on other nodes are picked up
+        return min(value.expires_at + self._stale_window, now + self._memory_ttl)
+
+    def _incr(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.NUTRITION_CACHE_REFRESH_WORKERS,
+                    thread_name_prefix="nutrition-refresh",
+                )
+            return self._executor
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- Lookup ---
+
+    def lookup(self, item_name: str, deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
+        """
+        Drop-in replacement for get_nutrition_from_off: returns per-100g data or None,
+        and raises DependencyUnavailableError when OFF has to be queried but cannot be.
+        """
+        key = normalize_item_name(item_name)
+        if not settings.NUTRITION_CACHE_ENABLED or not key:
+            return get_nutrition_from_off(item_name, deadline=deadline)
+
+        cached = self._get(key)
+        if cached is not None:
+            if cached.expires_at <= datetime.utcnow():
+                self._incr("stale_hits")
+                self._schedule_refresh(key)
+            if cached.data is None:
+                self._incr("negative_hits")
+                logger.debug(f"Nutrition cache negative hit for '{key}'")
+                return None
+            return dict(cached.data)
+
+        self._incr("misses")
+        data = get_nutrition_from_off(key, deadline=deadline)
+        self._store(key, data)
+        return data
+
+    def _get(self, key: str) -> Optional[_Cached]:
+        with self._lock:
+            cached = self._memory.get(key)
+        if cached is not None:
+            self._incr("memory_hits")
+            return cached
+
+        try:
+            with SessionLocal() as db:
+                row = db.get(NutritionCacheEntry, key)
+        except SQLAlchemyError as e:
+            logger.error(f"Nutrition cache DB lookup failed: {e}", exc_info=False)
+            self._incr("db_errors")
+            return None
+
+        if row is None or row.expires_at + self._stale_window <= datetime.utcnow():
+            return None
+        cached = _Cached(data=row.data if row.found else None, expires_at=row.expires_at)
+        self._incr("db_hits")
+        with self._lock:
+            self._memory[key] = cached
+        return cached
+
+    def _store(self, key: str, data: Optional[Dict[str, Any]]) -> None:
+        now = datetime.utcnow()
+        ttl = settings.NUTRITION_CACHE_POSITIVE_TTL_SECONDS if data else settings.NUTRITION_CACHE_NEGATIVE_TTL_SECONDS
+        cached = _Cached(data=dict(data) if data else None, expires_at=now + timedelta(seconds=ttl))
+        with self._lock:
+            self._memory[key] = cached
+
+        stmt = insert(NutritionCacheEntry).values(
+            query=key, found=cached.data is not None, data=cached.data,
+            fetched_at=now, expires_at=cached.expires_at,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[NutritionCacheEntry.query],
+            set_={
+                "found": stmt.excluded.found, "data": stmt.excluded.data,
+                "fetched_at": stmt.excluded.fetched_at, "expires_at": stmt.excluded.expires_at,
+            },
+        )
+        try:
+            with SessionLocal() as db:
+                db.execute(stmt)
+                db.commit()
+            self._incr("stores")
+        except SQLAlchemyError as e:
+            logger.error(f"Nutrition cache DB store failed: {e}", exc_info=False)
+            self._incr("db_errors")
+
+    # --- Stale-While-Revalidate ---
+
+    def _schedule_refresh(self, key: str) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return # One refresh per key at a time
+            self._refreshing.add(key)
+        try:
+            self._get_executor().submit(self._refresh, key)
+        except RuntimeError: # Executor shut down
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _refresh(self, key: str) -> None:
+        try:
+            data = get_nutrition_from_off(key)
+            self._store(key, data)
+            self._incr("refreshes")
+            logger.debug(f"Refreshed nutrition cache entry for '{key}'")
+        except DependencyUnavailableError as e:
+            # Keep serving the stale entry; the next stale hit retries
+            self._incr("refresh_failures")
+            logger.warning(f"Nutrition cache refresh for '{key}' failed: {e}")
+        except Exception as e:
+            self._incr("refresh_failures")
+            logger.error(f"Nutrition cache refresh for '{key}' raised: {e}", exc_info=True)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    # --- Admin ---
+
+    def inspect(self, db: Session, item_name: str) -> Optional[Dict[str, Any]]:
+        key = normalize_item_name(item_name)
+        row = db.get(NutritionCacheEntry, key)
+        with self._lock:
+            in_memory = key in self._memory
+        if row is None:
+            return None
+        now = datetime.utcnow()
+        return {
+            "query": row.query,
+            "found": row.found,
+            "data": row.data,
+            "fetched_at": row.fetched_at,
+            "expires_at": row.expires_at,
+            "stale": row.expires_at <= now,
+            "servable": row.expires_at + self._stale_window > now,
+            "in_memory": in_memory,
+        }
+
+    def purge(self, db: Session, item_name: Optional[str] = None,
+              negative_only: bool = False, expired_only: bool = False) -> int:
+        """
+        Deletes matching rows and drops them from this process's memory tier.
+        expired_only matches entries past their stale window (no longer served).
+        Returns the number of rows deleted.
+        """
+        query = db.query(NutritionCacheEntry)
+        key = normalize_item_name(item_name) if item_name else None
+        if key:
+            query = query.filter(NutritionCacheEntry.query == key)
+        if negative_only:
+            query = query.filter(NutritionCacheEntry.found.is_(False))
+        if expired_only:
+            query = query.filter(NutritionCacheEntry.expires_at <= datetime.utcnow() - self._stale_window)
+        deleted = query.delete(synchronize_session=False)
+        db.commit()
+
+        with self._lock:
+            if key:
+                self._memory.pop(key, None)
+            elif negative_only:
+                for cached_key in [k for k, v in self._memory.items() if v.data is None]:
+                    self._memory.pop(cached_key, None)
+            elif not expired_only:
+                self._memory.clear() # Memory entries past their stale window already expire on their own
+        return deleted
+
+    def stats(self, db: Session) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._memory)
+            refreshing = len(self._refreshing)
+        now = datetime.utcnow()
+        total, negative, stale = db.query(
+            func.count(NutritionCacheEntry.query),
+            func.count(NutritionCacheEntry.query).filter(NutritionCacheEntry.found.is_(False)),
+            func.count(NutritionCacheEntry.query).filter(NutritionCacheEntry.expires_at <= now),
+        ).one()
+        hits = counters["memory_hits"] + counters["db_hits"]
+        lookups = hits + counters["misses"]
+        return {
+            **counters,
+            "hits": hits,
+            "hit_rate": (hits / lookups) if lookups else None,
+            "memory_size": size,
+            "memory_max_size": self._memory.maxsize,
+            "refreshes_in_flight": refreshing,
+            "db_entries": total,
+            "db_negative_entries": negative,
+            "db_stale_entries": stale,
+        }
+
+
+nutrition_cache = NutritionLookupCache(
+    maxsize=settings.NUTRITION_CACHE_MAX_ENTRIES,
+    memory_ttl_seconds=settings.NUTRITION_CACHE_MEMORY_TTL_SECONDS,
+)
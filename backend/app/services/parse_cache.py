@@ -0,0 +1,132 @@
+import copy
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any
+
+from cachetools import TTLCache
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.parse_cache import ParseCacheEntry
+from app.services.llm_parser import PROMPT_VERSION, cascade_signature
+
+logger = logging.getLogger(__name__)
+
+# Parse results that should not be reused (transient failures / unparseable output)
+_UNCACHEABLE_TYPES = {"error", "unknown"}
+
+
+def normalize_entry_text(text: str) -> str:
+    """Case- and whitespace-insensitive form of an entry used for cache keys."""
+    return " ".join(text.lower().split())
+
+
+def make_cache_key(text: str, model_name: Optional[str] = None, prompt_version: str = PROMPT_VERSION) -> str:
+    """model_name defaults to the cascade signature, so changing tiers or escalation rules invalidates entries."""
+    raw = f"{prompt_version}\x1f{model_name or cascade_signature()}\x1f{normalize_entry_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ParseResultCache:
+    """
+    Two-tier cache of raw LLM parse results keyed on normalized entry text,
+    prompt version and model cascade: an in-process TTL/LRU tier in front of the
+    llm_parse_cache table. Results are stored before OFF enrichment, and copies
+    are handed out so callers can enrich/recalculate them in place. The table is
+    read and written on short-lived sessions of its own, never the caller's, so a
+    cache write cannot commit or roll back the caller's unit of work.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: int, db_ttl_days: int):
+        self._memory: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl_seconds)
+        self._lock = threading.Lock()
+        self._db_ttl = timedelta(days=db_ttl_days)
+        self._counters = {"memory_hits": 0, "db_hits": 0, "misses": 0, "stores": 0, "db_errors": 0}
+
+    def _incr(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def get(self, text: str) -> Optional[Dict[str, Any]]:
+        key = make_cache_key(text)
+        with self._lock:
+            cached = self._memory.get(key)
+        if cached is not None:
+            self._incr("memory_hits")
+            logger.debug(f"Parse cache memory hit for key {key[:12]}")
+            return copy.deepcopy(cached)
+
+        try:
+            with SessionLocal() as db:
+                row = db.get(ParseCacheEntry, key)
+        except SQLAlchemyError as e:
+            logger.error(f"Parse cache DB lookup failed: {e}", exc_info=False)
+            self._incr("db_errors")
+            row = None
+
+        if row is not None and row.created_at >= datetime.utcnow() - self._db_ttl:
+            self._incr("db_hits")
+            logger.debug(f"Parse cache DB hit for key {key[:12]}")
+            with self._lock:
+                self._memory[key] = row.result
+            return copy.deepcopy(row.result)
+
+        self._incr("misses")
+        return None
+
+    def set(self, text: str, result: Dict[str, Any]) -> None:
+        if not isinstance(result, dict) or result.get("type") in _UNCACHEABLE_TYPES:
+            return
+        key = make_cache_key(text)
+        value = copy.deepcopy(result)
+        with self._lock:
+            self._memory[key] = value
+
+        stmt = insert(ParseCacheEntry).values(
+            cache_key=key,
+            model_name=cascade_signature(),
+            prompt_version=PROMPT_VERSION,
+            result=value,
+            created_at=datetime.utcnow(),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ParseCacheEntry.cache_key],
+            set_={"result": stmt.excluded.result, "created_at": stmt.excluded.created_at},
+        )
+        try:
+            with SessionLocal() as db:
+                db.execute(stmt)
+                db.commit()
+            self._incr("stores")
+        except SQLAlchemyError as e:
+            logger.error(f"Parse cache DB store failed: {e}", exc_info=False)
+            self._incr("db_errors")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._memory)
+        hits = counters["memory_hits"] + counters["db_hits"]
+        lookups = hits + counters["misses"]
+        return {
+            **counters,
+            "hits": hits,
+            "hit_rate": (hits / lookups) if lookups else None,
+            "memory_size": size,
+            "memory_max_size": self._memory.maxsize,
+        }
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+
+parse_cache = ParseResultCache(
+    maxsize=settings.PARSE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PARSE_CACHE_TTL_SECONDS,
+    db_ttl_days=settings.PARSE_CACHE_DB_TTL_DAYS,
+)
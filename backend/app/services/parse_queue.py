@@ -0,0 +1,129 @@
+import logging
+import os
+import socket
+import threading
+from typing import List, Optional
+
+from app import crud
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.parse_job import ParseJob
+from app.services import image_storage
+from app.services.resilience import Deadline
+
+logger = logging.getLogger(__name__)
+
+# Background workers draining the parse_jobs table. Every API process runs
+# PARSE_QUEUE_WORKERS threads; claims use SKIP LOCKED, so workers on all nodes share one queue.
+
+_stop = threading.Event()
+_wake = threading.Event()
+_threads: List[threading.Thread] = []
+
+
+class ParseAttemptError(Exception):
+    """A retryable parse failure (e.g. the LLM returned an error result)."""
+
+    def __init__(self, detail: str, parsed_result: Optional[dict] = None):
+        super().__init__(detail)
+        self.parsed_result = parsed_result
+
+
+def notify_new_job() -> None:
+    """Wakes an idle local worker instead of waiting for the next poll."""
+    _wake.set()
+
+
+def _process_job(db, job: ParseJob) -> None:
+    entry = crud.health_entry.get(db, id=job.entry_id)
+    if entry is None:
+        # Entry deleted while queued; ON DELETE CASCADE normally removes the job too
+        crud.parse_job.mark_attempt_failed(db, job=job, error="Entry no longer exists")
+        return
+
+    image_data = None
+    if entry.image_url:
+        image_data = image_storage.read_image_bytes(entry.image_url)
+        if image_data is None and not entry.entry_text:
+            raise ParseAttemptError(f"Stored image {entry.image_url} could not be read")
+
+    deadline = Deadline(settings.REQUEST_DEADLINE_SECONDS)
+    parsed_result = crud.health_entry.parse_for_entry(db, db_obj=entry, image_data=image_data, deadline=deadline)
+    if parsed_result.get("type") == "error":
+        raise ParseAttemptError(str(parsed_result.get("error_detail")), parsed_result)
+
+    crud.parse_job.mark_stage(db, job=job, stage="enriching")
+    crud.health_entry.apply_parse_result(db, db_obj=entry, parsed_result=parsed_result, deadline=deadline)
+    crud.parse_job.mark_succeeded(db, job=job) # Commits the entry update with the job status
+
+
+def _fail_attempt(db, job_id: int, error: Exception) -> None:
+    """Records a failed attempt; on the last one the entry is saved with the error result so it leaves 'pending'."""
+    db.rollback()
+    job = db.get(ParseJob, job_id)
+    if job is None:
+        return
+    exhausted = crud.parse_job.mark_attempt_failed(db, job=job, error=str(error))
+    if exhausted:
+        entry = crud.health_entry.get(db, id=job.entry_id)
+        if entry is not None:
+            parsed_result = getattr(error, "parsed_result", None) or {"type": "error", "error_detail": str(error)}
+            crud.health_entry.apply_parse_result(db, db_obj=entry, parsed_result=parsed_result)
+            db.commit()
+
+
+def run_once(worker_id: str) -> bool:
+    """Claims and processes one job. Returns False when no job was due."""
+    db = SessionLocal()
+    try:
+        job = crud.parse_job.claim_next(db, worker_id=worker_id)
+        if job is None:
+            return False
+        job_id = job.id
+        try:
+            _process_job(db, job)
+        except Exception as e:
+            if not isinstance(e, ParseAttemptError):
+                logger.error(f"Parse job {job_id} raised: {e}", exc_info=True)
+            _fail_attempt(db, job_id, e)
+        return True
+    finally:
+        db.close()
+
+
+def _worker_loop(worker_id: str) -> None:
+    logger.info(f"Parse queue worker {worker_id} started")
+    while not _stop.is_set():
+        try:
+            processed = run_once(worker_id)
+        except Exception as e:
+            # e.g. the database is unreachable; back off for one poll interval
+            logger.error(f"Parse queue worker {worker_id} error: {e}", exc_info=True)
+            processed = False
+        if not processed:
+            _wake.wait(settings.PARSE_QUEUE_POLL_SECONDS)
+            _wake.clear()
+    logger.info(f"Parse queue worker {worker_id} stopped")
+
+
+def start_workers() -> None:
+    if _threads or settings.PARSE_QUEUE_WORKERS <= 0:
+        return
+    _stop.clear()
+    node = f"{socket.gethostname()}:{os.getpid()}"
+    for n in range(settings.PARSE_QUEUE_WORKERS):
+        thread = threading.Thread(target=_worker_loop, args=(f"{node}:{n}",), name=f"parse-worker-{n}", daemon=True)
+        thread.start()
+        _threads.append(thread)
+
+
+def stop_workers(timeout: float = 5.0) -> None:
+    _stop.set()
+    _wake.set()
+    for thread in _threads:
+        thread.join(timeout)
+    _threads.clear()
+
+
+def live_worker_count() -> int:
+    return sum(1 for thread in _threads if thread.is_alive())
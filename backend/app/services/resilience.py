@@ -0,0 +1,215 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Deque, Iterator, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Circuit breakers and per-request deadlines for the external dependencies
+# (Gemini, Open Food Facts), so a degraded dependency fails fast instead of
+# tying up request workers for the full client timeout.
+
+class DependencyUnavailableError(Exception):
+    """A dependency call was not attempted or did not complete; callers should use their fallback."""
+
+
+class CircuitOpenError(DependencyUnavailableError):
+    def __init__(self, name: str):
+        super().__init__(f"Circuit breaker '{name}' is open")
+        self.name = name
+
+
+class DeadlineExceededError(DependencyUnavailableError):
+    pass
+
+
+class Deadline:
+    """End-to-end time budget for one request, shared by all of its stages."""
+
+    def __init__(self, seconds: float):
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, cap: float, minimum: float = 0.0) -> float:
+        """Timeout for the next call: the stage's own cap, shrunk to what is left of the budget."""
+        remaining = self.remaining()
+        if remaining <= minimum:
+            raise DeadlineExceededError(f"Request deadline exceeded ({self.budget:.1f}s budget, {remaining:.2f}s left)")
+        return min(cap, remaining)
+
+
+def call_timeout(deadline: Optional[Deadline], cap: float, minimum: float = 0.0) -> float:
+    """Like Deadline.timeout, but just the cap when the caller has no deadline."""
+    return cap if deadline is None else deadline.timeout(cap, minimum)
+
+
+class CircuitBreaker:
+    """
+    Closed -> open when the failure rate over the rolling window reaches the threshold
+    (with at least min_calls calls). Open rejects calls for open_seconds, then half-open
+    lets up to half_open_probes calls through: a success closes the breaker, a failure re-opens it.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_rate_threshold: float,
+        min_calls: int,
+        window_seconds: float,
+        open_seconds: float,
+        half_open_probes: int,
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._lock = threading.Lock()
+        self._calls: Deque[Tuple[float, bool]] = deque() # (monotonic time, succeeded)
+        self._state = self.CLOSED
+        self._opened_at: Optional[float] = None
+        self._probes_in_flight = 0
+        self._rejected = 0
+        self._times_opened = 0
+
+    def _prune(self, now: float) -> None:
+        while self._calls and self._calls[0][0] < now - self.window_seconds:
+            self._calls.popleft()
+
+    def _failure_rate(self) -> Optional[float]:
+        if not self._calls:
+            return None
+        return sum(1 for _, ok in self._calls if not ok) / len(self._calls)
+
+    def _open(self, now: float) -> None:
+        self._state = self.OPEN
+        self._opened_at = now
+        self._probes_in_flight = 0
+        self._times_opened += 1
+        logger.warning(f"Circuit breaker '{self.name}' opened (failure rate {self._failure_rate()}, {len(self._calls)} calls in window).")
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if self._state == self.OPEN and now - self._opened_at >= self.open_seconds:
+                self._state = self.HALF_OPEN
+                logger.info(f"Circuit breaker '{self.name}' half-open, probing.")
+            if self._state == self.HALF_OPEN:
+                if self._probes_in_flight < self.half_open_probes:
+                    self._probes_in_flight += 1
+                    return True
+            elif self._state == self.CLOSED:
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if self._state == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._calls.clear()
+                self._probes_in_flight = 0
+                logger.info(f"Circuit breaker '{self.name}' closed after a successful probe.")
+            self._calls.append((now, True))
+            self._prune(now)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._calls.append((now, False))
+            self._prune(now)
+            if self._state == self.HALF_OPEN:
+                self._open(now)
+            elif self._state == self.CLOSED and len(self._calls) >= self.min_calls \
+                    and self._failure_rate() >= self.failure_rate_threshold:
+                self._open(now)
+
+    def _release(self) -> None:
+        """Returns a half-open probe slot when a call ended without an outcome (e.g. cancelled)."""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes_in_flight > 0:
+                self._probes_in_flight -= 1
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """
+        Wraps one dependency call: raises CircuitOpenError if the call is not allowed,
+        records an exception as a failure and a normal exit as a success.
+        Cancellation (a BaseException) records neither.
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(self.name)
+        try:
+            yield
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            self._release()
+            raise
+        self.record_success()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._calls.clear()
+            self._opened_at = None
+            self._probes_in_flight = 0
+        logger.info(f"Circuit breaker '{self.name}' manually reset.")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            state = self._state
+            retry_in = None
+            if state == self.OPEN:
+                retry_in = max(0.0, self.open_seconds - (now - self._opened_at))
+                if retry_in == 0:
+                    state = self.HALF_OPEN # Next call will probe
+            failures = sum(1 for _, ok in self._calls if not ok)
+            return {
+                "name": self.name,
+                "state": state,
+                "calls_in_window": len(self._calls),
+                "failures_in_window": failures,
+                "failure_rate": self._failure_rate(),
+                "rejected_calls": self._rejected,
+                "times_opened": self._times_opened,
+                "retry_in_seconds": round(retry_in, 1) if retry_in is not None else None,
+            }
+
+
+def _new_breaker(name: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        failure_rate_threshold=settings.BREAKER_FAILURE_RATE,
+        min_calls=settings.BREAKER_MIN_CALLS,
+        window_seconds=settings.BREAKER_WINDOW_SECONDS,
+        open_seconds=settings.BREAKER_OPEN_SECONDS,
+        half_open_probes=settings.BREAKER_HALF_OPEN_PROBES,
+    )
+
+GEMINI = "gemini"
+OPEN_FOOD_FACTS = "openfoodfacts"
+
+breakers: Dict[str, CircuitBreaker] = {name: _new_breaker(name) for name in (GEMINI, OPEN_FOOD_FACTS)}
+gemini_breaker = breakers[GEMINI]
+off_breaker = breakers[OPEN_FOOD_FACTS]
@@ -0,0 +1,33 @@
+import asyncio
+import logging
+from typing import Awaitable, TypeVar
+
+from fastapi import HTTPException, Request
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Non-standard status (nginx convention) used when the client went away mid-request
+CLIENT_CLOSED_REQUEST = 499
+
+
+async def cancel_on_disconnect(request: Request, awaitable: Awaitable[T], poll_interval: float = 0.25) -> T:
+    """
+    Awaits `awaitable` while polling the client connection.
+    If the client disconnects first, the task is cancelled (which cancels any
+    in-flight LLM call it is awaiting) and a 499 HTTPException is raised.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.info(f"Client disconnected from {request.url.path}, cancelling in-flight work.")
+                task.cancel()
+                raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+    finally:
+        if not task.done():
+            task.cancel()
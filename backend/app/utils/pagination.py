@@ -0,0 +1,21 @@
+import base64
+from datetime import datetime
+from typing import Tuple
+
+# Keyset pagination cursors: the (timestamp, id) of the last row of a page, as an
+# opaque URL-safe token. Clients pass it back unchanged to get the next page.
+
+
+def encode_cursor(timestamp: datetime, entry_id: int) -> str:
+    raw = f"{timestamp.isoformat()}|{entry_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError for a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, entry_id = raw.split("|")
+        return datetime.fromisoformat(timestamp), int(entry_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
@@ -1,9 +1,14 @@
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.db.session import engine
+from starlette.concurrency import run_in_threadpool
+from app.db.session import engine, async_engine
 from app.db.base import Base
 from app.core.config import settings # Import settings
+from app.services.llm_parser import warm_up_llm_clients
+from app.services import image_preprocessing
+from app.services import parse_queue
+from app.services.nutrition_cache import nutrition_cache
 
 # --- Logging Configuration --- 
 logging.basicConfig(
@@ -19,8 +24,7 @@ logger = logging.getLogger(__name__)
 
 logger.info("Starting Health Tracker application...")
 
-# Create database tables (This is simple for development, consider Alembic for migrations)
-# Base.metadata.create_all(bind=engine) # Comment out or remove after initial setup/use migrations
+# Database tables are created and migrated with Alembic (`alembic upgrade head`), not on startup
 
 app = FastAPI(title="Health Tracker API", version="0.1.0")
 
@@ -33,9 +37,43 @@ app.add_middleware(
     allow_credentials=True, # Allows cookies/auth headers
     allow_methods=["*"],    # Allows all methods (GET, POST, etc.)
     allow_headers=["*"],    # Allows all headers
+    expose_headers=["X-Next-Cursor"], # Entry list pagination, read by the browser client
 )
 # --- End CORS Configuration ---
 
+@app.on_event("startup")
+async def warm_up_llm():
+    # Build the reusable Gemini clients and open the channel before the first request
+    if settings.LLM_WARMUP_ON_STARTUP:
+        await run_in_threadpool(warm_up_llm_clients)
+
+
+@app.on_event("startup")
+def start_parse_workers():
+    # Background parsing for entries created with ?async_parse=true
+    parse_queue.start_workers()
+
+
+@app.on_event("shutdown")
+def stop_image_workers():
+    image_preprocessing.shutdown_executor()
+
+
+@app.on_event("shutdown")
+def stop_parse_workers():
+    parse_queue.stop_workers()
+
+
+@app.on_event("shutdown")
+def stop_nutrition_refresh():
+    nutrition_cache.shutdown()
+
+
+@app.on_event("shutdown")
+async def close_async_db_pool():
+    await async_engine.dispose()
+
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Health Tracker API"}
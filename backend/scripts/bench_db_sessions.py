@@ -0,0 +1,191 @@
+"""
+Compares requests per second of one worker creating entries through the sync
+(psycopg2 Session, handler in the threadpool) and async (asyncpg AsyncSession on the
+event loop) database paths.
+
+Both endpoints authenticate the bearer token and create a fast-path entry
+("8000 steps", so no LLM call) the way POST /entries/ does: crud.health_entry's
+create_with_owner on a sync Session, and create_with_owner_async on an AsyncSession,
+each with its auth dependency. Requests are sent in-process to the ASGI app on one
+event loop, so the numbers are per uvicorn worker and leave out HTTP overhead.
+Pool options come from the DB_POOL_* settings.
+
+Requests are spread over --users temporary users (writes of one user are serialized
+by the daily-rollup lock), which are deleted with their entries afterwards.
+
+Usage (from the backend directory):
+    python -m scripts.bench_db_sessions [--requests 2000] [--concurrency 32]
+    DB_POOL_SIZE=20 DB_MAX_OVERFLOW=0 python -m scripts.bench_db_sessions
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+from fastapi import Depends, FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.api import deps
+from app.core.config import settings
+from app.core.security import create_access_token, get_password_hash
+from app.db.session import SessionLocal, async_engine, engine
+from app.models.daily_rollup import DailyRollupZone
+from app.models.health_entry import HealthEntry
+
+BENCH_EMAIL = "bench-db-sessions-{}@example.com"
+ENTRY_BODY = json.dumps({"entry_text": "8000 steps"}).encode()
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/sync", status_code=201)
+    def create_sync(
+        entry_in: schemas.HealthEntryCreate,
+        db: Session = Depends(deps.get_db),
+        current_user: models.User = Depends(deps.get_current_active_user),
+    ):
+        entry = crud.health_entry.create_with_owner(db, obj_in=entry_in, owner_id=current_user.id)
+        return {"id": entry.id}
+
+    @app.post("/async", status_code=201)
+    async def create_async(
+        entry_in: schemas.HealthEntryCreate,
+        db: AsyncSession = Depends(deps.get_async_db),
+        current_user: models.User = Depends(deps.get_current_active_user_async),
+    ):
+        entry = await crud.health_entry.create_with_owner_async(db, obj_in=entry_in, owner_id=current_user.id)
+        return {"id": entry.id}
+
+    return app
+
+
+async def _post(app: FastAPI, path: str, token: str) -> int:
+    """Sends one POST straight to the ASGI app and returns the status code."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [
+            (b"authorization", f"Bearer {token}".encode()),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(ENTRY_BODY)).encode()),
+        ],
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    done = asyncio.Event()
+    sent_body = False
+    status = 0
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {"type": "http.request", "body": ENTRY_BODY, "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body"):
+            done.set()
+
+    await app(scope, receive, send)
+    return status
+
+
+async def _run(app: FastAPI, path: str, tokens: List[str], requests: int, concurrency: int) -> Tuple[float, List[float]]:
+    """Returns (requests per second, per-request latencies in ms)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(token: str) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            status = await _post(app, path, token)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status != 201:
+                raise RuntimeError(f"POST {path} returned {status}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(tokens[i % len(tokens)]) for i in range(requests)))
+    return requests / (time.perf_counter() - start), latencies
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    return statistics.quantiles(values, n=100)[int(pct) - 1]
+
+
+def _create_users(count: int) -> List[Tuple[int, str]]:
+    """Returns (id, email) of each bench user, creating the missing ones."""
+    db = SessionLocal()
+    try:
+        hashed_password = get_password_hash("bench") # Once, not per user as crud.user.create would
+        emails = [BENCH_EMAIL.format(i) for i in range(count)]
+        existing = {email for (email,) in db.query(models.User.email).filter(models.User.email.in_(emails))}
+        db.add_all(models.User(email=email, hashed_password=hashed_password, is_active=True) for email in emails if email not in existing)
+        db.commit()
+        return db.query(models.User.id, models.User.email).filter(models.User.email.in_(emails)).all()
+    finally:
+        db.close()
+
+
+def _delete_users(user_ids: List[int]) -> None:
+    db = SessionLocal()
+    try:
+        db.query(HealthEntry).filter(HealthEntry.owner_id.in_(user_ids)).delete(synchronize_session=False)
+        db.query(DailyRollupZone).filter(DailyRollupZone.owner_id.in_(user_ids)).delete(synchronize_session=False)
+        db.query(models.User).filter(models.User.id.in_(user_ids)).delete(synchronize_session=False) # Cascades to daily_rollups
+        db.commit()
+    finally:
+        db.close()
+
+
+async def bench(requests: int, concurrency: int, rounds: int, user_count: int) -> None:
+    app = build_app()
+    users = _create_users(user_count)
+    tokens = [create_access_token(email) for _, email in users]
+    print(
+        f"{requests} requests x {rounds} rounds at concurrency {concurrency} over {user_count} users; pool_size={settings.DB_POOL_SIZE}, "
+        f"max_overflow={settings.DB_MAX_OVERFLOW}, pre_ping={settings.DB_POOL_PRE_PING}, "
+        f"statement_cache={settings.DB_STATEMENT_CACHE_SIZE}"
+    )
+    try:
+        for path in ("/sync", "/async"): # Warm up both pools
+            await _run(app, path, tokens, concurrency, concurrency)
+        results: Dict[str, List[Tuple[float, List[float]]]] = {"/sync": [], "/async": []}
+        for _ in range(rounds): # Alternate, so both paths see the same table growth
+            for path in results:
+                results[path].append(await _run(app, path, tokens, requests, concurrency))
+        for path, runs in results.items():
+            rates = [rate for rate, _ in runs]
+            latencies = [latency for _, run_latencies in runs for latency in run_latencies]
+            print(
+                f"  {path:<7} {statistics.median(rates):8.1f} req/s (rounds: {', '.join(f'{r:.0f}' for r in rates)})  "
+                f"p50 {_percentile(latencies, 50):6.1f} ms  p95 {_percentile(latencies, 95):6.1f} ms"
+            )
+    finally:
+        await async_engine.dispose()
+        _delete_users([user_id for user_id, _ in users])
+        engine.dispose()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per path per round")
+    parser.add_argument("--concurrency", type=int, default=32, help="Requests in flight at once")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--users", type=int, default=32, help="Users the requests are spread over")
+    args = parser.parse_args()
+    asyncio.run(bench(args.requests, args.concurrency, args.rounds, args.users))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
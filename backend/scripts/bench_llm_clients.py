@@ -0,0 +1,194 @@
+"""
+Benchmark: per-call latency and input tokens of the Gemini parse path,
+before (new GenerativeModel per call, prompt sent in contents) and after
+(reused client, prompt prefix sent once as cached content / system instruction).
+
+Runs against a local stub of the Gemini REST API, so no API key or network is needed.
+The stub counts ~4 characters per token and reports prompt tokens that come from
+cached content as cachedContentTokenCount, like the real API.
+
+Usage (from the backend directory):
+    python -m scripts.bench_llm_clients --calls 200 --stub-latency-ms 20
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+import google.generativeai as genai
+
+from app.core.config import settings
+from app.services import llm_parser
+
+SAMPLE_ENTRIES = [
+    "2 eggs and toast",
+    "10k steps",
+    "weight 81.2 kg",
+    "chicken salad with olive oil dressing and a coke",
+    "oatmeal with banana and peanut butter",
+]
+
+STUB_RESPONSE_TEXT = '```json\n{"type": "steps", "value": 10000, "parsed_data": {"original_text": "10k steps"}}\n```'
+
+
+def _estimate_tokens(payload) -> int:
+    """Rough token count (~4 chars/token) of all text parts in a REST payload."""
+    if payload is None:
+        return 0
+    if isinstance(payload, dict):
+        return sum(_estimate_tokens(v) for k, v in payload.items() if k in ("parts", "text", "contents"))
+    if isinstance(payload, list):
+        return sum(_estimate_tokens(v) for v in payload)
+    if isinstance(payload, str):
+        return max(1, len(payload) // 4)
+    return 0
+
+
+class _StubState:
+    def __init__(self, latency_s: float):
+        self.latency_s = latency_s
+        self.cached_contents: Dict[str, int] = {} # name -> token count
+        self.lock = threading.Lock()
+
+
+def _make_handler(state: _StubState):
+    class StubGeminiHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, body: dict):
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            path = self.path.split("?")[0]
+
+            if path.endswith("/cachedContents"):
+                name = f"cachedContents/{uuid.uuid4().hex[:12]}"
+                tokens = _estimate_tokens(body.get("systemInstruction")) + _estimate_tokens(body.get("contents"))
+                with state.lock:
+                    state.cached_contents[name] = tokens
+                expire = datetime.now(timezone.utc) + timedelta(hours=1)
+                return self._send({
+                    "name": name,
+                    "model": body.get("model"),
+                    "displayName": body.get("displayName", ""),
+                    "createTime": datetime.now(timezone.utc).isoformat(),
+                    "updateTime": datetime.now(timezone.utc).isoformat(),
+                    "expireTime": expire.isoformat(),
+                    "usageMetadata": {"totalTokenCount": tokens},
+                })
+
+            if path.endswith(":countTokens"):
+                return self._send({"totalTokens": _estimate_tokens(body.get("contents"))})
+
+            if path.endswith(":generateContent"):
+                time.sleep(state.latency_s)
+                prompt_tokens = _estimate_tokens(body.get("contents")) + _estimate_tokens(body.get("systemInstruction"))
+                cached_tokens = 0
+                if body.get("cachedContent"):
+                    with state.lock:
+                        cached_tokens = state.cached_contents.get(body["cachedContent"], 0)
+                    prompt_tokens += cached_tokens
+                output_tokens = _estimate_tokens(STUB_RESPONSE_TEXT)
+                return self._send({
+                    "candidates": [{
+                        "content": {"role": "model", "parts": [{"text": STUB_RESPONSE_TEXT}]},
+                        "finishReason": "STOP",
+                        "index": 0,
+                    }],
+                    "usageMetadata": {
+                        "promptTokenCount": prompt_tokens,
+                        "cachedContentTokenCount": cached_tokens,
+                        "candidatesTokenCount": output_tokens,
+                        "totalTokenCount": prompt_tokens + output_tokens,
+                    },
+                })
+
+            self.send_response(404)
+            self.end_headers()
+
+    return StubGeminiHandler
+
+
+def _summarize(label: str, latencies_ms: List[float], usages: List[dict]) -> None:
+    prompt = [u.prompt_token_count for u in usages]
+    cached = [u.cached_content_token_count for u in usages]
+    billed = [p - c for p, c in zip(prompt, cached)]
+    p95 = sorted(latencies_ms)[max(0, int(len(latencies_ms) * 0.95) - 1)]
+    print(f"{label:<8} first call {latencies_ms[0]:7.2f} ms | "
+          f"p50 {statistics.median(latencies_ms[1:] or latencies_ms):6.2f} ms | p95 {p95:6.2f} ms | "
+          f"prompt tokens/call {statistics.mean(prompt):6.1f} | "
+          f"cached {statistics.mean(cached):6.1f} | uncached input {statistics.mean(billed):6.1f}")
+
+
+def _run_before(calls: int) -> None:
+    """The pre-change path: a fresh model per call with the few-shot prompt in contents."""
+    latencies, usages = [], []
+    for i in range(calls):
+        text = SAMPLE_ENTRIES[i % len(SAMPLE_ENTRIES)]
+        start = time.perf_counter()
+        model = genai.GenerativeModel(
+            llm_parser.LLM_MODEL_NAME,
+            generation_config=llm_parser.generation_config,
+            safety_settings=llm_parser.safety_settings,
+        )
+        response = model.generate_content([llm_parser.PROMPT_INSTRUCTION, text])
+        latencies.append((time.perf_counter() - start) * 1000)
+        usages.append(response.usage_metadata)
+    _summarize("before", latencies, usages)
+
+
+def _run_after(calls: int, warm_up: bool) -> None:
+    """The current path: reused client with the prompt prefix attached once."""
+    llm_parser._models.clear()
+    llm_parser._model_expiry.clear()
+    if warm_up:
+        llm_parser.warm_up_llm_clients()
+    latencies, usages = [], []
+    for i in range(calls):
+        text = SAMPLE_ENTRIES[i % len(SAMPLE_ENTRIES)]
+        start = time.perf_counter()
+        response = llm_parser._get_model().generate_content(llm_parser._build_prompt_parts(text))
+        latencies.append((time.perf_counter() - start) * 1000)
+        usages.append(response.usage_metadata)
+    _summarize("after", latencies, usages)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--stub-latency-ms", type=float, default=20.0, help="Simulated model latency per call")
+    parser.add_argument("--no-warm-up", action="store_true", help="Skip the startup warm-up in the 'after' run")
+    args = parser.parse_args()
+
+    state = _StubState(latency_s=args.stub_latency_ms / 1000)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"Stub Gemini server on {endpoint}, {args.calls} calls per run, {args.stub_latency_ms} ms simulated latency")
+
+    # The warm-up is skipped for the placeholder key, so use a dummy one against the stub
+    settings.GOOGLE_API_KEY = "stub-key"
+    genai.configure(api_key=settings.GOOGLE_API_KEY, transport="rest", client_options={"api_endpoint": endpoint})
+
+    try:
+        _run_before(args.calls)
+        _run_after(args.calls, warm_up=not args.no_warm_up)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
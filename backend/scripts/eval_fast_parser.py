@@ -0,0 +1,72 @@
+"""
+Corpus-based accuracy and latency check for the deterministic fast-path parser
+(app/services/fast_parser.py).
+
+Each corpus line is {"text": ..., "expected": {"type", "value", "unit"} | null};
+null means the entry must fall through to the LLM. Any wrong answer or false
+accept fails the run (exit code 1), since a confident wrong parse is never re-checked.
+
+Usage (from the backend directory):
+    python -m scripts.eval_fast_parser [--corpus scripts/data/fast_parser_corpus.jsonl] [--repeat 2000]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from app.services.fast_parser import parse_simple_entry
+
+DEFAULT_CORPUS = Path(__file__).parent / "data" / "fast_parser_corpus.jsonl"
+
+
+def _matches(result, expected) -> bool:
+    if expected is None or result is None:
+        return result is None and expected is None
+    return (
+        result["type"] == expected["type"]
+        and result["unit"] == expected["unit"]
+        and abs(float(result["value"]) - float(expected["value"])) < 0.05
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--repeat", type=int, default=2000, help="Timed parses per corpus line")
+    args = parser.parse_args()
+
+    cases = [json.loads(line) for line in args.corpus.read_text().splitlines() if line.strip()]
+    failures = []
+    accepted = correct_accepts = should_accept = 0
+    for case in cases:
+        result = parse_simple_entry(case["text"])
+        if result is not None:
+            accepted += 1
+        if case["expected"] is not None:
+            should_accept += 1
+        if _matches(result, case["expected"]):
+            if result is not None:
+                correct_accepts += 1
+        else:
+            failures.append((case["text"], case["expected"], result))
+
+    latencies_us = []
+    for case in cases:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            parse_simple_entry(case["text"])
+        latencies_us.append((time.perf_counter() - start) / args.repeat * 1e6)
+
+    print(f"Corpus: {len(cases)} entries ({should_accept} fast-path, {len(cases) - should_accept} LLM fall-through)")
+    print(f"Precision: {correct_accepts}/{accepted} accepted parses correct")
+    print(f"Coverage:  {correct_accepts}/{should_accept} fast-path entries handled locally")
+    print(f"Latency:   p50 {statistics.median(latencies_us):.1f} us, max {max(latencies_us):.1f} us per parse")
+    for text, expected, result in failures:
+        print(f"FAIL: {text!r}: expected {expected}, got {result}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""
+Checks the product-name matcher (app/services/name_matching.py) against labelled
+item/product pairs.
+
+Each line of the pairs file is {"query": item name, "candidate": product name,
+"match": true | false}. A false accept gives the item another food's nutrition, so any
+wrong verdict at NAME_MATCH_THRESHOLD fails the run (exit code 1).
+
+Usage (from the backend directory):
+    python -m scripts.eval_name_matching [--pairs scripts/data/name_matching_pairs.jsonl] [--threshold 0.6]
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from app.core.config import settings
+from app.services.name_matching import similarity
+
+DEFAULT_PAIRS = Path(__file__).parent / "data" / "name_matching_pairs.jsonl"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=Path, default=DEFAULT_PAIRS)
+    parser.add_argument("--threshold", type=float, default=settings.NAME_MATCH_THRESHOLD)
+    args = parser.parse_args()
+
+    cases = [json.loads(line) for line in args.pairs.read_text().splitlines() if line.strip()]
+    failures = []
+    false_accepts = false_rejects = 0
+    for case in cases:
+        score = similarity(case["query"], case["candidate"])
+        accepted = score >= args.threshold
+        if accepted != case["match"]:
+            failures.append((case, score))
+            if accepted:
+                false_accepts += 1
+            else:
+                false_rejects += 1
+
+    matches = sum(1 for case in cases if case["match"])
+    print(f"Pairs: {len(cases)} ({matches} matches, {len(cases) - matches} non-matches) at threshold {args.threshold}")
+    print(f"False accepts: {false_accepts}, false rejects: {false_rejects}")
+    for case, score in failures:
+        expected = "match" if case["match"] else "no match"
+        print(f"FAIL: {case['query']!r} vs {case['candidate']!r}: expected {expected}, scored {score:.2f}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
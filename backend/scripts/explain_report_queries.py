@@ -0,0 +1,144 @@
+"""
+Checks that the per-user entry list/pages, report and daily-rollup queries read
+health_entries through the composite (owner_id, timestamp) /
+(owner_id, entry_type, timestamp) indexes rather than scanning the table.
+
+Seeds synthetic users and entries inside a transaction (rolled back at the end, so
+it is safe against a dev database that has been migrated to head), runs the CRUD
+report functions while recording the SQL they send, then EXPLAINs each statement.
+Exits non-zero if any of them reads health_entries with a sequential scan or
+through some other index.
+
+Usage (from the backend directory):
+    python -m scripts.explain_report_queries [--users 200] [--entries-per-user 2000]
+"""
+import argparse
+import json
+import sys
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.crud.crud_daily_rollup import daily_rollup
+from app.crud.crud_health_entry import health_entry
+from app.db.session import engine
+
+EXPECTED_INDEXES = {
+    "ix_health_entries_owner_id_timestamp",
+    "ix_health_entries_owner_id_entry_type_timestamp",
+}
+INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+# Fetches the rows found by its Bitmap Index Scan children, which are checked themselves
+BITMAP_HEAP_SCAN = "Bitmap Heap Scan"
+
+# Spread over the last ~90 days, one in three of each type, like a real log
+SEED_SQL = """
+WITH new_users AS (
+    INSERT INTO users (email, hashed_password, is_active)
+    SELECT 'explain-' || g || '@example.invalid', 'x', true FROM generate_series(1, :users) AS g
+    RETURNING id
+)
+INSERT INTO health_entries (entry_text, timestamp, owner_id, entry_type, value, unit, parsed_data,
+                            total_calories, total_protein_g, total_carbs_g, total_fat_g)
+SELECT
+    'seed entry',
+    now() AT TIME ZONE 'utc' - (random() * interval '90 days'),
+    u.id,
+    ((ARRAY['food', 'weight', 'steps'])[1 + (n % 3)])::health_entry_type,
+    CASE n % 3 WHEN 1 THEN 60 + random() * 40 WHEN 2 THEN floor(random() * 12000) END,
+    (ARRAY[NULL, 'kg', 'steps'])[1 + (n % 3)],
+    CASE n % 3 WHEN 0 THEN '{"total_calories": 450, "total_protein_g": 20, "total_carbs_g": 50, "total_fat_g": 15}'::json END,
+    CASE n % 3 WHEN 0 THEN 450 END, CASE n % 3 WHEN 0 THEN 20 END,
+    CASE n % 3 WHEN 0 THEN 50 END, CASE n % 3 WHEN 0 THEN 15 END
+FROM new_users AS u, generate_series(1, :entries) AS n
+RETURNING owner_id
+"""
+
+
+def _plan_nodes(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def _entry_scans(plan: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """(node type, index name) of every plan node reading health_entries."""
+    scans = []
+    for node in _plan_nodes(plan):
+        if node.get("Relation Name") == "health_entries" or node.get("Index Name", "").startswith("ix_health_entries"):
+            scans.append((node["Node Type"], node.get("Index Name", "")))
+    return scans
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--entries-per-user", type=int, default=2000)
+    args = parser.parse_args()
+
+    today = date.today()
+    now = datetime.utcnow()
+    reports = {
+        "entries list": lambda db, uid: health_entry.get_multi_by_owner(db, owner_id=uid, limit=100),
+        "entries page": lambda db, uid: health_entry.get_multi_by_owner(db, owner_id=uid, limit=101, after=(now - timedelta(days=30), 2 ** 31 - 1)),
+        "food page, 2 weeks": lambda db, uid: health_entry.get_multi_by_owner(
+            db, owner_id=uid, limit=101, entry_type="food", start=now - timedelta(days=14), end=now, after=(now - timedelta(days=3), 2 ** 31 - 1)
+        ),
+        "daily summary": lambda db, uid: health_entry.get_daily_summary(db, user_id=uid, target_date=today, tz_offset_minutes=-120),
+        "weekly summary": lambda db, uid: health_entry.get_weekly_summary(db, user_id=uid, target_date=today, tz_offset_minutes=300),
+        "trends (30 days)": lambda db, uid: health_entry.get_trends(db, user_id=uid, start_date=today - timedelta(days=30), end_date=today),
+        "rollup refresh": lambda db, uid: daily_rollup.refresh_for_timestamps(db, owner_id=uid, timestamps=[datetime.utcnow()]),
+    }
+
+    failures = 0
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            print(f"Seeding {args.users} users x {args.entries_per_user} entries (rolled back afterwards)...")
+            owner_id = conn.execute(text(SEED_SQL), {"users": args.users, "entries": args.entries_per_user}).scalar()
+            conn.execute(text("ANALYZE users"))
+            conn.execute(text("ANALYZE health_entries"))
+
+            captured: List[Tuple[str, Any]] = []
+
+            def record(_conn, _cursor, statement, parameters, _context, _executemany):
+                if "FROM health_entries" in statement: # Includes the INSERT ... SELECTs that build rollups
+                    captured.append((statement, parameters))
+
+            db = Session(bind=conn)
+            for name, run in reports.items():
+                captured.clear()
+                event.listen(conn, "before_cursor_execute", record)
+                try:
+                    run(db, owner_id)
+                finally:
+                    event.remove(conn, "before_cursor_execute", record)
+
+                for statement, parameters in captured:
+                    plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+                    plan = plan if isinstance(plan, list) else json.loads(plan)
+                    scans = _entry_scans(plan[0]["Plan"])
+                    ok = any(index in EXPECTED_INDEXES for _, index in scans) and all(
+                        node_type == BITMAP_HEAP_SCAN or (node_type in INDEX_SCANS and index in EXPECTED_INDEXES)
+                        for node_type, index in scans
+                    )
+                    failures += not ok
+                    summary = ", ".join(f"{node_type} using {index}" if index else node_type for node_type, index in scans)
+                    print(f"{'ok  ' if ok else 'FAIL'} {name:18} {summary}")
+                    if not ok:
+                        print("     " + " ".join(statement.split()))
+            db.close()
+        finally:
+            trans.rollback()
+
+    if failures:
+        print(f"\n{failures} report queries do not use the owner/time indexes")
+        return 1
+    print("\nAll report queries use the owner/time indexes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
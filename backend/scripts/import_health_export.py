@@ -0,0 +1,72 @@
+"""
+Imports steps and weight from an Apple Health export (export.zip or its export.xml) or
+a Google Fit (Takeout) "Daily activity metrics.csv" into a user's entries, like
+POST /api/v1/entries/import but without the upload.
+
+The file is parsed as a stream (constant memory for any size) and records are mapped
+straight to steps/weight entries without the LLM, inserted and committed in batches of
+--batch-size. Apple Health steps become one entry per day, counted from the device
+that recorded the most. Records the user already has are skipped, so an interrupted
+import can simply be re-run; daily totals that changed since (a newer export) are updated.
+
+Usage (from the backend directory):
+    python -m scripts.import_health_export ~/Downloads/export.zip --email you@example.com
+    python -m scripts.import_health_export "Daily activity metrics.csv" --email you@example.com
+"""
+import argparse
+import sys
+import time
+
+from app import crud
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services import health_import
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="export.zip / export.xml / daily metrics CSV")
+    parser.add_argument("--email", required=True, help="User to import into")
+    parser.add_argument("--source", choices=health_import.IMPORT_SOURCES, help="Default: guessed from the file name")
+    parser.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_ROWS)
+    args = parser.parse_args()
+
+    try:
+        source = args.source or health_import.detect_source(args.path)
+    except health_import.ImportFormatError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    db = SessionLocal()
+    try:
+        user = crud.user.get_by_email(db, email=args.email)
+        if user is None:
+            print(f"No user with email {args.email}", file=sys.stderr)
+            return 2
+        owner_id = user.id
+        db.rollback()
+
+        print(f"Importing {source} export {args.path} for user {owner_id}")
+        start = time.perf_counter()
+        progress = {}
+        try:
+            for progress in health_import.import_export_file(
+                db, owner_id=owner_id, export=args.path, source=source, batch_size=args.batch_size
+            ):
+                elapsed = time.perf_counter() - start
+                print(
+                    f"  {progress['records']} records read, {progress['imported']} imported, "
+                    f"{progress['updated']} updated, {progress['duplicates']} duplicates, {progress['invalid']} invalid "
+                    f"({progress['records'] / max(elapsed, 1e-3):.0f} records/s)"
+                )
+        except health_import.ImportFormatError as e:
+            print(e, file=sys.stderr)
+            return 1
+    finally:
+        db.close()
+    print(f"Done in {time.perf_counter() - start:.1f}s: {progress}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
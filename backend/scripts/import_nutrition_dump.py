@@ -0,0 +1,336 @@
+"""
+Streams an Open Food Facts or USDA FoodData Central dump into the local
+nutrition_products table, which get_nutrition_from_off consults before the OFF API.
+
+Formats (plain or .gz):
+    off-jsonl  openfoodfacts-products.jsonl, one product JSON object per line
+    off-csv    en.openfoodfacts.org.products.csv (tab-separated)
+    usda       a FoodData Central CSV download directory (food.csv + food_nutrient.csv)
+
+Rows are read and upserted in batches (one transaction each), so memory stays flat
+however large the dump is and an interrupted import keeps its progress. Products are
+keyed on source + barcode / fdc_id: re-running an import updates them in place.
+Products without a name or with missing/implausible per-100g values are skipped.
+
+The table is created by the migrations; run `alembic upgrade head` first.
+
+Usage (from the backend directory):
+    python -m scripts.import_nutrition_dump ~/dumps/openfoodfacts-products.jsonl.gz
+    python -m scripts.import_nutrition_dump ~/dumps/FoodData_Central_csv_2024-10-31 --format usda
+"""
+import argparse
+import csv
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, text
+from sqlalchemy.dialects.postgresql import insert
+
+from app.db.session import engine
+from app.models.nutrition_product import NutritionProduct
+from app.services.local_nutrition import normalize_product_name
+
+KJ_PER_KCAL = 4.184
+MAX_KCAL_100G = 950.0 # Pure fat is ~900 kcal/100g
+MAX_NAME_LENGTH = 300
+PROGRESS_EVERY = 100_000
+
+# USDA nutrient ids (nutrient.csv)
+USDA_ENERGY_KCAL = (1008, 2047, 2048) # Energy, then Atwater general/specific factors (Foundation foods)
+USDA_PROTEIN = 1003
+USDA_FAT = 1004
+USDA_CARBS = (1005, 1050) # By difference, then by summation
+
+_UPDATE_COLUMNS = ("product_name", "name_normalized", "calories_100g", "protein_100g", "carbs_100g", "fat_100g", "popularity")
+
+
+def _open_text(path: Path):
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace", newline="")
+    return open(path, "r", encoding="utf-8", errors="replace", newline="")
+
+
+def _number(value: Any) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _product_row(source: str, external_id: Any, name: Any, kcal: Any, protein: Any,
+                 carbs: Any, fat: Any, popularity: Any = 0) -> Optional[Dict[str, Any]]:
+    """A nutrition_products row, or None when the product is unusable."""
+    name = str(name or "").strip()
+    normalized = normalize_product_name(name)
+    if not external_id or not normalized or len(name) > MAX_NAME_LENGTH:
+        return None
+    values = [_number(v) for v in (kcal, protein, carbs, fat)]
+    if any(v is None or v < 0 for v in values):
+        return None
+    kcal, protein, carbs, fat = values
+    if kcal > MAX_KCAL_100G or protein > 100 or carbs > 100 or fat > 100 or protein + carbs + fat > 105:
+        return None
+    return {
+        "source": source,
+        "external_id": str(external_id),
+        "product_name": name,
+        "name_normalized": normalized,
+        "calories_100g": round(kcal, 2),
+        "protein_100g": round(protein, 2),
+        "carbs_100g": round(carbs, 2),
+        "fat_100g": round(fat, 2),
+        "popularity": int(_number(popularity) or 0),
+    }
+
+
+def _off_kcal(fields: Dict[str, Any]) -> Optional[float]:
+    kcal = _number(fields.get("energy-kcal_100g"))
+    if kcal is None:
+        kj = _number(fields.get("energy_100g")) # OFF's generic energy field is in kJ
+        kcal = kj / KJ_PER_KCAL if kj is not None else None
+    return kcal
+
+
+def iter_off_jsonl(path: Path) -> Iterator[Optional[Dict[str, Any]]]:
+    """Yields one row (or None for a skipped product) per dump line."""
+    with _open_text(path) as f:
+        for line in f:
+            try:
+                product = json.loads(line)
+            except ValueError:
+                yield None
+                continue
+            nutriments = product.get("nutriments") or {}
+            yield _product_row(
+                "off", product.get("code"),
+                product.get("product_name") or product.get("product_name_en"),
+                _off_kcal(nutriments), nutriments.get("proteins_100g"),
+                nutriments.get("carbohydrates_100g"), nutriments.get("fat_100g"),
+                product.get("unique_scans_n"),
+            )
+
+
+def iter_off_csv(path: Path) -> Iterator[Optional[Dict[str, Any]]]:
+    csv.field_size_limit(sys.maxsize) # Some OFF columns (ingredients, categories) are very long
+    with _open_text(path) as f:
+        for record in csv.DictReader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+            yield _product_row(
+                "off", record.get("code"), record.get("product_name"),
+                _off_kcal(record), record.get("proteins_100g"),
+                record.get("carbohydrates_100g"), record.get("fat_100g"),
+                record.get("unique_scans_n"),
+            )
+
+
+def _batches(rows: Iterable[Optional[Dict[str, Any]]], batch_size: int, stats: Dict[str, int],
+             limit: Optional[int]) -> Iterator[List[Dict[str, Any]]]:
+    # Keyed on external_id: a batch is one INSERT ... ON CONFLICT, which cannot touch a row twice
+    batch: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        stats["read"] += 1
+        if row is None:
+            stats["skipped"] += 1
+        else:
+            batch[row["external_id"]] = row
+        if len(batch) >= batch_size:
+            yield list(batch.values())
+            batch = {}
+        if stats["read"] % PROGRESS_EVERY == 0:
+            print(f"  {stats['read']:,} read, {stats['imported']:,} imported, {stats['skipped']:,} skipped", flush=True)
+        if limit and stats["read"] >= limit:
+            break
+    if batch:
+        yield list(batch.values())
+
+
+def _upsert_statement():
+    stmt = insert(NutritionProduct)
+    return stmt.on_conflict_do_update(
+        constraint="uq_nutrition_products_source_external_id",
+        set_={column: stmt.excluded[column] for column in _UPDATE_COLUMNS},
+    )
+
+
+def import_off(path: Path, fmt: str, batch_size: int, limit: Optional[int]) -> Dict[str, int]:
+    rows = iter_off_jsonl(path) if fmt == "off-jsonl" else iter_off_csv(path)
+    stats = {"read": 0, "imported": 0, "skipped": 0}
+    stmt = _upsert_statement()
+    for batch in _batches(rows, batch_size, stats, limit):
+        with engine.begin() as conn:
+            conn.execute(stmt, batch)
+        stats["imported"] += len(batch)
+    return stats
+
+
+def import_usda(directory: Path, batch_size: int, limit: Optional[int]) -> Dict[str, int]:
+    """
+    FoodData Central spreads a food over food.csv (name) and food_nutrient.csv (one row
+    per nutrient). Both are streamed into temporary tables and pivoted in Postgres, so
+    nothing proportional to the dump is held in memory.
+    """
+    def find(name: str) -> Path:
+        for candidate in (directory / name, directory / f"{name}.gz"):
+            if candidate.exists():
+                return candidate
+        raise SystemExit(f"{name} not found in {directory}")
+
+    staging = MetaData()
+    usda_food = Table(
+        "usda_food_staging", staging,
+        Column("fdc_id", String, primary_key=True),
+        Column("description", String, nullable=False),
+        Column("name_normalized", String, nullable=False),
+        prefixes=["TEMPORARY"],
+    )
+    usda_nutrient = Table(
+        "usda_nutrient_staging", staging,
+        Column("fdc_id", String, nullable=False),
+        Column("nutrient_id", Integer, nullable=False),
+        Column("amount", Float, nullable=False),
+        prefixes=["TEMPORARY"],
+    )
+    wanted = set(USDA_ENERGY_KCAL) | set(USDA_CARBS) | {USDA_PROTEIN, USDA_FAT}
+    stats = {"read": 0, "imported": 0, "skipped": 0}
+
+    # One connection/transaction: temporary tables are per-session
+    with engine.begin() as conn:
+        staging.create_all(conn)
+
+        foods: List[Dict[str, Any]] = []
+        with _open_text(find("food.csv")) as f:
+            for record in csv.DictReader(f):
+                stats["read"] += 1
+                description = (record.get("description") or "").strip()
+                normalized = normalize_product_name(description)
+                if not normalized or len(description) > MAX_NAME_LENGTH:
+                    stats["skipped"] += 1
+                else:
+                    foods.append({"fdc_id": record["fdc_id"], "description": description, "name_normalized": normalized})
+                if len(foods) >= batch_size:
+                    conn.execute(usda_food.insert(), foods)
+                    foods = []
+                if limit and stats["read"] >= limit:
+                    break
+        if foods:
+            conn.execute(usda_food.insert(), foods)
+        print(f"  staged {stats['read'] - stats['skipped']:,} foods", flush=True)
+
+        nutrients: List[Dict[str, Any]] = []
+        staged_nutrients = 0
+        with _open_text(find("food_nutrient.csv")) as f:
+            for record in csv.DictReader(f):
+                try:
+                    nutrient_id = int(record["nutrient_id"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                amount = _number(record.get("amount"))
+                if nutrient_id not in wanted or amount is None:
+                    continue
+                nutrients.append({"fdc_id": record["fdc_id"], "nutrient_id": nutrient_id, "amount": amount})
+                if len(nutrients) >= batch_size:
+                    conn.execute(usda_nutrient.insert(), nutrients)
+                    staged_nutrients += len(nutrients)
+                    nutrients = []
+                    if staged_nutrients % PROGRESS_EVERY < batch_size:
+                        print(f"  staged {staged_nutrients:,} nutrient values", flush=True)
+        if nutrients:
+            conn.execute(usda_nutrient.insert(), nutrients)
+
+        conn.execute(text("CREATE INDEX ON usda_nutrient_staging (fdc_id)"))
+        result = conn.execute(text("""
+            INSERT INTO nutrition_products
+                (source, external_id, product_name, name_normalized,
+                 calories_100g, protein_100g, carbs_100g, fat_100g, popularity)
+            SELECT 'usda', f.fdc_id, f.description, f.name_normalized,
+                   round(n.kcal::numeric, 2), round(n.protein::numeric, 2),
+                   round(n.carbs::numeric, 2), round(n.fat::numeric, 2), 0
+            FROM usda_food_staging f
+            JOIN (
+                SELECT fdc_id,
+                       coalesce(max(amount) FILTER (WHERE nutrient_id = :kcal_1),
+                                max(amount) FILTER (WHERE nutrient_id = :kcal_2),
+                                max(amount) FILTER (WHERE nutrient_id = :kcal_3)) AS kcal,
+                       max(amount) FILTER (WHERE nutrient_id = :protein) AS protein,
+                       coalesce(max(amount) FILTER (WHERE nutrient_id = :carbs_1),
+                                max(amount) FILTER (WHERE nutrient_id = :carbs_2)) AS carbs,
+                       max(amount) FILTER (WHERE nutrient_id = :fat) AS fat
+                FROM usda_nutrient_staging
+                GROUP BY fdc_id
+            ) n ON n.fdc_id = f.fdc_id
+            WHERE n.kcal BETWEEN 0 AND :max_kcal
+              AND n.protein BETWEEN 0 AND 100
+              AND n.carbs BETWEEN 0 AND 100
+              AND n.fat BETWEEN 0 AND 100
+              AND n.protein + n.carbs + n.fat <= 105
+            ON CONFLICT ON CONSTRAINT uq_nutrition_products_source_external_id DO UPDATE SET
+                product_name = excluded.product_name,
+                name_normalized = excluded.name_normalized,
+                calories_100g = excluded.calories_100g,
+                protein_100g = excluded.protein_100g,
+                carbs_100g = excluded.carbs_100g,
+                fat_100g = excluded.fat_100g
+        """), {
+            "kcal_1": USDA_ENERGY_KCAL[0], "kcal_2": USDA_ENERGY_KCAL[1], "kcal_3": USDA_ENERGY_KCAL[2],
+            "protein": USDA_PROTEIN, "carbs_1": USDA_CARBS[0], "carbs_2": USDA_CARBS[1], "fat": USDA_FAT,
+            "max_kcal": MAX_KCAL_100G,
+        })
+        stats["imported"] = result.rowcount
+        stats["skipped"] = stats["read"] - stats["imported"]
+    return stats
+
+
+def _detect_format(path: Path) -> str:
+    if path.is_dir():
+        return "usda"
+    name = path.name.lower().removesuffix(".gz")
+    if name.endswith(".jsonl") or name.endswith(".json"):
+        return "off-jsonl"
+    if name.endswith(".csv") or name.endswith(".tsv"):
+        return "off-csv"
+    raise SystemExit(f"Cannot tell the dump format of {path}; pass --format")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", type=Path, help="Dump file, or FoodData Central CSV directory")
+    parser.add_argument("--format", choices=["off-jsonl", "off-csv", "usda"], help="Default: from the path")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per INSERT/transaction")
+    parser.add_argument("--limit", type=int, help="Stop after this many input rows (for trial runs)")
+    parser.add_argument("--replace", action="store_true",
+                        help="Delete this source's existing products first (drops products removed from the dump)")
+    args = parser.parse_args()
+
+    fmt = args.format or _detect_format(args.path)
+    source = "usda" if fmt == "usda" else "off"
+    if args.replace:
+        with engine.begin() as conn:
+            deleted = conn.execute(NutritionProduct.__table__.delete().where(NutritionProduct.source == source)).rowcount
+        print(f"Deleted {deleted:,} existing '{source}' products")
+
+    print(f"Importing {args.path} ({fmt}) in batches of {args.batch_size}")
+    start = time.perf_counter()
+    if fmt == "usda":
+        stats = import_usda(args.path, args.batch_size, args.limit)
+    else:
+        stats = import_off(args.path, fmt, args.batch_size, args.limit)
+    elapsed = time.perf_counter() - start
+
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE nutrition_products"))
+        total = conn.execute(text("SELECT count(*) FROM nutrition_products")).scalar()
+    print(
+        f"Done in {elapsed:.1f}s: {stats['read']:,} read, {stats['imported']:,} imported, "
+        f"{stats['skipped']:,} skipped ({stats['read'] / elapsed if elapsed else 0:,.0f} rows/s). "
+        f"nutrition_products now has {total:,} rows."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
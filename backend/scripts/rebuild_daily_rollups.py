@@ -0,0 +1,72 @@
+"""
+Rebuilds the daily_rollups read by the summary and trend reports from health_entries.
+
+Rollups are built per user and UTC offset on the first report read and then kept up
+to date by every entry write, so this is only needed to repair them (e.g. after rows
+were changed by hand or by an older version of the app) or to build them ahead of
+time. Each user/offset is rebuilt in its own transaction.
+
+By default every offset already built is rebuilt; --tz-offset also builds that
+offset for users who do not have it yet.
+
+Usage (from the backend directory):
+    python -m scripts.rebuild_daily_rollups
+    python -m scripts.rebuild_daily_rollups --user-id 42
+    python -m scripts.rebuild_daily_rollups --tz-offset -480   # backfill SGT for every user
+"""
+import argparse
+import sys
+import time
+from typing import List, Set, Tuple
+
+from app.crud.crud_daily_rollup import daily_rollup
+from app.db.session import SessionLocal
+from app.models.daily_rollup import DailyRollupZone
+from app.models.user import User
+
+
+def _targets(db, user_ids: List[int], tz_offsets: List[int]) -> List[Tuple[int, int]]:
+    query = db.query(DailyRollupZone.owner_id, DailyRollupZone.tz_offset_minutes)
+    if user_ids:
+        query = query.filter(DailyRollupZone.owner_id.in_(user_ids))
+    targets: Set[Tuple[int, int]] = {(owner_id, offset) for owner_id, offset in query.all()}
+    if tz_offsets:
+        users = db.query(User.id)
+        if user_ids:
+            users = users.filter(User.id.in_(user_ids))
+        targets.update((owner_id, offset) for (owner_id,) in users.all() for offset in tz_offsets)
+    return sorted(targets)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=int, action="append", default=[], help="Only this user (repeatable)")
+    parser.add_argument("--tz-offset", type=int, action="append", default=[],
+                        help="Also build this offset (minutes, UTC - local) where missing (repeatable)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        targets = _targets(db, args.user_id, args.tz_offset)
+        db.rollback()
+        print(f"Rebuilding {len(targets)} user/offset rollup sets")
+        start = time.perf_counter()
+        total_days = 0
+        for owner_id, tz_offset_minutes in targets:
+            try:
+                days = daily_rollup.rebuild(db, owner_id=owner_id, tz_offset_minutes=tz_offset_minutes)
+                db.commit()
+            except Exception:
+                db.rollback()
+                print(f"Failed to rebuild user {owner_id}, offset {tz_offset_minutes}", file=sys.stderr)
+                raise
+            total_days += days
+            print(f"  user {owner_id}, offset {tz_offset_minutes}: {days} days")
+    finally:
+        db.close()
+    print(f"Rebuilt {total_days} daily rollups in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())